@@ -1,25 +1,89 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, send_from_directory, make_response, abort, \
+    stream_with_context, has_request_context, before_render_template, template_rendered
+from functools import wraps
 from flask_sqlalchemy import SQLAlchemy
 from flask_mail import Mail, Message
 from flask_admin import Admin, AdminIndexView, expose
 from flask_admin.contrib.sqla import ModelView
 from flask_wtf import FlaskForm
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from wtforms import StringField, TextAreaField, SelectField, PasswordField, FileField
+from wtforms import StringField, TextAreaField, SelectField, PasswordField, FileField, MultipleFileField
 from wtforms.validators import DataRequired, Email, Length
 from flask_wtf.file import FileField, FileAllowed
 from flask_admin.form import Select2Field
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag, unquote_etag
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
 import secrets
-from PIL import Image
+import threading
+import time
+import hashlib
+import hmac
+import pickle
+import tempfile
+import shutil
+import filecmp
+import cProfile
+import click
+import html
+import math
+import io
+import gzip
+import json
+import mimetypes
+import re
+import csv
+import sqlite3
+import urllib.request
+from urllib.parse import unquote, urlsplit
+from collections import OrderedDict
+from html.parser import HTMLParser
+from xml.sax.saxutils import XMLGenerator
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
+from sqlalchemy.engine import Engine
+from markupsafe import Markup, escape
+from PIL import Image, ImageOps, features as pil_features
 
-app = Flask(__name__)
+try:
+    import brotli
+except ImportError:  # optional: .br assets are skipped without it
+    brotli = None
+
+class SiteFlask(Flask):
+    """Flask that refuses to run until create_app() has configured it.
+
+    Routes are registered on the module-level app at import, but its
+    extensions are only bound by create_app(). Serving it before then (the
+    pre-factory targets `gunicorn app_enhanced:app` and
+    `flask --app app_enhanced`) would fail deep inside an extension instead.
+    """
+    created = False
+
+    def _check_created(self):
+        if not self.created:
+            raise RuntimeError("app_enhanced.app has not been configured: serve wsgi:app "
+                               "(gunicorn wsgi:app, flask --app wsgi ...) or call create_app() first")
+
+    def __call__(self, environ, start_response):
+        self._check_created()
+        return super().__call__(environ, start_response)
+
+    def app_context(self):
+        self._check_created()
+        return super().app_context()
+
+app = SiteFlask(__name__)
 
 # Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(16))
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')  # when unset, shared through SECRET_KEY_FILE
+app.config['SECRET_KEY_FILE'] = os.environ.get('SECRET_KEY_FILE', os.path.join(app.instance_path, 'secret_key'))
 # --- DATABASE CONFIGURATION ---
 uri = os.environ.get('DATABASE_URL', 'sqlite:///blackstone_eg.db')
 if uri and uri.startswith("postgres://"):
@@ -27,10 +91,68 @@ if uri and uri.startswith("postgres://"):
     uri = uri.replace("postgres://", "postgresql://", 1)
 
 app.config['SQLALCHEMY_DATABASE_URI'] = uri
+# Connection pool per worker process (Postgres only; see database_engine_options)
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', '5'))  # connections kept open
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', '10'))  # extra connections under load
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a connection
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', '1800'))  # seconds, below the server's idle timeout
 # ------------------------------
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['IMAGE_VARIANT_WIDTHS'] = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1024,1600').split(',')]
+app.config['IMAGE_MAX_WIDTH'] = int(os.environ.get('IMAGE_MAX_WIDTH', '2400'))  # originals are downscaled to this
+app.config['IMAGE_QUALITY'] = int(os.environ.get('IMAGE_QUALITY', '82'))
+app.config['IMAGE_AVIF'] = os.environ.get('IMAGE_AVIF', 'false').lower() in ['true', 'on', '1']
+app.config['IMAGE_MANIFEST'] = os.environ.get('IMAGE_MANIFEST', os.path.join(app.instance_path, 'image_manifest.json'))
+# Untouched copies of uploaded images, outside the web root; variants are always rebuilt from these
+app.config['IMAGE_ORIGINALS_DIR'] = os.environ.get('IMAGE_ORIGINALS_DIR', os.path.join(app.instance_path, 'image_originals'))
+# Remote images (e.g. Unsplash) fetched once, resized to IMAGE_VARIANT_WIDTHS and served from /remote-image
+app.config['REMOTE_IMAGE_CACHE_DIR'] = os.environ.get('REMOTE_IMAGE_CACHE_DIR', os.path.join(app.instance_path, 'remote_images'))
+app.config['REMOTE_IMAGE_CACHE_SIZE'] = int(os.environ.get('REMOTE_IMAGE_CACHE_SIZE', '200')) * 1024 * 1024  # MB; LRU beyond
+app.config['REMOTE_IMAGE_FETCHER'] = os.environ.get('REMOTE_IMAGE_FETCHER', 'http')  # http or file (offline fixtures)
+app.config['REMOTE_IMAGE_FIXTURE_DIR'] = os.environ.get('REMOTE_IMAGE_FIXTURE_DIR')  # files named after the URL path
+app.config['REMOTE_IMAGE_TIMEOUT'] = int(os.environ.get('REMOTE_IMAGE_TIMEOUT', '10'))  # seconds
+app.config['REMOTE_IMAGE_MAX_BYTES'] = int(os.environ.get('REMOTE_IMAGE_MAX_BYTES', str(20 * 1024 * 1024)))
+app.config['ASSET_DIRS'] = ['css', 'js']  # static subfolders fingerprinted by build-assets
+app.config['ASSET_BUILD_DIR'] = 'dist'  # relative to the static folder
+app.config['ASSET_MAX_AGE'] = 365 * 24 * 3600  # fingerprinted assets never change
+
+# Response compression configuration
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', '500'))  # bytes
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', '6'))  # gzip
+app.config['COMPRESS_BR_LEVEL'] = int(os.environ.get('COMPRESS_BR_LEVEL', '5'))  # brotli
+app.config['COMPRESS_MIMETYPES'] = [
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+]
+app.config['SETTINGS_CACHE_TTL'] = int(os.environ.get('SETTINGS_CACHE_TTL', '300'))  # seconds
+app.config['ANALYTICS_CACHE_TTL'] = int(os.environ.get('ANALYTICS_CACHE_TTL', '30'))  # seconds
+
+# Page cache configuration (memory, filesystem or null)
+app.config['PAGE_CACHE_TYPE'] = os.environ.get('PAGE_CACHE_TYPE', 'memory')
+app.config['PAGE_CACHE_DIR'] = os.environ.get('PAGE_CACHE_DIR', os.path.join(app.instance_path, 'page_cache'))
+app.config['PAGE_CACHE_SIZE'] = int(os.environ.get('PAGE_CACHE_SIZE', '500'))  # max cached pages
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', '3600'))  # seconds
+# Replaced on every invalidation; each worker on the host compares it before serving a cached page
+app.config['PAGE_CACHE_STAMP'] = os.environ.get('PAGE_CACHE_STAMP', os.path.join(app.instance_path, 'page_cache.stamp'))
+app.config['TEMPLATE_VERSION'] = os.environ.get('TEMPLATE_VERSION')  # defaults to a hash of template mtimes
+
+# Instrumentation: /metrics and opt-in request profiling
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # bearer token for scrapers; admins can always read
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', 'false').lower() in ['true', 'on', '1']
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+
+# Static site export (`flask export`)
+app.config['EXPORT_DIR'] = os.environ.get('EXPORT_DIR', os.path.join(app.instance_path, 'export'))
+app.config['EXPORT_BASE_URL'] = os.environ.get('EXPORT_BASE_URL', 'https://blackstoneegpartners.com')  # for absolute URLs
+
+# Precomputed sitemap.xml and RSS/Atom feeds (absolute URLs use EXPORT_BASE_URL)
+app.config['FEED_DIR'] = os.environ.get('FEED_DIR', os.path.join(app.instance_path, 'feeds'))
+app.config['FEED_ITEMS'] = int(os.environ.get('FEED_ITEMS', '20'))  # entries per feed
+app.config['FEED_MAX_AGE'] = int(os.environ.get('FEED_MAX_AGE', '600'))  # seconds clients may reuse a copy
 
 # Email configuration
 app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -40,19 +162,41 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@blackstoneegpartners.com')
 
-# Initialize extensions
-db = SQLAlchemy(app)
-mail = Mail(app)
+# Outbound mail queue configuration
+app.config['MAIL_TRANSPORT'] = os.environ.get('MAIL_TRANSPORT', 'smtp')  # smtp or file
+app.config['MAIL_FILE_DIR'] = os.environ.get('MAIL_FILE_DIR', os.path.join(app.instance_path, 'outbox'))
+app.config['MAIL_QUEUE_WORKER'] = os.environ.get('MAIL_QUEUE_WORKER', 'true').lower() in ['true', 'on', '1']
+app.config['MAIL_QUEUE_BATCH_SIZE'] = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', '20'))
+app.config['MAIL_QUEUE_MAX_ATTEMPTS'] = int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', '6'))
+app.config['MAIL_QUEUE_RETRY_DELAY'] = int(os.environ.get('MAIL_QUEUE_RETRY_DELAY', '30'))  # seconds, doubled per attempt
+app.config['MAIL_QUEUE_LEASE'] = int(os.environ.get('MAIL_QUEUE_LEASE', '300'))  # seconds a worker holds a claimed row
+app.config['MAIL_QUEUE_POLL_INTERVAL'] = int(os.environ.get('MAIL_QUEUE_POLL_INTERVAL', '60'))  # seconds
+
+# Related content is refreshed after admin saves on a background thread
+app.config['RELATED_UPDATE_WORKER'] = os.environ.get('RELATED_UPDATE_WORKER', 'true').lower() in ['true', 'on', '1']
+app.config['RELATED_UPDATE_DELAY'] = float(os.environ.get('RELATED_UPDATE_DELAY', '5'))  # seconds to batch saves
+
+# Rate limiting for /contact and /admin/login: token buckets of "count/period"
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+app.config['RATE_LIMIT_STORE'] = os.environ.get('RATE_LIMIT_STORE', 'memory')  # memory (per process) or sqlite (per host)
+app.config['RATE_LIMIT_DB'] = os.environ.get('RATE_LIMIT_DB', os.path.join(app.instance_path, 'rate_limits.db'))
+app.config['RATE_LIMIT_MAX_KEYS'] = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))  # memory store size
+app.config['RATE_LIMIT_CONTACT_IP'] = os.environ.get('RATE_LIMIT_CONTACT_IP', '5/hour')
+app.config['RATE_LIMIT_CONTACT_EMAIL'] = os.environ.get('RATE_LIMIT_CONTACT_EMAIL', '3/hour')
+app.config['RATE_LIMIT_LOGIN_IP'] = os.environ.get('RATE_LIMIT_LOGIN_IP', '20/hour')
+app.config['RATE_LIMIT_LOGIN_USER'] = os.environ.get('RATE_LIMIT_LOGIN_USER', '10/hour')
+app.config['CONTACT_DUPLICATE_WINDOW'] = int(os.environ.get('CONTACT_DUPLICATE_WINDOW', '86400'))  # seconds
+
+# Reverse proxies in front of the app whose X-Forwarded-* headers are trusted
+app.config['PROXY_COUNT'] = int(os.environ.get('PROXY_COUNT', '0'))
+
+# Extensions are bound to the app by create_app(); Flask-Migrate (and with it
+# Alembic) is only loaded by CLI commands, see init_migrations()
+db = SQLAlchemy()
+mail = Mail()
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'admin_login'
 
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs('static/uploads/logos', exist_ok=True)
-os.makedirs('static/uploads/blog', exist_ok=True)
-os.makedirs('static/uploads/portfolio', exist_ok=True)
-
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -79,9 +223,48 @@ class ContactSubmission(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_contact_submission_status_created_at', 'status', 'created_at'),
+        db.Index('ix_contact_submission_created_at', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Contact {self.name} - {self.email}>'
 
+class OutboundEmail(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(300), nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_outbound_email_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<OutboundEmail {self.recipient} - {self.status}>'
+
+blog_post_tags = db.Table(
+    'blog_post_tag',
+    db.Column('blog_post_id', db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_blog_post_tag_tag_id', 'tag_id')
+)
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    slug = db.Column(db.String(60), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
 class BlogPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -93,7 +276,28 @@ class BlogPost(db.Model):
     published = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    tags = db.Column(db.String(200))
+    tags = db.Column(db.String(200))  # comma-separated, as typed in the admin
+    image_variants = db.Column(db.Text)  # JSON map of image path -> resized variants
+
+    # Derived from content/excerpt/tags on save (see update_derived_fields)
+    content_html = db.Column(db.Text)  # sanitized content
+    summary = db.Column(db.String(300))  # excerpt, or the start of the plain text
+    word_count = db.Column(db.Integer)
+    reading_time = db.Column(db.Integer)  # minutes
+    tag_list = db.relationship('Tag', secondary=blog_post_tags, lazy='selectin', order_by='Tag.name',
+                               backref=db.backref('posts', lazy='dynamic'))
+
+    __table_args__ = (
+        db.Index('ix_blog_post_published_created_at', 'published', 'created_at', 'id'),
+    )
+
+    def update_derived_fields(self):
+        text = html_to_text(self.content)
+        self.content_html = sanitize_html(self.content)
+        self.summary = (self.excerpt or '').strip() or truncate_text(text, SUMMARY_LENGTH)
+        self.word_count = len(text.split())
+        self.reading_time = max(1, math.ceil(self.word_count / READING_WORDS_PER_MINUTE))
+        self.tag_list = get_or_create_tags(self.tags)
 
     def __repr__(self):
         return f'<BlogPost {self.title}>'
@@ -107,14 +311,48 @@ class PortfolioItem(db.Model):
     value = db.Column(db.String(50))  # Investment value
     completion_date = db.Column(db.Date)
     featured_image = db.Column(db.String(200))
-    gallery_images = db.Column(db.Text)  # JSON string of image paths
     status = db.Column(db.String(50), default='Investment Opportunity')  # completed, ongoing, planned
     location = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    image_variants = db.Column(db.Text)  # JSON map of image path -> resized variants
+
+    __table_args__ = (
+        db.Index('ix_portfolio_item_status_created_at', 'status', 'created_at'),
+        db.Index('ix_portfolio_item_category_status_created_at', 'category', 'status', 'created_at'),
+    )
+
+    images = db.relationship('PortfolioImage', backref='portfolio_item', order_by='PortfolioImage.position',
+                             cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Portfolio {self.title}>'
 
+class PortfolioImage(db.Model):
+    """One gallery image of a portfolio item"""
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_item_id = db.Column(db.Integer, db.ForeignKey('portfolio_item.id', ondelete='CASCADE'), nullable=False)
+    path = db.Column(db.String(200), nullable=False)
+    alt = db.Column(db.String(200))
+    position = db.Column(db.Integer, nullable=False, default=0)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    image_variants = db.Column(db.Text)  # JSON map of image path -> resized variants
+
+    __table_args__ = (
+        db.Index('ix_portfolio_image_item_position', 'portfolio_item_id', 'position'),
+    )
+
+    def __repr__(self):
+        return f'<PortfolioImage {self.path}>'
+
+class RelatedContent(db.Model):
+    """Precomputed related items for a blog post or portfolio item, best match first"""
+    kind = db.Column(db.String(20), primary_key=True)  # blog, portfolio
+    ref_id = db.Column(db.Integer, primary_key=True)
+    related_ids = db.Column(db.String(200), nullable=False, default='')  # comma-separated ids
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class CompanySettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     logo_path = db.Column(db.String(200))
@@ -145,10 +383,12 @@ class ContactForm(FlaskForm):
         ('other', 'Other Opportunities')
     ], validators=[DataRequired()])
     message = TextAreaField('Message', validators=[DataRequired(), Length(min=10, max=1000)])
+    website = StringField('Website')  # honeypot: hidden from people, filled in by bots
 
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
     password = PasswordField('Password', validators=[DataRequired()])
+    website = StringField('Website')  # honeypot
 
 # Admin Views
 class SecureModelView(ModelView):
@@ -158,6 +398,18 @@ class SecureModelView(ModelView):
     def inaccessible_callback(self, name, **kwargs):
         return redirect(url_for('admin_login'))
 
+class IndexedSearchMixin:
+    """Flask-Admin list search backed by the full-text index instead of LIKE scans"""
+    search_kind = None
+
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        ids = search_id_select(self.search_kind, search)
+        condition = self.model.id.in_(ids) if ids is not None else db.false()
+        query = query.filter(condition)
+        if count_query is not None:
+            count_query = count_query.filter(condition)
+        return query, count_query, joins, count_joins
+
 
 from wtforms import PasswordField
 
@@ -181,7 +433,11 @@ class UserAdminView(SecureModelView):
             model.set_password(form.password.data)
 
 
-class ContactAdminView(SecureModelView):
+class ContactAdminView(IndexedSearchMixin, SecureModelView):
+    search_kind = 'contact'
+    list_template = 'admin/contact_list.html'
+    simple_list_pager = True  # no COUNT(*) per page; the default listing uses cursors
+    column_default_sort = ('created_at', True)
     column_list = ['name', 'email', 'service', 'status', 'created_at']
     column_searchable_list = ['name', 'email', 'message']
     column_filters = ['service', 'status', 'created_at']
@@ -204,6 +460,21 @@ class ContactAdminView(SecureModelView):
         'message': _message_formatter
     }
     
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        # The default newest-first listing uses keyset pagination; searches,
+        # filters and custom sorts fall back to Flask-Admin's offset paging
+        if search or filters or sort_column is not None or not execute:
+            return super().get_list(page, sort_column, sort_desc, search, filters, execute, page_size)
+        
+        result = keyset_paginate(
+            self.get_query(), ContactSubmission, page_size or self.page_size,
+            older=decode_cursor(request.args.get('older')),
+            newer=decode_cursor(request.args.get('newer')),
+            total=get_table_counts()['contacts']
+        )
+        g.contact_keyset_page = result
+        return None, result.items
+    
     # Make the message column searchable and readable
     column_descriptions = {
         'message': 'Click "View" button to read full message',
@@ -211,11 +482,13 @@ class ContactAdminView(SecureModelView):
         'notes': 'Add internal notes about this contact'
     }
 
-class BlogAdminView(SecureModelView):
+class BlogAdminView(IndexedSearchMixin, SecureModelView):
+    search_kind = 'blog'
     column_list = ['title', 'author', 'published', 'created_at']
     column_searchable_list = ['title', 'content']
     column_filters = ['published', 'author', 'created_at']
-    form_excluded_columns = ['created_at', 'updated_at']
+    form_excluded_columns = ['created_at', 'updated_at', 'image_variants', 'content_html',
+                             'summary', 'word_count', 'reading_time', 'tag_list']
     
     # Configure file upload field
     form_extra_fields = {
@@ -227,25 +500,37 @@ class BlogAdminView(SecureModelView):
         if hasattr(form, 'image_upload') and form.image_upload.data:
             file = form.image_upload.data
             if file and hasattr(file, 'filename') and file.filename:
-                # Secure the filename and save
-                filename = secure_filename(file.filename)
-                # Add timestamp to avoid conflicts
-                name, ext = os.path.splitext(filename)
-                filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
-                
-                # Save to blog uploads folder
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'blog', filename)
-                file.save(filepath)
-                
-                # Store relative path in database
-                model.featured_image = f"uploads/blog/{filename}"
+                model.featured_image = save_image_upload(file, 'blog')
+        
+        # Resize and recompress the featured image
+        if model.featured_image:
+            ensure_image_variants(model, model.featured_image)
         
         super().on_model_change(form, model, is_created)
 
-class PortfolioAdminView(SecureModelView):
+    def after_model_change(self, form, model, is_created):
+        related_content_updater.schedule('blog', model.id)
+        invalidate_page_cache()
+
+    def after_model_delete(self, model):
+        related_content_updater.schedule('blog', model.id)
+        invalidate_page_cache()
+
+class PortfolioAdminView(IndexedSearchMixin, SecureModelView):
+    search_kind = 'portfolio'
     column_list = ['title', 'category', 'client', 'status', 'completion_date']
     column_searchable_list = ['title', 'description']
     column_filters = ['category', 'status', 'completion_date']
+    form_excluded_columns = ['image_variants']
+    
+    # Existing gallery images: reorder, caption or remove them in place
+    inline_models = [(PortfolioImage, dict(form_columns=['id', 'path', 'alt', 'position']))]
+    
+    # Upload fields for the featured image and additional gallery images
+    form_extra_fields = {
+        'image_upload': FileField('Featured Image', validators=[FileAllowed(['jpg', 'png', 'jpeg', 'gif', 'webp'], 'Images only!')]),
+        'gallery_upload': MultipleFileField('Add Gallery Images', validators=[FileAllowed(['jpg', 'png', 'jpeg', 'gif', 'webp'], 'Images only!')])
+    }
     
     # Add form choices for status dropdown
     form_choices = {
@@ -260,6 +545,45 @@ class PortfolioAdminView(SecureModelView):
     # Make status editable inline
     column_editable_list = ['status']
 
+    def on_model_change(self, form, model, is_created):
+        if hasattr(form, 'image_upload') and form.image_upload.data:
+            file = form.image_upload.data
+            if file and hasattr(file, 'filename') and file.filename:
+                model.featured_image = save_image_upload(file, 'portfolio')
+        
+        if hasattr(form, 'gallery_upload') and form.gallery_upload.data:
+            position = max([image.position for image in model.images] + [-1]) + 1
+            for file in form.gallery_upload.data:
+                if file and hasattr(file, 'filename') and file.filename:
+                    model.images.append(PortfolioImage(path=save_image_upload(file, 'portfolio'), position=position))
+                    position += 1
+        
+        # Resize and recompress the featured and gallery images
+        if model.featured_image:
+            ensure_image_variants(model, model.featured_image)
+        for image in model.images:
+            update_gallery_image(image)
+        
+        super().on_model_change(form, model, is_created)
+
+    def after_model_change(self, form, model, is_created):
+        related_content_updater.schedule('portfolio', model.id)
+        invalidate_page_cache()
+
+    def after_model_delete(self, model):
+        related_content_updater.schedule('portfolio', model.id)
+        invalidate_page_cache()
+
+class SettingsAdminView(SecureModelView):
+    # Drop the cached settings and pages so the next render picks up the change
+    def after_model_change(self, form, model, is_created):
+        invalidate_company_settings()
+        invalidate_page_cache()
+
+    def after_model_delete(self, model):
+        invalidate_company_settings()
+        invalidate_page_cache()
+
 class DashboardView(AdminIndexView):
     def is_accessible(self):
         return current_user.is_authenticated and current_user.is_admin
@@ -269,12 +593,13 @@ class DashboardView(AdminIndexView):
 
     @expose('/')
     def index(self):
-        contact_count = ContactSubmission.query.count()
-        new_contacts = ContactSubmission.query.filter_by(status='new').count()
-        blog_count = BlogPost.query.count()
-        portfolio_count = PortfolioItem.query.count()
+        counts = get_table_counts()
+        contact_count = counts['contacts']
+        new_contacts = get_contact_status_counts().get('new', 0)
+        blog_count = counts['blog_posts']
+        portfolio_count = counts['portfolio_items']
         
-        recent_contacts = ContactSubmission.query.order_by(ContactSubmission.created_at.desc()).limit(5).all()
+        recent_contacts = recent_contacts_query().limit(5).all()
         
         return self.render('admin/dashboard.html', 
                          contact_count=contact_count,
@@ -284,34 +609,2751 @@ class DashboardView(AdminIndexView):
                          recent_contacts=recent_contacts)
 
 # Initialize Admin
-admin = Admin(app, name='Blackstone EG Admin', index_view=DashboardView())
-admin.add_view(ContactAdminView(ContactSubmission, db.session, name='Contact Forms'))
-admin.add_view(BlogAdminView(BlogPost, db.session, name='Blog Posts'))
-admin.add_view(PortfolioAdminView(PortfolioItem, db.session, name='Portfolio'))
-admin.add_view(UserAdminView(User, db.session, name='Users'))
-admin.add_view(SecureModelView(CompanySettings, db.session, name='Settings'))
-
-# Utility Functions
-def send_email(subject, recipient, template, **kwargs):
-    """Send email notification"""
+admin = Admin(name='Blackstone EG Admin', index_view=DashboardView())
+
+def register_admin_views():
+    """Add the model views, whose constructors scaffold columns and forms.
+
+    Called by create_app() rather than at import. Flask accepts blueprints
+    only until the first request, so this is the latest point they can be
+    added; with gunicorn's preload_app the workers inherit them from the master.
+    """
+    admin.add_view(ContactAdminView(ContactSubmission, db.session, name='Contact Forms'))
+    admin.add_view(BlogAdminView(BlogPost, db.session, name='Blog Posts'))
+    admin.add_view(PortfolioAdminView(PortfolioItem, db.session, name='Portfolio'))
+    admin.add_view(UserAdminView(User, db.session, name='Users'))
+    admin.add_view(SettingsAdminView(CompanySettings, db.session, name='Settings'))
+
+# Queries shared by the routes (and checked against the indexes by `flask check-indexes`)
+PUBLIC_PORTFOLIO_STATUSES = ['investment-opportunity', 'completed']
+
+def without_post_bodies(query):
+    """Listings only need the derived summary, not the article bodies"""
+    return query.options(db.defer(BlogPost.content), db.defer(BlogPost.content_html))
+
+def published_posts_query():
+    return without_post_bodies(BlogPost.query).filter_by(published=True).order_by(BlogPost.created_at.desc())
+
+def public_portfolio_query(category=None):
+    query = PortfolioItem.query.filter(PortfolioItem.status.in_(PUBLIC_PORTFOLIO_STATUSES))
+    if category:
+        query = query.filter(PortfolioItem.category == category)
+    return query.order_by(PortfolioItem.created_at.desc())
+
+def portfolio_categories_query():
+    return db.session.query(PortfolioItem.category).distinct()
+
+def recent_contacts_query():
+    return ContactSubmission.query.order_by(ContactSubmission.created_at.desc())
+
+BLOG_PAGE_SIZE = 6
+GALLERY_PAGE_SIZE = 6
+
+def gallery_page(project, page, per_page=GALLERY_PAGE_SIZE):
+    """One page of a project's gallery, in display order"""
+    query = PortfolioImage.query.filter_by(portfolio_item_id=project.id)
+    images = query.order_by(PortfolioImage.position, PortfolioImage.id) \
+        .offset((page - 1) * per_page).limit(per_page).all()
+    total = query.count() if len(images) == per_page or page > 1 else len(images)
+    return {'images': images, 'total': total, 'next_page': page + 1 if page * per_page < total else None}
+
+def gallery_image_json(project, image):
+    alt = image.alt or f'{project.title} Gallery'
+    info = get_image_info(image, image.path)
+    if not info:
+        return {'src': url_for('static', filename=image.path), 'srcset': None, 'sources': {},
+                'width': image.width, 'height': image.height, 'alt': alt}
+    return dict(image_sources(info), width=info['width'], height=info['height'], alt=alt)
+
+# Keyset pagination over (created_at, id), newest first
+class KeysetPage:
+    """One page of keyset-paginated results with cursors to its neighbours"""
+
+    def __init__(self, items, newer_cursor=None, older_cursor=None, total=None):
+        self.items = items
+        self.newer_cursor = newer_cursor
+        self.older_cursor = older_cursor
+        self.total = total
+
+    @property
+    def has_newer(self):
+        return self.newer_cursor is not None
+
+    @property
+    def has_older(self):
+        return self.older_cursor is not None
+
+def encode_cursor(item):
+    return format_cursor(item.created_at, item.id)
+
+def format_cursor(timestamp, item_id):
+    return f"{timestamp.isoformat()}_{item_id}"
+
+def decode_cursor(value):
+    """Parse a cursor, returning None for missing or malformed values"""
+    if not value:
+        return None
+    timestamp, _, item_id = value.rpartition('_')
     try:
-        msg = Message(subject=subject, recipients=[recipient])
-        msg.html = render_template(f'emails/{template}', **kwargs)
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Email sending failed: {e}")
+        return datetime.fromisoformat(timestamp), int(item_id)
+    except ValueError:
+        return None
+
+def keyset_paginate(query, model, per_page, older=None, newer=None, total=None):
+    """Fetch the page just older (or newer) than a cursor with a single indexed query.
+
+    `query` must not be ordered. The row-value comparison lets the database
+    seek straight to the cursor, so each page costs the same regardless of depth.
+    """
+    created_at, item_id = model.created_at, model.id
+    if newer:
+        timestamp, cursor_id = newer
+        rows = query.filter(db.tuple_(created_at, item_id) > db.tuple_(timestamp, cursor_id)) \
+            .order_by(created_at.asc(), item_id.asc()).limit(per_page + 1).all()
+        has_newer, has_older = len(rows) > per_page, True
+        rows = list(reversed(rows[:per_page]))
+    else:
+        if older:
+            timestamp, cursor_id = older
+            query = query.filter(db.tuple_(created_at, item_id) < db.tuple_(timestamp, cursor_id))
+        rows = query.order_by(created_at.desc(), item_id.desc()).limit(per_page + 1).all()
+        has_newer, has_older = older is not None, len(rows) > per_page
+        rows = rows[:per_page]
+    return KeysetPage(
+        rows,
+        newer_cursor=encode_cursor(rows[0]) if rows and has_newer else None,
+        older_cursor=encode_cursor(rows[-1]) if rows and has_older else None,
+        total=total
+    )
+
+def index_check_queries():
+    """(name, query) pairs mirroring what the routes and dashboard execute"""
+    since = datetime.utcnow() - timedelta(days=30)
+    return [
+        ('home: recent posts', published_posts_query().limit(3)),
+        ('home: featured portfolio', public_portfolio_query().limit(4)),
+        ('blog: page', published_posts_query().order_by(None)
+            .filter(db.tuple_(BlogPost.created_at, BlogPost.id) < db.tuple_(since, 0))
+            .order_by(BlogPost.created_at.desc(), BlogPost.id.desc()).limit(7)),
+        ('blog: page count', db.session.query(db.func.count(BlogPost.id)).filter(BlogPost.published == True)),
+        ('blog post: by slug', BlogPost.query.filter_by(slug='sample', published=True)),
+        ('blog post: related lookup', RelatedContent.query.filter_by(kind='blog', ref_id=0)),
+        ('blog post: related', BlogPost.query.filter(BlogPost.id.in_([1, 2, 3]))),
+        ('portfolio: all', public_portfolio_query()),
+        ('portfolio: category', public_portfolio_query('energy')),
+        ('portfolio: categories', portfolio_categories_query()),
+        ('portfolio detail: related', PortfolioItem.query.filter(PortfolioItem.id.in_([1, 2, 3]))),
+        ('portfolio detail: gallery', PortfolioImage.query.filter_by(portfolio_item_id=0)
+            .order_by(PortfolioImage.position, PortfolioImage.id).limit(GALLERY_PAGE_SIZE)),
+        ('dashboard: recent contacts', recent_contacts_query().limit(5)),
+        ('admin: contact list', ContactSubmission.query
+            .filter(db.tuple_(ContactSubmission.created_at, ContactSubmission.id) < db.tuple_(since, 0))
+            .order_by(ContactSubmission.created_at.desc(), ContactSubmission.id.desc()).limit(21)),
+        ('analytics: status counts', db.session.query(ContactSubmission.status, db.func.count(ContactSubmission.id))
+            .group_by(ContactSubmission.status)),
+        ('analytics: series', db.session.query(ContactSubmission.service, db.func.count(ContactSubmission.id))
+            .filter(ContactSubmission.created_at >= since).group_by(ContactSubmission.service)),
+        ('mail queue: due emails', db.session.query(OutboundEmail.id)
+            .filter(OutboundEmail.status == 'pending', OutboundEmail.next_attempt_at <= datetime.utcnow())
+            .order_by(OutboundEmail.next_attempt_at)),
+    ]
+
+def explain_query(query):
+    """Return the database's plan for a query as a list of text lines"""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    connection = db.session.connection()
+    if db.engine.dialect.name == 'postgresql':
+        # Tiny tables always favour a seq scan; ask whether an index *can* be used
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+def plan_uses_index(plan):
+    """True unless the plan contains a full table scan"""
+    if db.engine.dialect.name == 'postgresql':
+        return not any('Seq Scan' in line for line in plan)
+    # SQLite: "SCAN table" without "USING ... INDEX" is a full scan
+    return not any(re.match(r'SCAN \w+$', line.strip()) for line in plan)
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """EXPLAIN every route query and fail if any needs a full table scan."""
+    failures = 0
+    for name, query in index_check_queries():
+        plan = explain_query(query)
+        ok = plan_uses_index(plan)
+        failures += not ok
+        sort_note = ' (sorts in memory)' if any('TEMP B-TREE' in line or line.strip().startswith('Sort') for line in plan) else ''
+        click.echo(f"{'OK  ' if ok else 'FAIL'} {name}{sort_note}")
+        for line in plan:
+            click.echo(f"       {line}")
+    db.session.rollback()
+    if failures:
+        raise click.ClickException(f"{failures} query(s) would scan a whole table")
+    click.echo("All route queries use an index")
+
+# Blog content processing
+SUMMARY_LENGTH = 160
+READING_WORDS_PER_MINUTE = 200
+SANITIZE_TAGS = frozenset('''
+a abbr b blockquote br caption code div em figcaption figure h1 h2 h3 h4 h5 h6
+hr i img li ol p pre s small span strong sub sup table tbody td tfoot th thead
+tr u ul
+'''.split())
+SANITIZE_VOID_TAGS = frozenset(['br', 'hr', 'img'])
+SANITIZE_DROP_CONTENT = frozenset(['script', 'style', 'iframe', 'object', 'embed', 'template'])
+SANITIZE_ATTRIBUTES = {
+    '*': {'class', 'id', 'title'},
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height', 'loading'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+SANITIZE_URL_ATTRIBUTES = frozenset(['href', 'src'])
+SANITIZE_URL_SCHEMES = frozenset(['http', 'https', 'mailto', 'tel'])
+
+def is_safe_url(value):
+    """Whether a link or image URL is relative or uses an allowed scheme.
+
+    Browsers drop tabs and newlines anywhere in a URL and trim control
+    characters and spaces around it, so `java&#x09;script:` still runs as
+    `javascript:`. The check removes all of them before looking for a scheme.
+    """
+    url = re.sub(r'[\x00-\x20\x7f]', '', value)
+    scheme, colon, _ = url.partition(':')
+    if not colon or any(c in scheme for c in '/?#'):
+        return True  # relative: no colon before the path, query or fragment
+    return scheme.lower() in SANITIZE_URL_SCHEMES
+
+class HTMLSanitizer(HTMLParser):
+    """Allow-list HTML filter: unknown tags are unwrapped, scripts and their
+    content dropped, and only safe attributes and URL schemes kept"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.dropping = 0
+
+    def _open_tag(self, tag, attrs):
+        allowed = SANITIZE_ATTRIBUTES['*'] | SANITIZE_ATTRIBUTES.get(tag, set())
+        rendered = ''
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in SANITIZE_URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            rendered += f' {name}="{escape(value)}"'
+        return f'<{tag}{rendered}>'
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SANITIZE_DROP_CONTENT:
+            self.dropping += 1
+        elif not self.dropping and tag in SANITIZE_TAGS:
+            self.parts.append(self._open_tag(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.dropping and tag in SANITIZE_TAGS:
+            self.parts.append(self._open_tag(tag, attrs))
+
+    def handle_endtag(self, tag):
+        if tag in SANITIZE_DROP_CONTENT:
+            self.dropping = max(self.dropping - 1, 0)
+        elif not self.dropping and tag in SANITIZE_TAGS and tag not in SANITIZE_VOID_TAGS:
+            self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.parts.append(str(escape(data)))
+
+def sanitize_html(value):
+    """Filter admin-written article HTML down to a safe subset"""
+    sanitizer = HTMLSanitizer()
+    sanitizer.feed(value or '')
+    sanitizer.close()
+    return ''.join(sanitizer.parts)
+
+def html_to_text(value):
+    """Strip tags and collapse whitespace in an HTML fragment"""
+    text = re.sub(r'<(script|style)\b.*?</\1>', ' ', value or '', flags=re.S | re.I)
+    text = html.unescape(re.sub(r'<[^>]+>', ' ', text))
+    return re.sub(r'\s+', ' ', text).strip()
+
+def truncate_text(text, length):
+    """Shorten text to at most length characters, on a word boundary"""
+    if len(text) <= length:
+        return text
+    return text[:length - 1].rsplit(' ', 1)[0].rstrip(' ,.;:') + '…'
+
+def tag_slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')[:60]
+
+def get_or_create_tags(value):
+    """Tag rows for a comma-separated tag string, creating missing ones"""
+    names = {}
+    for name in (value or '').split(','):
+        name = name.strip()[:50]
+        if name and tag_slug(name) and tag_slug(name) not in names:
+            names[tag_slug(name)] = name
+    if not names:
+        return []
+    with db.session.no_autoflush:
+        existing = {tag.slug: tag for tag in Tag.query.filter(Tag.slug.in_(names))}
+    existing.update({tag.slug: tag for tag in db.session.new if isinstance(tag, Tag) and tag.slug in names})
+    tags = []
+    for slug, name in names.items():
+        tag = existing.get(slug)
+        if tag is None:
+            tag = Tag(name=name, slug=slug)
+            db.session.add(tag)
+        tags.append(tag)
+    return tags
+
+@db.event.listens_for(db.session, 'before_flush')
+def update_blog_post_fields(session, flush_context, instances):
+    """Recompute derived BlogPost fields whenever a post is added or edited"""
+    for model in list(session.new) + list(session.dirty):
+        if isinstance(model, BlogPost) and (model in session.new or session.is_modified(model)):
+            model.update_derived_fields()
+
+# Full-text search
+# One index covers blog posts, portfolio items and contact submissions. On
+# SQLite it is an FTS5 table keyed by rowid; on Postgres a table with a
+# weighted tsvector column and a GIN index. Both are created by migrations.
+SEARCH_KINDS = {'blog': 1, 'portfolio': 2, 'contact': 3}
+SEARCH_MARK_START, SEARCH_MARK_END = '\x02', '\x03'
+
+# Columns copied into the index, per model. Contacts carry only what the admin
+# search box matches (ContactAdminView.column_searchable_list), so phone
+# numbers, services and internal notes are never duplicated there.
+SEARCH_FIELDS = {
+    BlogPost: ('title', 'excerpt', 'content', 'tags', 'published'),
+    PortfolioItem: ('title', 'description', 'category', 'client', 'location', 'status'),
+    ContactSubmission: ('name', 'email', 'message'),
+}
+SEARCHABLE_MODELS = tuple(SEARCH_FIELDS)
+
+def search_document_for(model):
+    """(kind, title, body, public) for an indexed model, or None for other models"""
+    if isinstance(model, BlogPost):
+        body = ' '.join(filter(None, [model.excerpt, html_to_text(model.content), model.tags]))
+        return 'blog', model.title, body, bool(model.published)
+    if isinstance(model, PortfolioItem):
+        body = ' '.join(filter(None, [model.description, model.category, model.client, model.location]))
+        return 'portfolio', model.title, body, model.status in PUBLIC_PORTFOLIO_STATUSES
+    if isinstance(model, ContactSubmission):
+        body = ' '.join(filter(None, [model.email, model.message]))
+        return 'contact', model.name, body, False
+    return None
+
+def search_fields_changed(model):
+    """Whether a flushed change touched any column that feeds the search document"""
+    attrs = db.inspect(model).attrs
+    return any(attrs[name].history.has_changes() for name in SEARCH_FIELDS[type(model)])
+
+def _search_rowid(kind, ref_id):
+    return ref_id * 4 + SEARCH_KINDS[kind]
+
+def remove_search_document(connection, kind, ref_id):
+    if connection.dialect.name == 'postgresql':
+        connection.execute(db.text('DELETE FROM search_document WHERE kind = :kind AND ref_id = :ref_id'),
+                           {'kind': kind, 'ref_id': ref_id})
+    else:
+        connection.execute(db.text('DELETE FROM search_index WHERE rowid = :rowid'),
+                           {'rowid': _search_rowid(kind, ref_id)})
+
+def index_search_document(connection, model):
+    """Insert or replace the search entry for a model"""
+    kind, title, body, public = search_document_for(model)
+    remove_search_document(connection, kind, model.id)
+    params = {'kind': kind, 'ref_id': model.id, 'title': title or '', 'body': body, 'public': public}
+    if connection.dialect.name == 'postgresql':
+        connection.execute(db.text(
+            'INSERT INTO search_document (kind, ref_id, title, body, public) '
+            'VALUES (:kind, :ref_id, :title, :body, :public)'), params)
+    else:
+        params['rowid'] = _search_rowid(kind, model.id)
+        connection.execute(db.text(
+            'INSERT INTO search_index (rowid, kind, ref_id, public, title, body) '
+            'VALUES (:rowid, :kind, :ref_id, :public, :title, :body)'), params)
+
+@db.event.listens_for(db.session, 'after_flush')
+def sync_search_index(session, flush_context):
+    """Keep the search index in the same transaction as content changes.
+
+    Runs after every flush, so it returns straight away unless a searchable
+    model was added, deleted, or had an indexed column changed (a contact's
+    status or a post's view count leaves the index alone).
+    """
+    deleted = [model for model in session.deleted if isinstance(model, SEARCHABLE_MODELS)]
+    changed = [model for model in session.new if isinstance(model, SEARCHABLE_MODELS)]
+    changed += [model for model in session.dirty
+                if isinstance(model, SEARCHABLE_MODELS) and search_fields_changed(model)]
+    if not deleted and not changed:
+        return
+    connection = session.connection()
+    for model in deleted:
+        remove_search_document(connection, search_document_for(model)[0], model.id)
+    for model in changed:
+        index_search_document(connection, model)
+
+def build_search_query(text):
+    """Turn user input into prefix terms; returns None when nothing is searchable"""
+    terms = re.findall(r'\w+', text.lower())[:10]
+    if not terms:
+        return None
+    if db.engine.dialect.name == 'postgresql':
+        return ' & '.join(f"{term}:*" for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def highlight_snippet(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    escaped = str(escape(snippet or ''))
+    return Markup(escaped.replace(SEARCH_MARK_START, '<mark>').replace(SEARCH_MARK_END, '</mark>'))
+
+def sqlite_search_match(match, kinds, public_only):
+    """FTS5 query restricting the terms to title/body and filtering kind and
+    visibility inside the index, so other kinds' matches are never ranked"""
+    kind_filter = ' OR '.join(f'"{kind}"' for kind in kinds)
+    match = f'{{title body}} : ({match}) AND kind : ({kind_filter})'
+    return match + ' AND public : 1' if public_only else match
+
+def search_documents(text, kinds=('blog', 'portfolio'), public_only=True, limit=20, offset=0):
+    """Ranked full-text search with prefix matching and highlighted snippets.
+
+    Returns a list of dicts with kind, id, title, snippet (Markup) and rank.
+    """
+    match = build_search_query(text)
+    if not match:
+        return []
+    params = {'match': match, 'limit': limit, 'offset': offset}
+
+    if db.engine.dialect.name == 'postgresql':
+        kind_params = {f'kind_{i}': kind for i, kind in enumerate(kinds)}
+        params.update(kind_params)
+        kind_filter = ', '.join(f':{name}' for name in kind_params)
+        public_filter = 'AND public' if public_only else ''
+        sql = f"""
+            SELECT kind, ref_id, title,
+                   ts_headline('english', body, query, 'StartSel={SEARCH_MARK_START}, StopSel={SEARCH_MARK_END}, MaxWords=30, MinWords=12') AS snippet,
+                   ts_rank_cd(tsv, query) AS rank
+            FROM search_document, to_tsquery('english', :match) AS query
+            WHERE tsv @@ query AND kind IN ({kind_filter}) {public_filter}
+            ORDER BY rank DESC LIMIT :limit OFFSET :offset"""
+    else:
+        # bm25 column weights: kind, ref_id, public, title, body
+        params['match'] = sqlite_search_match(match, kinds, public_only)
+        sql = f"""
+            SELECT kind, ref_id, title,
+                   snippet(search_index, 4, '{SEARCH_MARK_START}', '{SEARCH_MARK_END}', '…', 24) AS snippet,
+                   bm25(search_index, 0, 0, 0, 10.0, 1.0) AS rank
+            FROM search_index
+            WHERE search_index MATCH :match
+            ORDER BY rank LIMIT :limit OFFSET :offset"""
+    rows = db.session.execute(db.text(sql), params).all()
+    return [
+        {'kind': kind, 'id': int(ref_id), 'title': title, 'snippet': highlight_snippet(snippet), 'rank': float(rank)}
+        for kind, ref_id, title, snippet, rank in rows
+    ]
+
+def search_hit_urls(hits):
+    """Add a public url to each blog/portfolio hit (one query for the blog slugs)"""
+    blog_ids = [hit['id'] for hit in hits if hit['kind'] == 'blog']
+    slugs = dict(db.session.query(BlogPost.id, BlogPost.slug).filter(BlogPost.id.in_(blog_ids)).all()) if blog_ids else {}
+    for hit in hits:
+        if hit['kind'] == 'blog':
+            hit['url'] = url_for('blog_post', slug=slugs.get(hit['id'], ''))
+        elif hit['kind'] == 'portfolio':
+            hit['url'] = url_for('portfolio_detail', project_id=hit['id'])
+    return [hit for hit in hits if hit.get('url')]
+
+def search_id_select(kind, text):
+    """SELECT of the ids of every matching document of one kind, or None for an
+    empty query (used as an IN subquery by admin list search).
+
+    Nothing is ranked or limited: the admin list applies its own sort,
+    pagination and count.
+    """
+    match = build_search_query(text)
+    if not match:
+        return None
+    if db.engine.dialect.name == 'postgresql':
+        condition = db.text("tsv @@ to_tsquery('english', :match) AND kind = :kind").bindparams(match=match, kind=kind)
+    else:
+        match = sqlite_search_match(match, (kind,), public_only=False)
+        condition = db.text('search_index MATCH :match').bindparams(match=match)
+    return db.select(db.column('ref_id')).select_from(db.table(search_index_table())).where(condition)
+
+def search_index_table():
+    return 'search_document' if db.engine.dialect.name == 'postgresql' else 'search_index'
+
+def rebuild_search_index():
+    """Reindex every blog post, portfolio item and contact; returns the document count"""
+    connection = db.session.connection()
+    connection.execute(db.text(f'DELETE FROM {search_index_table()}'))
+    total = 0
+    for model_class in SEARCHABLE_MODELS:
+        for model in model_class.query.yield_per(500):
+            index_search_document(connection, model)
+            total += 1
+    if connection.dialect.name != 'postgresql':
+        # Merge the FTS5 segments so deleted documents' terms are dropped from disk too
+        connection.execute(db.text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+    db.session.commit()
+    return total
+
+@app.cli.command('search-reindex')
+def search_reindex_command():
+    """Rebuild the full-text search index from the database."""
+    click.echo(f"Indexed {rebuild_search_index()} document(s)")
+
+# Related content
+# Similarities are stored in RelatedContent, so detail pages read their
+# related items with a primary-key lookup. `flask related-rebuild` computes
+# every pair; admin saves only update the rows they can affect, off the
+# request (see RelatedContentUpdater).
+RELATED_LIMIT = 3
+RELATED_STOPWORDS = frozenset('''
+a about after all also an and any are as at be been but by can could for from
+has have how in into is it its more new not of on or our over so such than
+that the their there these they this to up was we were what when which while
+who will with would you your
+'''.split())
+
+def related_terms(*texts):
+    """Lowercase word tokens without stopwords, numbers and very short words"""
+    terms = []
+    for text in texts:
+        terms.extend(term for term in re.findall(r'[^\W\d_]{3,}', (text or '').lower())
+                     if term not in RELATED_STOPWORDS)
+    return terms
+
+def tfidf_vectors(documents):
+    """{key: {term: weight}} unit-length TF-IDF vectors for {key: [terms]}"""
+    document_frequency = {}
+    for terms in documents.values():
+        for term in set(terms):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    total = len(documents)
+    vectors = {}
+    for key, terms in documents.items():
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        vector = {
+            term: (count / len(terms)) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+            for term, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors[key] = {term: weight / norm for term, weight in vector.items()}
+    return vectors
+
+def cosine_similarity(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+def rank_related(keys, score, candidates, limit=RELATED_LIMIT):
+    """{key: [best related candidate keys]} ranked by score(key, candidate).
+
+    Candidates are ordered newest first; short lists are padded with the
+    newest candidates so the related section is never empty.
+    """
+    ranked = {}
+    for key in keys:
+        scores = [(score(key, other), -position, other) for position, other in enumerate(candidates) if other != key]
+        best = [other for value, _, other in sorted(scores, reverse=True)[:limit] if value > 0]
+        best += [other for other in candidates if other != key and other not in best][:limit - len(best)]
+        ranked[key] = best
+    return ranked
+
+def related_post_scorer():
+    """(keys, score, candidates) for rank_related: TF-IDF cosine over title,
+    tags and content, with published posts as candidates"""
+    posts = BlogPost.query.all()
+    documents = {
+        post.id: related_terms(post.title, post.title, post.tags, post.tags, post.tags,
+                               post.excerpt, html_to_text(post.content))
+        for post in posts
+    }
+    vectors = tfidf_vectors(documents)
+    published = [post.id for post in sorted(posts, key=lambda post: post.created_at, reverse=True) if post.published]
+    return documents, lambda a, b: cosine_similarity(vectors[a], vectors[b]), published
+
+def related_project_scorer():
+    """(keys, score, candidates) for rank_related: shared category, location and
+    client first, then TF-IDF similarity of the descriptions, with public
+    projects as candidates"""
+    projects = {project.id: project for project in PortfolioItem.query.all()}
+    vectors = tfidf_vectors({
+        project.id: related_terms(project.title, project.description)
+        for project in projects.values()
+    })
+
+    def normalized(value):
+        return (value or '').strip().lower()
+
+    def score(a, b):
+        first, second = projects[a], projects[b]
+        similarity = 0.4 * cosine_similarity(vectors[a], vectors[b])
+        if normalized(first.category) and normalized(first.category) == normalized(second.category):
+            similarity += 1.0
+        if normalized(first.location) and normalized(first.location) == normalized(second.location):
+            similarity += 0.5
+        if normalized(first.client) and normalized(first.client) == normalized(second.client):
+            similarity += 0.25
+        return similarity
+
+    public = [project.id for project in sorted(projects.values(), key=lambda project: project.created_at, reverse=True)
+              if project.status in PUBLIC_PORTFOLIO_STATUSES]
+    return projects, score, public
+
+RELATED_SCORERS = {'blog': related_post_scorer, 'portfolio': related_project_scorer}
+
+def rebuild_related_content(kinds=('blog', 'portfolio')):
+    """Recompute and store the related lookup table; returns the number of rows written"""
+    written = 0
+    for kind in kinds:
+        related = rank_related(*RELATED_SCORERS[kind]())
+        RelatedContent.query.filter_by(kind=kind).delete()
+        now = datetime.utcnow()
+        db.session.add_all([
+            RelatedContent(kind=kind, ref_id=ref_id, related_ids=','.join(map(str, ids)), computed_at=now)
+            for ref_id, ids in related.items()
+        ])
+        written += len(related)
+    db.session.commit()
+    return written
+
+def update_related_content(kind, ref_ids):
+    """Bring stored related items up to date after the given items were saved
+    or deleted; returns the number of rows written.
+
+    The changed items' rows are recomputed. Other rows are re-ranked against
+    their current neighbours plus the changed items, which costs a few
+    comparisons per row instead of one per pair; only rows that listed a
+    changed item are ranked against every candidate again. Term weights of
+    untouched rows drift as content is added, until the next
+    `flask related-rebuild`.
+    """
+    keys, score, candidates = RELATED_SCORERS[kind]()
+    changed = set(ref_ids)
+    positions = {key: position for position, key in enumerate(candidates)}
+    entries = {entry.ref_id: entry for entry in RelatedContent.query.filter_by(kind=kind)}
+    now = datetime.utcnow()
+    written = 0
+    for ref_id in changed - set(keys):
+        if ref_id in entries:
+            db.session.delete(entries.pop(ref_id))
+    for ref_id, entry in entries.items():
+        ids = [int(value) for value in entry.related_ids.split(',') if value]
+        if ref_id in changed or changed.intersection(ids) or not positions.keys() >= set(ids):
+            # The replacement for a changed or withdrawn neighbour could be any candidate
+            related = rank_related([ref_id], score, candidates)[ref_id]
+        else:
+            pool = sorted(set(ids) | (changed & positions.keys()), key=positions.get)
+            related = rank_related([ref_id], score, pool)[ref_id]
+        if related != ids:
+            entry.related_ids = ','.join(map(str, related))
+            entry.computed_at = now
+            written += 1
+    for ref_id in (changed & set(keys)) - entries.keys():
+        related = rank_related([ref_id], score, candidates)[ref_id]
+        db.session.add(RelatedContent(kind=kind, ref_id=ref_id, related_ids=','.join(map(str, related)), computed_at=now))
+        written += 1
+    db.session.commit()
+    return written
+
+class RelatedContentUpdater:
+    """Background thread that applies update_related_content() for admin saves.
+
+    Saves arriving within RELATED_UPDATE_DELAY of each other (a bulk delete,
+    a run of inline edits) are applied together. Pending updates live in
+    memory only; a restart before they run leaves rows stale until the next
+    save or `flask related-rebuild`.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def schedule(self, kind, ref_id):
+        """Queue a changed item, starting the worker on first use in this process"""
+        if not app.config['RELATED_UPDATE_WORKER']:
+            return
+        with self._lock:
+            self._pending.setdefault(kind, set()).add(ref_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='related-content', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(app.config['RELATED_UPDATE_DELAY'])
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            with app.app_context():
+                try:
+                    for kind, ref_ids in pending.items():
+                        update_related_content(kind, ref_ids)
+                    invalidate_page_cache()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Related content update failed: {e}")
+
+related_content_updater = RelatedContentUpdater()
+
+def get_related(kind, model):
+    """Related items stored for a model, in ranked order"""
+    entry = db.session.get(RelatedContent, (kind, model.id))
+    ids = [int(value) for value in entry.related_ids.split(',') if value] if entry else []
+    if not ids:
+        return []
+    model_class = type(model)
+    query = model_class.query.filter(model_class.id.in_(ids))
+    if model_class is BlogPost:
+        query = without_post_bodies(query)
+    items = {item.id: item for item in query}
+    return [items[item_id] for item_id in ids if item_id in items]
+
+@app.cli.command('related-rebuild')
+def related_rebuild_command():
+    """Recompute related blog posts and portfolio projects."""
+    click.echo(f"Stored related items for {rebuild_related_content()} item(s)")
+    invalidate_page_cache()
+
+# Analytics
+_analytics_cache = {}
+_analytics_lock = threading.Lock()
+
+def analytics_cached(func):
+    """Cache an analytics query result per argument tuple for ANALYTICS_CACHE_TTL seconds"""
+    @wraps(func)
+    def wrapper(*args):
+        key = (func.__name__,) + args
+        now = time.monotonic()
+        with _analytics_lock:
+            cached = _analytics_cache.get(key)
+        if cached and now < cached[0]:
+            return cached[1]
+        result = func(*args)
+        with _analytics_lock:
+            _analytics_cache[key] = (now + app.config['ANALYTICS_CACHE_TTL'], result)
+        return result
+    return wrapper
+
+@analytics_cached
+def get_contact_status_counts():
+    """Contact submission counts per status, from a single GROUP BY"""
+    rows = db.session.query(ContactSubmission.status, db.func.count(ContactSubmission.id)) \
+        .group_by(ContactSubmission.status).all()
+    counts = {}
+    for status, count in rows:
+        counts[status or 'new'] = counts.get(status or 'new', 0) + count
+    return counts
+
+@analytics_cached
+def get_table_counts():
+    """Row counts for the dashboard tables, fetched in one statement"""
+    row = db.session.execute(db.select(
+        db.select(db.func.count(ContactSubmission.id)).scalar_subquery().label('contacts'),
+        db.select(db.func.count(BlogPost.id)).scalar_subquery().label('blog_posts'),
+        db.select(db.func.count(PortfolioItem.id)).scalar_subquery().label('portfolio_items'),
+    )).one()
+    return dict(row._mapping)
+
+@analytics_cached
+def count_published_posts():
+    """Number of published blog posts (shown alongside the blog cursors)"""
+    return db.session.query(db.func.count(BlogPost.id)).filter(BlogPost.published == True).scalar()
+
+@analytics_cached
+def get_contact_series(interval, days):
+    """Submissions per day or week and service over the last `days` days.
+
+    Returns a list of {'period': 'YYYY-MM-DD', 'service': ..., 'count': ...}
+    where weekly periods start on Monday.
+    """
+    created = ContactSubmission.created_at
+    if db.engine.dialect.name == 'postgresql':
+        bucket = db.func.date_trunc(interval, created)
+    elif interval == 'week':
+        bucket = db.func.date(created, 'weekday 0', '-6 days')
+    else:
+        bucket = db.func.date(created)
+    bucket = bucket.label('period')
+    
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.query(bucket, ContactSubmission.service, db.func.count(ContactSubmission.id)) \
+        .filter(created >= since) \
+        .group_by(bucket, ContactSubmission.service) \
+        .order_by(bucket).all()
+    return [
+        {'period': str(period)[:10], 'service': service or 'other', 'count': count}
+        for period, service, count in rows
+    ]
+
+# Contact export
+# Rows are read in batches of CONTACT_EXPORT_BATCH through a server-side
+# cursor (yield_per) and written out as they arrive. Memory use does not grow
+# with the table size, and downloads start with the first batch.
+CONTACT_EXPORT_COLUMNS = ['id', 'name', 'email', 'phone', 'service', 'message', 'status', 'notes', 'created_at']
+CONTACT_EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+CONTACT_EXPORT_BATCH = 1000
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def parse_export_date(value):
+    """'YYYY-MM-DD' -> datetime, None for an empty value; ValueError otherwise"""
+    return datetime.strptime(value, '%Y-%m-%d') if value else None
+
+def contact_export_query(status=None, service=None, since=None, until=None):
+    """Oldest-first select of the export columns; `until` is inclusive"""
+    columns = [getattr(ContactSubmission, name) for name in CONTACT_EXPORT_COLUMNS]
+    query = db.select(*columns).order_by(ContactSubmission.created_at, ContactSubmission.id)
+    if status == 'new':
+        # rows saved before the status default existed count as new
+        query = query.where(db.or_(ContactSubmission.status == 'new', ContactSubmission.status.is_(None)))
+    elif status:
+        query = query.where(ContactSubmission.status == status)
+    if service:
+        query = query.where(ContactSubmission.service == service)
+    if since:
+        query = query.where(ContactSubmission.created_at >= since)
+    if until:
+        query = query.where(ContactSubmission.created_at < until + timedelta(days=1))
+    return query
+
+def iter_contact_rows(query):
+    result = db.session.execute(query.execution_options(yield_per=CONTACT_EXPORT_BATCH))
+    for partition in result.partitions():
+        yield partition
+
+def csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    value = str(value)
+    # Spreadsheets evaluate cells starting with these as formulas
+    return "'" + value if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+def contact_export_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CONTACT_EXPORT_COLUMNS)
+    for rows in iter_contact_rows(query):
+        writer.writerows([csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def contact_export_jsonl(query):
+    for rows in iter_contact_rows(query):
+        yield ''.join(
+            json.dumps({name: value.isoformat() if isinstance(value, datetime) else value
+                        for name, value in zip(CONTACT_EXPORT_COLUMNS, row)}, ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+def contact_export(format, **filters):
+    """Generator of CSV or JSONL text chunks for the filtered submissions"""
+    query = contact_export_query(**filters)
+    return contact_export_csv(query) if format == 'csv' else contact_export_jsonl(query)
+
+@app.cli.command('contacts-export')
+@click.option('--format', 'format', type=click.Choice(list(CONTACT_EXPORT_FORMATS)), default='csv', show_default=True)
+@click.option('--status', help='new, contacted or closed.')
+@click.option('--service', help='Investment interest, e.g. energy.')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), help='First day to include (YYYY-MM-DD).')
+@click.option('--until', type=click.DateTime(['%Y-%m-%d']), help='Last day to include (YYYY-MM-DD).')
+@click.option('--output', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='File to write (default: stdout).')
+def contacts_export_command(format, status, service, since, until, output):
+    """Export contact submissions as CSV or JSONL."""
+    for chunk in contact_export(format, status=status, service=service, since=since, until=until):
+        output.write(chunk)
+
+# Process-wide copy of CompanySettings, shared by all requests in this worker
+_settings_cache = {'settings': None, 'expires': 0.0}
+_settings_lock = threading.Lock()
+
+def default_company_settings():
+    """Build an unsaved CompanySettings populated with the column defaults"""
+    settings = CompanySettings()
+    for column in CompanySettings.__table__.columns:
+        if column.default is not None and column.default.is_scalar:
+            setattr(settings, column.name, column.default.arg)
+    return settings
+
+def invalidate_company_settings():
+    """Forget cached settings (called when the Settings admin view saves)"""
+    with _settings_lock:
+        _settings_cache['settings'] = None
+        _settings_cache['expires'] = 0.0
+    g.pop('company_settings', None)
+
+# Outbound mail queue
+class FileMailConnection:
+    """Debug transport that writes each message to MAIL_FILE_DIR as an .eml file"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
         return False
 
+    def send(self, message):
+        filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{secrets.token_hex(4)}.eml"
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(message.as_bytes())
+
+def open_mail_connection():
+    """Open one connection for a batch of messages on the configured transport"""
+    if app.config['MAIL_TRANSPORT'] == 'file':
+        return FileMailConnection(app.config['MAIL_FILE_DIR'])
+    return mail.connect()
+
+def queue_email(subject, recipient, template, **kwargs):
+    """Render an email and add it to the outbound queue.
+
+    The row joins the caller's transaction, so it is only persisted when the
+    caller commits. Call mail_queue_worker.notify() after the commit.
+    """
+    email = OutboundEmail(
+        subject=subject,
+        recipient=recipient,
+        html=render_template(f'emails/{template}', **kwargs)
+    )
+    db.session.add(email)
+    return email
+
+def claim_queued_emails(limit):
+    """Lease up to `limit` due emails to this worker and return them"""
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=app.config['MAIL_QUEUE_LEASE'])
+    candidates = db.session.query(OutboundEmail.id).filter(
+        OutboundEmail.status == 'pending',
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.next_attempt_at).limit(limit).all()
+
+    claimed = []
+    for (email_id,) in candidates:
+        # Conditional update so two workers never claim the same row
+        result = db.session.execute(
+            db.update(OutboundEmail)
+            .where(OutboundEmail.id == email_id,
+                   OutboundEmail.status == 'pending',
+                   OutboundEmail.next_attempt_at <= now)
+            .values(next_attempt_at=lease_until)
+        )
+        if result.rowcount:
+            claimed.append(email_id)
+    db.session.commit()
+    if not claimed:
+        return []
+    return OutboundEmail.query.filter(OutboundEmail.id.in_(claimed)).all()
+
+def schedule_email_retry(email, error):
+    """Record a failed delivery and back off exponentially, giving up after MAIL_QUEUE_MAX_ATTEMPTS"""
+    email.attempts = (email.attempts or 0) + 1
+    email.last_error = str(error)
+    if email.attempts >= app.config['MAIL_QUEUE_MAX_ATTEMPTS']:
+        email.status = 'failed'
+    else:
+        delay = app.config['MAIL_QUEUE_RETRY_DELAY'] * 2 ** (email.attempts - 1)
+        email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+def process_mail_queue(batch_size=None):
+    """Send one batch of queued emails over a single connection; return the batch size"""
+    emails = claim_queued_emails(batch_size or app.config['MAIL_QUEUE_BATCH_SIZE'])
+    if not emails:
+        return 0
+
+    handled = set()
+    transport = app.config['MAIL_TRANSPORT']
+    try:
+        with ExitStack() as stack:
+            with timed(mail_latency, transport=transport, stage='connect'):
+                connection = stack.enter_context(open_mail_connection())
+            for email in emails:
+                try:
+                    msg = Message(subject=email.subject, recipients=[email.recipient], html=email.html)
+                    with timed(mail_latency, transport=transport, stage='send'):
+                        connection.send(msg)
+                except Exception as e:
+                    mail_results.inc(transport=transport, result='failed')
+                    schedule_email_retry(email, e)
+                else:
+                    mail_results.inc(transport=transport, result='sent')
+                    email.status = 'sent'
+                    email.sent_at = datetime.utcnow()
+                    email.last_error = None
+                handled.add(email.id)
+    except Exception as e:
+        # Connecting (or closing) failed; back off whatever was not attempted
+        print(f"Mail queue connection failed: {e}")
+        for email in emails:
+            if email.id not in handled:
+                schedule_email_retry(email, e)
+    db.session.commit()
+    return len(emails)
+
+class MailQueueWorker:
+    """Background thread that drains the outbound mail queue"""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self):
+        """Wake the worker, starting it on first use in this process"""
+        if not app.config['MAIL_QUEUE_WORKER']:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=app.config['MAIL_QUEUE_POLL_INTERVAL'])
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    while process_mail_queue():
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Mail queue processing failed: {e}")
+
+mail_queue_worker = MailQueueWorker()
+
+@app.cli.command('mail-queue')
+@click.option('--once', is_flag=True, help='Send one batch and exit.')
+def mail_queue_command(once):
+    """Send queued outbound emails."""
+    total = 0
+    while True:
+        processed = process_mail_queue()
+        total += processed
+        if once or not processed:
+            break
+    pending = OutboundEmail.query.filter_by(status='pending').count()
+    click.echo(f"Processed {total} email(s), {pending} still pending")
+
 def get_company_settings():
-    """Get company settings from database"""
-    settings = CompanySettings.query.first()
-    if not settings:
-        settings = CompanySettings()
-        db.session.add(settings)
-        db.session.commit()
+    """Get company settings, cached per request and per process.
+
+    The row is detached from the session so it stays readable after the
+    request's session is closed. When no row exists yet, unsaved defaults are
+    returned; init_db() is responsible for creating the row.
+    """
+    if 'company_settings' in g:
+        return g.company_settings
+
+    now = time.monotonic()
+    with _settings_lock:
+        settings = _settings_cache['settings']
+        if settings is None or now >= _settings_cache['expires']:
+            settings = CompanySettings.query.first()
+            if settings is None:
+                settings = default_company_settings()
+            else:
+                db.session.expunge(settings)
+            _settings_cache['settings'] = settings
+            _settings_cache['expires'] = now + app.config['SETTINGS_CACHE_TTL']
+
+    g.company_settings = settings
     return settings
 
+# Image processing
+def save_image_upload(file, folder):
+    """Save an uploaded image under static/uploads/<folder> and return its static path"""
+    # Secure the filename and add a timestamp to avoid conflicts
+    filename = secure_filename(file.filename)
+    name, ext = os.path.splitext(filename)
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext.lower()}"
+    
+    directory = os.path.join(app.config['UPLOAD_FOLDER'], folder)
+    os.makedirs(directory, exist_ok=True)
+    file.save(os.path.join(directory, filename))
+    return f"uploads/{folder}/{filename}"
+
+def _encode_image(img, format):
+    """Encode an image without metadata using the configured quality"""
+    quality = app.config['IMAGE_QUALITY']
+    buffer = io.BytesIO()
+    if format == 'JPEG':
+        img.convert('RGB').save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif format == 'PNG':
+        img.save(buffer, 'PNG', optimize=True)
+    elif format == 'WEBP':
+        img.save(buffer, 'WEBP', quality=quality, method=6)
+    elif format == 'AVIF':
+        img.save(buffer, 'AVIF', quality=quality)
+    return buffer.getvalue()
+
+def image_original_path(path):
+    """Where the untouched copy of a static image is kept"""
+    return os.path.join(app.config['IMAGE_ORIGINALS_DIR'], *path.split('/'))
+
+def optimize_image(path, new_original=False):
+    """Strip EXIF from a static image and write width variants next to it.
+
+    The first time an image is seen (or with `new_original`, when the static
+    file was replaced), it is copied untouched to IMAGE_ORIGINALS_DIR. Every
+    run then works from that copy, so reprocessing never re-encodes an
+    already re-encoded file and metadata such as GPS positions is never
+    served. The static file is rewritten auto-rotated, capped at
+    IMAGE_MAX_WIDTH and re-encoded when that removes metadata or saves
+    bytes. Each smaller width in IMAGE_VARIANT_WIDTHS is written as
+    `<name>-<width>w.<ext>` plus WebP (and AVIF when enabled); variants that
+    come out no smaller than the static file are discarded. Returns a dict
+    of the image size and its variants, or None for files Pillow cannot
+    process (including animated GIFs, which are left untouched).
+    """
+    abs_path = os.path.join(app.static_folder, path)
+    original_path = image_original_path(path)
+    if new_original or not os.path.isfile(original_path):
+        os.makedirs(os.path.dirname(original_path), exist_ok=True)
+        shutil.copy2(abs_path, original_path)
+    stem, ext = os.path.splitext(path)
+    original_size = os.path.getsize(original_path)
+    with Image.open(original_path) as source:
+        if getattr(source, 'is_animated', False):
+            return None
+        has_metadata = bool(source.getexif()) or any(key in source.info for key in ('exif', 'icc_profile', 'xmp'))
+        img = ImageOps.exif_transpose(source)
+        img.load()
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    if ext.lower() == '.webp':
+        format = 'WEBP'
+    elif has_alpha or ext.lower() in ('.png', '.gif'):
+        format = 'PNG'
+    else:
+        format = 'JPEG'
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    resized_original = False
+    max_width = app.config['IMAGE_MAX_WIDTH']
+    if img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        resized_original = True
+
+    data = _encode_image(img, format)
+    if resized_original or has_metadata or len(data) < original_size:
+        with open(abs_path, 'wb') as f:
+            f.write(data)
+        original_size = len(data)
+    elif not filecmp.cmp(original_path, abs_path, shallow=False):
+        shutil.copyfile(original_path, abs_path)  # the original now beats an earlier run's re-encode
+
+    modern_formats = [] if format == 'WEBP' else [('WEBP', '.webp', 'image/webp')]
+    if app.config['IMAGE_AVIF'] and pil_features.check('avif'):
+        modern_formats.append(('AVIF', '.avif', 'image/avif'))
+    fallback_type = {'PNG': 'image/png', 'WEBP': 'image/webp'}.get(format, 'image/jpeg')
+
+    variants = [{'src': path, 'width': img.width, 'type': fallback_type}]
+
+    def add_variant(variant_img, variant_path, variant_format, mime_type):
+        data = _encode_image(variant_img, variant_format)
+        if len(data) >= original_size:
+            return
+        with open(os.path.join(app.static_folder, variant_path), 'wb') as f:
+            f.write(data)
+        variants.append({'src': variant_path, 'width': variant_img.width, 'type': mime_type})
+
+    for modern_format, modern_ext, mime_type in modern_formats:
+        add_variant(img, stem + modern_ext, modern_format, mime_type)
+
+    for width in sorted(set(app.config['IMAGE_VARIANT_WIDTHS'])):
+        if width >= img.width:
+            continue
+        resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        add_variant(resized, f"{stem}-{width}w{ext}", format, fallback_type)
+        for modern_format, modern_ext, mime_type in modern_formats:
+            add_variant(resized, f"{stem}-{width}w{modern_ext}", modern_format, mime_type)
+
+    return {'width': img.width, 'height': img.height, 'variants': variants}
+
+def get_image_variants(model):
+    """Decode a model's image_variants column"""
+    try:
+        return json.loads(model.image_variants) if model.image_variants else {}
+    except ValueError:
+        return {}
+
+def ensure_image_variants(model, path):
+    """Process `path` and record its variants on the model unless already done"""
+    variants = get_image_variants(model)
+    if path in variants or not os.path.isfile(os.path.join(app.static_folder, path)):
+        return
+    try:
+        info = optimize_image(path)
+    except (OSError, ValueError) as e:
+        print(f"Image processing failed for {path}: {e}")
+        return
+    if info:
+        variants[path] = info
+        model.image_variants = json.dumps(variants)
+
+def update_gallery_image(image):
+    """Process a gallery image and record its dimensions"""
+    ensure_image_variants(image, image.path)
+    info = get_image_variants(image).get(image.path)
+    if info:
+        image.width, image.height = info['width'], info['height']
+
+# Image library batch processing
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+IMAGE_LIBRARY_DIRS = ('uploads/blog', 'uploads/portfolio', 'uploads/logos', 'images')
+_image_manifest_cache = {'mtime': None, 'manifest': {}}
+
+def load_image_manifest():
+    """Read the batch processing manifest, cached by mtime.
+
+    Maps each path to `source_hash` (its pristine copy in IMAGE_ORIGINALS_DIR),
+    `hash` (the processed static file) and `info` (size and variants).
+    """
+    path = app.config['IMAGE_MANIFEST']
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _image_manifest_cache['mtime'] != mtime:
+        with open(path) as f:
+            _image_manifest_cache['manifest'] = json.load(f)
+        _image_manifest_cache['mtime'] = mtime
+    return _image_manifest_cache['manifest']
+
+def save_image_manifest(manifest):
+    path = app.config['IMAGE_MANIFEST']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def get_image_info(model, path):
+    """Variant info for an image, from the model's column or the batch manifest"""
+    info = get_image_variants(model).get(path) if model is not None else None
+    if info is None:
+        entry = load_image_manifest().get(path)
+        info = entry['info'] if entry else None
+    return info
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_library_images():
+    """Original images under IMAGE_LIBRARY_DIRS, skipping generated variants"""
+    found = []
+    for directory in IMAGE_LIBRARY_DIRS:
+        for root, _, files in os.walk(os.path.join(app.static_folder, directory)):
+            names = set(files)
+            for name in sorted(files):
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in IMAGE_EXTENSIONS or re.search(r'-\d+w$', stem):
+                    continue
+                # A .webp/.avif next to a same-named JPEG/PNG is a generated variant
+                if ext.lower() == '.webp' and any(stem + e in names for e in ('.jpg', '.jpeg', '.png', '.gif', '.JPG', '.JPEG', '.PNG')):
+                    continue
+                rel_path = os.path.relpath(os.path.join(root, name), app.static_folder)
+                found.append(rel_path.replace(os.sep, '/'))
+    return found
+
+def _optimize_library_image(path, new_original):
+    """Process-pool job: optimize one image and report its byte sizes"""
+    abs_path = os.path.join(app.static_folder, path)
+    result = {'path': path}
+    try:
+        info = optimize_image(path, new_original=new_original)
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+        return result
+    original_path = image_original_path(path)
+    result['info'] = info
+    result['source_hash'] = file_sha256(original_path)
+    result['hash'] = file_sha256(abs_path)
+    result['bytes_before'] = os.path.getsize(original_path)
+    result['bytes_after'] = os.path.getsize(abs_path)
+    result['variant_bytes'] = sum(os.path.getsize(os.path.join(app.static_folder, v['src']))
+                                  for v in (info or {}).get('variants', []) if v['src'] != path)
+    return result
+
+def _static_file_replaced(entry, path):
+    """Whether the static file is no longer the one an earlier run wrote, i.e. a new original"""
+    return bool(entry) and file_sha256(os.path.join(app.static_folder, path)) != entry['hash']
+
+def _manifest_entry_is_current(entry, path):
+    original_path = image_original_path(path)
+    if not entry or 'source_hash' not in entry or not os.path.isfile(original_path):
+        return False
+    if _static_file_replaced(entry, path) or file_sha256(original_path) != entry['source_hash']:
+        return False
+    variants = (entry.get('info') or {}).get('variants', [])
+    return all(os.path.isfile(os.path.join(app.static_folder, v['src'])) for v in variants)
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+@app.cli.command('optimize-images')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--force', is_flag=True, help='Reprocess images even if unchanged since the last run.')
+def optimize_images_command(workers, force):
+    """Build resized/WebP variants for every image already in the library.
+
+    Images are always processed from their pristine copies, so --force
+    rebuilds everything without re-encoding earlier output.
+    """
+    manifest = load_image_manifest().copy()
+    paths = find_library_images()
+    pending = [p for p in paths if force or not _manifest_entry_is_current(manifest.get(p), p)]
+    replaced = [_static_file_replaced(manifest.get(p), p) for p in pending]
+    click.echo(f"{len(paths)} image(s) found, {len(paths) - len(pending)} unchanged, {len(pending)} to process")
+
+    total_before = total_after = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_optimize_library_image, pending, replaced):
+            path = result['path']
+            if 'error' in result:
+                click.echo(f"  ! {path}: {result['error']}")
+                continue
+            if result['info'] is None:
+                click.echo(f"  - {path}: skipped (animated)")
+                continue
+            manifest[path] = {'hash': result['hash'], 'source_hash': result['source_hash'], 'info': result['info']}
+            total_before += result['bytes_before']
+            total_after += result['bytes_after']
+            click.echo(f"  {path}: {_format_bytes(result['bytes_before'])} -> {_format_bytes(result['bytes_after'])}"
+                       f" + {len(result['info']['variants']) - 1} variant(s), {_format_bytes(result['variant_bytes'])}")
+    save_image_manifest(manifest)
+
+    # Record variants on the models that reference these images
+    updated = 0
+    for model in BlogPost.query.all() + PortfolioItem.query.all() + PortfolioImage.query.all():
+        variants = get_image_variants(model)
+        path = model.path if isinstance(model, PortfolioImage) else model.featured_image
+        entry = manifest.get(path) if path else None
+        if entry and variants.get(path) != entry['info']:
+            variants[path] = entry['info']
+            model.image_variants = json.dumps(variants)
+            if isinstance(model, PortfolioImage):
+                model.width, model.height = entry['info']['width'], entry['info']['height']
+            updated += 1
+    db.session.commit()
+    if updated:
+        invalidate_page_cache()
+
+    saved = total_before - total_after
+    click.echo(f"Originals: {_format_bytes(total_before)} -> {_format_bytes(total_after)} ({_format_bytes(saved)} saved); "
+               f"{updated} record(s) updated")
+
+# Formats offered through <source> elements, most efficient first
+MODERN_IMAGE_TYPES = ('image/avif', 'image/webp')
+
+@app.template_global()
+def responsive_image(model, path, alt='', sizes='100vw', css_class=None, loading='lazy'):
+    """Render a <picture> with srcset/sizes for a processed image, or a plain <img>"""
+    info = get_image_info(model, path)
+    attrs = f' alt="{escape(alt)}" loading="{loading}" decoding="async"'
+    if css_class:
+        attrs += f' class="{escape(css_class)}"'
+    if not info:
+        return Markup(f'<img src="{url_for("static", filename=path)}"{attrs}>')
+
+    image = image_sources(info)
+    sources = ''.join(
+        f'<source type="{mime_type}" srcset="{srcset}" sizes="{sizes}">'
+        for mime_type, srcset in image['sources'].items()
+    )
+    return Markup(
+        f'<picture>{sources}<img src="{image["src"]}" srcset="{image["srcset"]}" '
+        f'sizes="{sizes}" width="{info["width"]}" height="{info["height"]}"{attrs}></picture>'
+    )
+
+def image_sources(info):
+    """src, srcset and per-type <source> srcsets for a processed image"""
+    variants = sorted(info['variants'], key=lambda v: v['width'])
+    fallback = [v for v in variants if v['type'] not in MODERN_IMAGE_TYPES] or variants
+
+    def srcset(candidates):
+        return ', '.join(f"{url_for('static', filename=v['src'])} {v['width']}w" for v in candidates)
+
+    sources = {}
+    for mime_type in MODERN_IMAGE_TYPES:
+        candidates = [v for v in variants if v['type'] == mime_type]
+        if candidates:
+            sources[mime_type] = srcset(candidates)
+
+    # Default src is the smallest variant that still covers a typical phone screen
+    src = next((v for v in fallback if v['width'] >= 640), fallback[-1])['src']
+    return {'src': url_for('static', filename=src), 'srcset': srcset(fallback), 'sources': sources}
+
+@app.template_global()
+def image_variant_url(model, path, width):
+    """URL of the smallest variant of an image at least `width` pixels wide"""
+    info = get_image_info(model, path)
+    if info:
+        candidates = sorted((v for v in info['variants'] if v['type'] not in MODERN_IMAGE_TYPES),
+                            key=lambda v: v['width']) or info['variants'][:1]
+        variant = next((v for v in candidates if v['width'] >= width), candidates[-1])
+        return url_for('static', filename=variant['src'])
+    return url_for('static', filename=path)
+
+# Remote image cache
+# Templates reference third-party images through remote_image()/remote_image_url(),
+# which point at /remote-image/<key>-<width>.<ext>?src=<url>. The key is an
+# HMAC of the URL, so only URLs rendered by the site can be fetched. The
+# original is downloaded once and kept as <key>.orig; resized copies are
+# written next to it. File mtimes track use and the least recently used files
+# are evicted beyond REMOTE_IMAGE_CACHE_SIZE.
+REMOTE_IMAGE_FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpg': ('JPEG', 'image/jpeg')}
+REMOTE_IMAGE_NAME = re.compile(r'^([0-9a-f]{32})-(\d+)\.(webp|jpg)$')
+REMOTE_IMAGE_TOUCH_INTERVAL = 3600  # seconds between LRU timestamp updates of a cached file
+PORTFOLIO_HEADER_IMAGE = ('https://images.unsplash.com/photo-1486406146926-c627a92ad1ab'
+                          '?ixlib=rb-4.0.3&auto=format&fit=crop&w=2070&q=80')  # projects without a featured image
+_remote_image_locks = {}
+_remote_image_locks_lock = threading.Lock()
+
+def http_fetch(url):
+    """Download a remote image, refusing bodies over REMOTE_IMAGE_MAX_BYTES"""
+    if urlsplit(url).scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported image URL: {url}")
+    limit = app.config['REMOTE_IMAGE_MAX_BYTES']
+    request_ = urllib.request.Request(url, headers={'User-Agent': 'BlackstoneImageCache/1.0'})
+    with urllib.request.urlopen(request_, timeout=app.config['REMOTE_IMAGE_TIMEOUT']) as response:
+        data = response.read(limit + 1)
+    if len(data) > limit:
+        raise ValueError(f"Remote image larger than {limit} bytes: {url}")
+    return data
+
+class FixtureFetcher:
+    """Offline fetcher: serves <directory>/<last URL path segment>[.<ext>]"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, url):
+        name = unquote(os.path.basename(urlsplit(url).path))
+        for candidate in [name] + [f'{name}{ext}' for ext in ('.jpg', '.jpeg', '.png', '.webp')]:
+            path = os.path.join(self.directory, candidate)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+        raise FileNotFoundError(f"No fixture for {url} in {self.directory}")
+
+def make_remote_image_fetcher():
+    """Create the fetcher selected by REMOTE_IMAGE_FETCHER: a callable url -> bytes"""
+    fetcher = app.config['REMOTE_IMAGE_FETCHER']
+    if fetcher == 'http':
+        return http_fetch
+    if fetcher == 'file':
+        return FixtureFetcher(app.config['REMOTE_IMAGE_FIXTURE_DIR'])
+    raise ValueError(f"Unknown REMOTE_IMAGE_FETCHER: {fetcher}")
+
+remote_image_fetcher = None  # created by create_app(); tests may assign any callable
+
+def remote_image_key(url):
+    return hmac.new(app.config['SECRET_KEY'].encode(), url.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+@app.template_global()
+def remote_image_url(url, width, format='jpg'):
+    """URL of a remote image resized to the nearest configured width at or above `width`"""
+    widths = sorted(app.config['IMAGE_VARIANT_WIDTHS'])
+    width = next((w for w in widths if w >= width), widths[-1])
+    return url_for('remote_image_file', name=f'{remote_image_key(url)}-{width}.{format}', src=url)
+
+@app.template_global()
+def remote_image(url, alt='', sizes='100vw', css_class=None, loading='lazy'):
+    """Render a <picture> with WebP and JPEG srcsets for a remote image"""
+    widths = sorted(app.config['IMAGE_VARIANT_WIDTHS'])
+
+    def srcset(format):
+        return ', '.join(f'{remote_image_url(url, width, format)} {width}w' for width in widths)
+
+    attrs = f' alt="{escape(alt)}" loading="{loading}" decoding="async"'
+    if css_class:
+        attrs += f' class="{escape(css_class)}"'
+    return Markup(
+        f'<picture><source type="image/webp" srcset="{srcset("webp")}" sizes="{sizes}">'
+        f'<img src="{remote_image_url(url, 640)}" srcset="{srcset("jpg")}" sizes="{sizes}"{attrs}></picture>'
+    )
+
+def _remote_image_lock(key):
+    with _remote_image_locks_lock:
+        return _remote_image_locks.setdefault(key, threading.Lock())
+
+def _write_cache_file(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+def render_remote_image(url, key, width, ext):
+    """Fetch (once) and resize a remote image into the cache; returns the file name"""
+    cache_dir = app.config['REMOTE_IMAGE_CACHE_DIR']
+    name = f'{key}-{width}.{ext}'
+    with _remote_image_lock(key):
+        if os.path.exists(os.path.join(cache_dir, name)):
+            return name
+        os.makedirs(cache_dir, exist_ok=True)
+        original_path = os.path.join(cache_dir, f'{key}.orig')
+        if os.path.exists(original_path):
+            with open(original_path, 'rb') as f:
+                data = f.read()
+        else:
+            data = remote_image_fetcher(url)
+            _write_cache_file(original_path, data)
+
+        with Image.open(io.BytesIO(data)) as source:
+            img = ImageOps.exif_transpose(source)
+            img.load()
+        img = img.convert('RGB')
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        _write_cache_file(os.path.join(cache_dir, name), _encode_image(img, REMOTE_IMAGE_FORMATS[ext][0]))
+    prune_remote_image_cache()
+    return name
+
+def prune_remote_image_cache():
+    """Delete least recently used files until the cache fits REMOTE_IMAGE_CACHE_SIZE"""
+    cache_dir = app.config['REMOTE_IMAGE_CACHE_DIR']
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith('tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= app.config['REMOTE_IMAGE_CACHE_SIZE']:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+def remote_image_sources():
+    """Every remote image URL the templates render, for `flask remote-images-warm`"""
+    return [service['image'] for service in services] + [PORTFOLIO_HEADER_IMAGE]
+
+def warm_remote_images():
+    """Render every width and format of every remote image; returns {url: error} for failures"""
+    errors = {}
+    for url in remote_image_sources():
+        key = remote_image_key(url)
+        try:
+            for width in sorted(set(app.config['IMAGE_VARIANT_WIDTHS'])):
+                for ext in REMOTE_IMAGE_FORMATS:
+                    render_remote_image(url, key, width, ext)
+        except (OSError, ValueError) as e:
+            errors[url] = e
+    return errors
+
+@app.cli.command('remote-images-warm')
+def remote_images_warm_command():
+    """Fetch and resize every remote image the site references."""
+    errors = warm_remote_images()
+    for url, error in errors.items():
+        click.echo(f"  ! {url}: {error}")
+    click.echo(f"Cached {len(remote_image_sources()) - len(errors)} remote image(s) in "
+               f"{app.config['REMOTE_IMAGE_CACHE_DIR']}")
+    if errors:
+        raise SystemExit(1)
+
+# Static asset pipeline
+# Comments, and the strings and url(...) values that are copied unchanged
+CSS_VERBATIM = re.compile(r"""(/\*.*?\*/|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'"""
+                          r"""|url\((?:[^)"']|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')*\))""", re.S | re.I)
+
+def _minify_css_code(code, depth):
+    """Minify CSS outside strings; returns the text and the brace depth after it"""
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r'\s*([{};,>])\s*', r'\1', code).replace(';}', '}')
+    pieces = []
+    for piece in re.split(r'([{}])', code):
+        if piece == '{':
+            depth += 1
+        elif piece == '}':
+            depth = max(depth - 1, 0)
+        elif depth:
+            # Inside a block the space after ':' only separates a property from
+            # its value; in selectors (`a :hover`) whitespace is significant
+            piece = re.sub(r':\s+', ':', piece)
+        else:
+            piece = re.sub(r'(\([\w-]+):\s+', r'\1:', piece)  # @media (max-width: ...)
+        pieces.append(piece)
+    return ''.join(pieces), depth
+
+def minify_css(source):
+    """Strip comments and insignificant whitespace from a stylesheet.
+
+    Quoted strings and url(...) values are copied byte for byte.
+    """
+    output, code, depth = [], [], 0
+    for i, part in enumerate(CSS_VERBATIM.split(source)):
+        if i % 2 == 0:
+            code.append(part)
+        elif not part.startswith('/*'):
+            text, depth = _minify_css_code(''.join(code), depth)
+            output += [text, part]
+            code = []
+    output.append(_minify_css_code(''.join(code), depth)[0])
+    return ''.join(output).strip()
+
+def minify_js(source):
+    """Conservatively shrink a script: drop comment-only lines and indentation.
+
+    Line breaks are kept so automatic semicolon insertion behaves exactly as
+    in the original file.
+    """
+    lines = []
+    in_block_comment = False
+    for line in source.splitlines():
+        stripped = line.strip()
+        if in_block_comment:
+            if '*/' in stripped:
+                in_block_comment = False
+                stripped = stripped.split('*/', 1)[1].strip()
+            else:
+                continue
+        if stripped.startswith('/*'):
+            if '*/' not in stripped:
+                in_block_comment = True
+                continue
+            stripped = stripped.split('*/', 1)[1].strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+def build_assets():
+    """Write fingerprinted, minified, precompressed copies of CSS/JS under static/dist.
+
+    Returns a list of (source path, original, minified, gzip, brotli) byte
+    sizes per asset. The source -> fingerprinted path map is written to
+    dist/manifest.json, which static_asset_url() reads.
+    """
+    build_dir = os.path.join(app.static_folder, app.config['ASSET_BUILD_DIR'])
+    manifest = {}
+    report = []
+    for directory in app.config['ASSET_DIRS']:
+        for root, _, files in os.walk(os.path.join(app.static_folder, directory)):
+            for name in sorted(files):
+                stem, ext = os.path.splitext(name)
+                if ext not in ('.css', '.js'):
+                    continue
+                source_path = os.path.relpath(os.path.join(root, name), app.static_folder).replace(os.sep, '/')
+                with open(os.path.join(app.static_folder, source_path), 'rb') as f:
+                    original = f.read()
+                text = original.decode('utf-8')
+                minified = (minify_css(text) if ext == '.css' else minify_js(text)).encode('utf-8')
+
+                digest = hashlib.sha256(minified).hexdigest()[:10]
+                output_path = f"{app.config['ASSET_BUILD_DIR']}/{os.path.dirname(source_path)}/{stem}.{digest}{ext}"
+                abs_output = os.path.join(app.static_folder, output_path)
+                os.makedirs(os.path.dirname(abs_output), exist_ok=True)
+                with open(abs_output, 'wb') as f:
+                    f.write(minified)
+
+                gzipped = gzip.compress(minified, compresslevel=9, mtime=0)
+                with open(abs_output + '.gz', 'wb') as f:
+                    f.write(gzipped)
+                brotli_size = None
+                if brotli is not None:
+                    compressed = brotli.compress(minified, quality=11)
+                    with open(abs_output + '.br', 'wb') as f:
+                        f.write(compressed)
+                    brotli_size = len(compressed)
+
+                manifest[source_path] = output_path
+                report.append((source_path, len(original), len(minified), len(gzipped), brotli_size))
+
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    _asset_manifest_cache['mtime'] = None
+    return report
+
+_asset_manifest_cache = {'mtime': None, 'manifest': {}}
+
+def load_asset_manifest():
+    """Map of static source path -> fingerprinted build path, reloaded when rebuilt"""
+    path = os.path.join(app.static_folder, app.config['ASSET_BUILD_DIR'], 'manifest.json')
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _asset_manifest_cache['mtime'] != mtime:
+        with open(path) as f:
+            _asset_manifest_cache['manifest'] = json.load(f)
+        _asset_manifest_cache['mtime'] = mtime
+    return _asset_manifest_cache['manifest']
+
+@app.url_defaults
+def static_asset_url(endpoint, values):
+    """Point url_for('static', ...) at the fingerprinted build of an asset when one exists"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = load_asset_manifest().get(values['filename'], values['filename'])
+
+def serve_static(filename):
+    """Static view that serves precompressed, immutable copies of built assets"""
+    build_prefix = app.config['ASSET_BUILD_DIR'] + '/'
+    if not filename.startswith(build_prefix):
+        return app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0]
+    max_age = app.config['ASSET_MAX_AGE']
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, mimetype=mimetype, max_age=max_age)
+    response.headers.pop('Content-Disposition', None)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint, minify and precompress CSS/JS into static/dist."""
+    report = build_assets()
+    click.echo(f"{'asset':<28}{'original':>12}{'minified':>12}{'gzip':>12}{'brotli':>12}")
+    for source_path, original, minified, gzipped, brotli_size in report:
+        click.echo(f"{source_path:<28}{_format_bytes(original):>12}{_format_bytes(minified):>12}"
+                   f"{_format_bytes(gzipped):>12}{_format_bytes(brotli_size) if brotli_size else '-':>12}")
+    total_original = sum(r[1] for r in report)
+    total_served = sum(r[4] or r[3] for r in report)
+    click.echo(f"Transferred bytes: {_format_bytes(total_original)} -> {_format_bytes(total_served)}")
+    if brotli is None:
+        click.echo("Install 'brotli' to also generate .br files")
+
+# Response compression and conditional GET
+class CompressionMiddleware:
+    """WSGI middleware adding strong ETags, 304s and gzip/brotli to buffered responses.
+
+    Only responses with a Content-Length (i.e. not streamed), a compressible
+    content type and no existing Content-Encoding are touched. Compressed
+    representations get their own ETag (`"<tag>-gzip"` / `"<tag>-br"`); the
+    suffix is stripped from If-None-Match before the request reaches Flask so
+    the application's own conditional handling still matches.
+    """
+
+    ENCODING_SUFFIX = re.compile(r'-(?:gzip|br)"')
+
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+
+    def __call__(self, environ, start_response):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = self.ENCODING_SUFFIX.sub('"', if_none_match)
+
+        captured = {}
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return written.append
+
+        app_iter = self.wsgi_app(environ, capture)
+        if not captured:
+            # start_response is deferred until iteration; leave the response alone
+            return self._passthrough(app_iter, written, start_response, captured)
+
+        headers = Headers(captured['headers'])
+        status_code = int(captured['status'].split(' ', 1)[0])
+        if status_code == 304 and if_none_match and 'ETag' in headers:
+            # Echo back the representation tag the client revalidated with
+            etag, weak = unquote_etag(headers['ETag'])
+            for encoding in ('br', 'gzip'):
+                if quote_etag(f"{etag}-{encoding}") in if_none_match:
+                    headers['ETag'] = quote_etag(f"{etag}-{encoding}", weak)
+                    captured['headers'] = headers.to_wsgi_list()
+                    break
+        if not self._should_buffer(environ, status_code, headers):
+            start_response(captured['status'], captured['headers'], captured['exc_info'])
+            return chain(written, app_iter) if written else app_iter
+
+        try:
+            body = b''.join(chain(written, app_iter))
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        status = captured['status']
+        if status_code == 200 and environ.get('REQUEST_METHOD') == 'GET':
+            etag, weak = unquote_etag(headers.get('ETag'))
+            if etag is None:
+                etag, weak = hashlib.sha1(body).hexdigest(), False
+                headers['ETag'] = quote_etag(etag)
+            if parse_etags(environ.get('HTTP_IF_NONE_MATCH')).contains_raw(quote_etag(etag, weak)):
+                return self._not_modified(headers, start_response)
+
+        encoding = self._negotiate(environ) if len(body) >= self.config['COMPRESS_MIN_SIZE'] else None
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f"{vary}, Accept-Encoding"
+        if encoding:
+            if encoding == 'br':
+                body = brotli.compress(body, quality=self.config['COMPRESS_BR_LEVEL'])
+            else:
+                body = gzip.compress(body, compresslevel=self.config['COMPRESS_LEVEL'])
+            headers['Content-Encoding'] = encoding
+            if 'ETag' in headers:
+                etag, weak = unquote_etag(headers['ETag'])
+                headers['ETag'] = quote_etag(f"{etag}-{encoding}", weak)
+        headers['Content-Length'] = str(len(body))
+
+        start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+        return [body]
+
+    def _should_buffer(self, environ, status_code, headers):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or 'Content-Length' not in headers:
+            return False
+        if status_code != 200 and status_code < 400:
+            return False
+        if 'Content-Encoding' in headers or 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip()
+        return mimetype in self.config['COMPRESS_MIMETYPES']
+
+    def _negotiate(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _not_modified(self, headers, start_response):
+        keep = ('ETag', 'Cache-Control', 'Vary', 'Last-Modified', 'Expires', 'Date', 'Content-Location')
+        start_response('304 Not Modified', [(k, v) for k, v in headers.items() if k in keep])
+        return []
+
+    def _passthrough(self, app_iter, written, start_response, captured):
+        started = False
+        try:
+            for chunk in chain(written, app_iter):
+                if not started:
+                    start_response(captured['status'], captured['headers'], captured['exc_info'])
+                    started = True
+                yield chunk
+            if not started:
+                start_response(captured['status'], captured['headers'], captured['exc_info'])
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+app.wsgi_app = CompressionMiddleware(app.wsgi_app, app.config)
+
+# Instrumentation
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label set"""
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                labels = ''.join(f'{label}="{prometheus_escape(value)}",' for label, value in zip(self.labels, key))
+                for bound, count in zip(self.buckets, series['counts']):
+                    lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {series["count"]}')
+                suffix = f'{{{labels.rstrip(",")}}}' if labels else ''
+                lines.append(f'{self.name}_sum{suffix} {series["sum"]:.6f}')
+                lines.append(f'{self.name}_count{suffix} {series["count"]}')
+        return lines
+
+class Counter:
+    """Prometheus-style monotonically increasing counter"""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                labels = ','.join(f'{label}="{prometheus_escape(v)}"' for label, v in zip(self.labels, key))
+                lines.append(f'{self.name}{{{labels}}} {value}' if labels else f'{self.name} {value}')
+        return lines
+
+def prometheus_escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+request_latency = Histogram('http_request_duration_seconds', 'Request latency by endpoint.',
+                            LATENCY_BUCKETS, ('endpoint', 'method', 'status'))
+request_queries = Histogram('http_request_db_queries', 'SQL statements executed per request.',
+                            QUERY_COUNT_BUCKETS, ('endpoint',))
+request_db_time = Histogram('http_request_db_seconds', 'Time spent in SQL per request.',
+                            LATENCY_BUCKETS, ('endpoint',))
+repeated_queries = Counter('http_request_repeated_queries_total',
+                           'Identical SQL statements executed more than once within a request.', ('endpoint',))
+query_latency = Histogram('db_query_duration_seconds', 'Latency of individual SQL statements.', LATENCY_BUCKETS)
+template_latency = Histogram('template_render_seconds', 'Template render time.', LATENCY_BUCKETS, ('template',))
+mail_latency = Histogram('mail_duration_seconds', 'Time spent connecting to the mail server and sending.',
+                         LATENCY_BUCKETS, ('transport', 'stage'))
+mail_results = Counter('mail_messages_total', 'Emails handed to the mail server.', ('transport', 'result'))
+rate_limit_hits = Counter('rate_limited_requests_total', 'Posts refused because a token bucket was empty.', ('scope',))
+spam_rejections = Counter('spam_rejected_total', 'Posts dropped as spam before any database or mail work.',
+                          ('form', 'reason'))
+METRICS = [request_latency, request_queries, request_db_time, repeated_queries,
+           query_latency, template_latency, mail_latency, mail_results, rate_limit_hits, spam_rejections]
+
+@contextmanager
+def timed(histogram, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+@db.event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@db.event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if not app.config['METRICS_ENABLED']:
+        return
+    query_latency.observe(elapsed)
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += elapsed
+        g.db_statements[statement] = g.db_statements.get(statement, 0) + 1
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    if 'template_timers' not in g:
+        g.template_timers = []
+    g.template_timers.append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def record_template(sender, template, context, **extra):
+    if g.get('template_timers') and app.config['METRICS_ENABLED']:
+        template_latency.observe(time.perf_counter() - g.template_timers.pop(), template=template.name)
+
+@app.before_request
+def start_request_metrics():
+    if app.config['METRICS_ENABLED']:
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+        g.db_statements = {}
+    if app.config['PROFILING_ENABLED'] and request.args.get('_profile') \
+            and current_user.is_authenticated and current_user.is_admin:
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def record_request_metrics(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        name = f"{request.endpoint or 'unmatched'}-{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}.prof"
+        profiler.dump_stats(os.path.join(app.config['PROFILE_DIR'], name))
+        response.headers['X-Profile'] = name
+
+    if 'request_started' in g:
+        endpoint = request.endpoint or 'unmatched'
+        request_latency.observe(time.perf_counter() - g.request_started,
+                                endpoint=endpoint, method=request.method, status=response.status_code)
+        request_queries.observe(g.db_queries, endpoint=endpoint)
+        request_db_time.observe(g.db_time, endpoint=endpoint)
+        repeats = sum(count - 1 for count in g.db_statements.values() if count > 1)
+        if repeats:
+            repeated_queries.inc(repeats, endpoint=endpoint)
+    return response
+
+# Rate limiting and spam filtering
+# Token buckets hold `count` tokens and refill continuously over `period`, so
+# "5/hour" allows a burst of five and then one post every 12 minutes. Buckets
+# are keyed by a hash of the scope and the client IP, email or username.
+RATE_LIMIT_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_rate_limit(value):
+    """'5/hour' -> (5, 3600)"""
+    count, _, period = value.partition('/')
+    return int(count), RATE_LIMIT_PERIODS[period.strip()]
+
+def take_token(tokens, updated, now, capacity, period):
+    """Refill a bucket and take one token: (tokens left, seconds to wait or 0)"""
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) * period / capacity
+
+class MemoryRateLimitStore:
+    """Buckets in this process, least recently used evicted beyond max_keys"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, wait = take_token(tokens, updated, now, capacity, period)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class SQLiteRateLimitStore:
+    """Buckets in a SQLite file shared by every worker on the host"""
+
+    PRUNE_EVERY = 1000  # writes between deletions of idle (i.e. full) buckets
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # One connection per thread, opened lazily so forked workers never
+        # share one and startup never touches the file
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS rate_limit_bucket '
+                               '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID')
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, period):
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM rate_limit_bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row or (capacity, now)
+            tokens, wait = take_token(tokens, updated, now, capacity, period)
+            connection.execute('INSERT OR REPLACE INTO rate_limit_bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                               (key, tokens, now))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                oldest = now - max(RATE_LIMIT_PERIODS.values())
+                connection.execute('DELETE FROM rate_limit_bucket WHERE updated < ?', (oldest,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limit_bucket')
+
+def make_rate_limit_store():
+    """Create the bucket store selected by RATE_LIMIT_STORE"""
+    store_type = app.config['RATE_LIMIT_STORE']
+    if store_type == 'memory':
+        return MemoryRateLimitStore(app.config['RATE_LIMIT_MAX_KEYS'])
+    if store_type == 'sqlite':
+        return SQLiteRateLimitStore(app.config['RATE_LIMIT_DB'])
+    raise ValueError(f"Unknown RATE_LIMIT_STORE: {store_type}")
+
+rate_limit_store = None  # created by create_app() once the configuration is final
+
+def rate_limit_key(scope, value):
+    # Hashed so the shared store never holds addresses or emails in clear text
+    return scope + ':' + hashlib.sha256(value.strip().lower().encode('utf-8')).hexdigest()[:32]
+
+def rate_limited(scope, value):
+    """Take a token from the RATE_LIMIT_<SCOPE> bucket for value.
+
+    Returns 0 when the request may proceed, otherwise the seconds until the
+    bucket has a token again.
+    """
+    if not app.config['RATE_LIMIT_ENABLED'] or not value:
+        return 0
+    capacity, period = parse_rate_limit(app.config['RATE_LIMIT_' + scope.upper()])
+    wait = rate_limit_store.consume(rate_limit_key(scope, value), capacity, period)
+    if wait:
+        rate_limit_hits.inc(scope=scope)
+    return wait
+
+def is_duplicate_message(email, message):
+    """True when this email sent the same message within CONTACT_DUPLICATE_WINDOW"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return False
+    text = email + '\n' + ' '.join(message.split())
+    return bool(rate_limit_store.consume(rate_limit_key('contact_duplicate', text),
+                                         1, app.config['CONTACT_DUPLICATE_WINDOW']))
+
+def too_many_requests(template, retry_after, **context):
+    """Re-render a form with a 429 status and Retry-After"""
+    flash('Too many attempts. Please try again later.', 'error')
+    response = make_response(render_template(template, **context), 429)
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+# Page cache
+class MemoryPageCache:
+    """In-process LRU cache of rendered pages"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class FileSystemPageCache:
+    """Rendered pages pickled to a directory, shared by every worker on the host"""
+
+    def __init__(self, cache_dir, max_entries, ttl):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.page')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.ttl:
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def set(self, key, entry):
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        pages = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.page')]
+        if len(pages) <= self.max_entries:
+            return
+        pages.sort(key=lambda e: e.stat().st_mtime)
+        for entry in pages[:len(pages) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.page'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+class NullPageCache:
+    """Disables page caching"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry):
+        pass
+
+    def clear(self):
+        pass
+
+def make_page_cache():
+    """Create the page cache backend selected by PAGE_CACHE_TYPE"""
+    cache_type = app.config['PAGE_CACHE_TYPE']
+    if cache_type == 'memory':
+        return MemoryPageCache(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
+    if cache_type == 'filesystem':
+        return FileSystemPageCache(app.config['PAGE_CACHE_DIR'], app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
+    if cache_type == 'null':
+        return NullPageCache()
+    raise ValueError(f"Unknown PAGE_CACHE_TYPE: {cache_type}")
+
+page_cache = None  # created by create_app() once the configuration is final
+
+# Query arguments that change a cached page; anything else is ignored in the key
+PAGE_CACHE_ARGS = ('page', 'category', 'older', 'newer')
+
+def get_template_version():
+    """Version string for cache keys, derived from template mtimes unless configured"""
+    version = app.config.get('TEMPLATE_VERSION')
+    if not version:
+        digest = hashlib.sha1()
+        for root, _, files in os.walk(app.jinja_loader.searchpath[0]):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(f"{path}:{os.path.getmtime(path)}".encode('utf-8'))
+        version = digest.hexdigest()[:12]
+        app.config['TEMPLATE_VERSION'] = version
+    return version
+
+def page_cache_generation():
+    """Identity of the invalidation stamp file; changes whenever any process invalidates"""
+    try:
+        stat = os.stat(app.config['PAGE_CACHE_STAMP'])
+    except FileNotFoundError:
+        return '0'
+    return f"{stat.st_ino:x}.{stat.st_mtime_ns:x}"
+
+def normalize_page_cache_arg(name, value):
+    """Canonical form of a cached query argument, or None if the view would reject it"""
+    if name in ('older', 'newer'):
+        cursor = decode_cursor(value)
+        return format_cursor(*cursor) if cursor else None
+    if name == 'page':
+        return str(int(value)) if value.isdigit() else None
+    return value
+
+def page_cache_key():
+    """Cache key for the current request: origin, route, relevant query args,
+    template version and cache generation.
+
+    Returns None when a cursor or page number is malformed, so arbitrary
+    values cannot fill the cache with copies of the first page.
+    """
+    args = []
+    for name in PAGE_CACHE_ARGS:
+        if name in request.args:
+            value = normalize_page_cache_arg(name, request.args[name])
+            if value is None:
+                return None
+            args.append(f"{name}={value}")
+    return (f"{request.scheme}://{request.host}{request.path}?{'&'.join(args)}"
+            f"#{get_template_version()}.{page_cache_generation()}")
+
+def invalidate_page_cache():
+    """Drop every cached page (called when admin views or CLI commands change content).
+
+    Only this process's cache can be cleared directly. Replacing the stamp
+    file changes the cache key in every other worker on the host, including
+    the memory caches of gunicorn workers that did not handle the save; their
+    old entries are never read again and age out of the LRU. The sitemap and
+    feed files are dated against the same stamp (see feed_is_current).
+    """
+    path = app.config['PAGE_CACHE_STAMP']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(8))
+    os.replace(tmp_path, path)  # new inode as well as mtime, in case the mtime is coarse
+    page_cache.clear()
+
+def set_page_last_modified(*timestamps):
+    """Record the newest content timestamp for the page being rendered"""
+    timestamps = [ts for ts in timestamps if ts is not None]
+    if timestamps:
+        current = g.get('page_last_modified')
+        g.page_last_modified = max(timestamps + ([current] if current else []))
+
+def cached_page(view):
+    """Serve a public GET route from the page cache with ETag/Last-Modified validators"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or 'profiler' in g:
+            return view(*args, **kwargs)
+
+        key = page_cache_key()
+        if key is None:
+            return view(*args, **kwargs)
+        entry = page_cache.get(key)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = {
+                'body': body,
+                'mimetype': response.mimetype,
+                'etag': hashlib.sha1(body).hexdigest(),
+                'last_modified': g.get('page_last_modified'),
+            }
+            page_cache.set(key, entry)
+
+        response = app.response_class(entry['body'], mimetype=entry['mimetype'])
+        response.set_etag(entry['etag'])
+        if entry['last_modified']:
+            response.last_modified = entry['last_modified']
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+# Sitemap and feeds
+# sitemap.xml and the RSS/Atom feeds are written to FEED_DIR by a streaming
+# XML writer and served as files with ETag/Last-Modified, so crawlers polling
+# them cost a stat() instead of database queries. A file is rebuilt on the
+# first request after a content change, i.e. when the page cache stamp is
+# newer than the file, so admin saves never wait for a feed build.
+FEED_FILES = {  # file name -> (endpoint, mimetype)
+    'sitemap.xml': ('sitemap', 'application/xml'),
+    'blog-rss.xml': ('blog_feed', 'application/rss+xml'),
+    'blog-atom.xml': ('blog_atom_feed', 'application/atom+xml'),
+    'portfolio-rss.xml': ('portfolio_feed', 'application/rss+xml'),
+    'portfolio-atom.xml': ('portfolio_atom_feed', 'application/atom+xml'),
+}
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ATOM_NAMESPACE = 'http://www.w3.org/2005/Atom'
+_feed_lock = threading.Lock()
+
+class XMLWriter:
+    """Writes elements to a file as they are produced, without building a tree"""
+
+    def __init__(self, stream):
+        self.generator = XMLGenerator(stream, 'utf-8', short_empty_elements=True)
+        self.generator.startDocument()
+
+    def start(self, name, attrs=None):
+        self.generator.startElement(name, attrs or {})
+        self.generator.ignorableWhitespace('\n')
+
+    def end(self, name):
+        self.generator.endElement(name)
+        self.generator.ignorableWhitespace('\n')
+
+    def element(self, name, text=None, attrs=None):
+        self.generator.startElement(name, attrs or {})
+        if text is not None:
+            self.generator.characters(str(text))
+        self.end(name)
+
+    def close(self):
+        self.generator.endDocument()
+
+def w3c_datetime(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')  # timestamps are stored in UTC
+
+def rfc822_datetime(value):
+    return format_datetime(value.replace(tzinfo=timezone.utc))
+
+def write_sitemap(writer):
+    """Fixed pages plus every published post and public project, read in batches"""
+    posts = db.select(BlogPost.slug, BlogPost.updated_at).where(BlogPost.published == True) \
+        .order_by(BlogPost.created_at.desc(), BlogPost.id.desc())
+    projects = db.select(PortfolioItem.id, PortfolioItem.updated_at) \
+        .where(PortfolioItem.status.in_(PUBLIC_PORTFOLIO_STATUSES)).order_by(PortfolioItem.created_at.desc())
+    latest_post = db.session.execute(db.select(db.func.max(BlogPost.updated_at))
+                                     .where(BlogPost.published == True)).scalar()
+    latest_project = db.session.execute(db.select(db.func.max(PortfolioItem.updated_at))
+                                        .where(PortfolioItem.status.in_(PUBLIC_PORTFOLIO_STATUSES))).scalar()
+
+    def url(location, lastmod=None):
+        writer.start('url')
+        writer.element('loc', location)
+        if lastmod:
+            writer.element('lastmod', w3c_datetime(lastmod))
+        writer.end('url')
+
+    writer.start('urlset', {'xmlns': SITEMAP_NAMESPACE})
+    url(url_for('home', _external=True), max(filter(None, [latest_post, latest_project]), default=None))
+    for endpoint in ('services_page', 'team_page', 'about_page', 'contact_page'):
+        url(url_for(endpoint, _external=True))
+    url(url_for('blog_page', _external=True), latest_post)
+    url(url_for('portfolio_page', _external=True), latest_project)
+    for slug, updated_at in db.session.execute(posts.execution_options(yield_per=1000)):
+        url(url_for('blog_post', slug=slug, _external=True), updated_at)
+    for project_id, updated_at in db.session.execute(projects.execution_options(yield_per=1000)):
+        url(url_for('portfolio_detail', project_id=project_id, _external=True), updated_at)
+    writer.end('urlset')
+
+def blog_feed_items():
+    for post in published_posts_query().limit(app.config['FEED_ITEMS']):
+        yield {
+            'title': post.title,
+            'url': url_for('blog_post', slug=post.slug, _external=True),
+            'summary': post.summary or '',
+            'author': post.author,
+            'categories': [tag.name for tag in post.tag_list],
+            'published': post.created_at,
+            'updated': post.updated_at or post.created_at,
+        }
+
+def portfolio_feed_items():
+    for project in public_portfolio_query().limit(app.config['FEED_ITEMS']):
+        yield {
+            'title': project.title,
+            'url': url_for('portfolio_detail', project_id=project.id, _external=True),
+            'summary': truncate_text(project.description, SUMMARY_LENGTH),
+            'author': None,
+            'categories': [project.category],
+            'published': project.created_at,
+            'updated': project.updated_at or project.created_at,
+        }
+
+def feed_channel(kind):
+    """(title, page url, description) of the blog or portfolio feed"""
+    settings = get_company_settings()
+    if kind == 'blog':
+        return (f'{settings.company_name} Insights', url_for('blog_page', _external=True),
+                'Investment insights and news from Equatorial Guinea.')
+    return (f'{settings.company_name} Portfolio', url_for('portfolio_page', _external=True),
+            'Investment opportunities and completed projects.')
+
+def write_rss(writer, kind, items):
+    title, link, description = feed_channel(kind)
+    writer.start('rss', {'version': '2.0', 'xmlns:atom': ATOM_NAMESPACE})
+    writer.start('channel')
+    writer.element('title', title)
+    writer.element('link', link)
+    writer.element('description', description)
+    writer.element('atom:link', attrs={'href': url_for(f'{kind}_feed', _external=True), 'rel': 'self',
+                                       'type': 'application/rss+xml'})
+    for item in items:
+        writer.start('item')
+        writer.element('title', item['title'])
+        writer.element('link', item['url'])
+        writer.element('guid', item['url'], {'isPermaLink': 'true'})
+        writer.element('description', item['summary'])
+        writer.element('pubDate', rfc822_datetime(item['published']))
+        for category in item['categories']:
+            writer.element('category', category)
+        writer.end('item')
+    writer.end('channel')
+    writer.end('rss')
+
+def write_atom(writer, kind, items):
+    title, link, description = feed_channel(kind)
+    items = list(items)
+    updated = max((item['updated'] for item in items), default=datetime.utcnow())
+    writer.start('feed', {'xmlns': ATOM_NAMESPACE})
+    writer.element('title', title)
+    writer.element('subtitle', description)
+    writer.element('id', link)
+    writer.element('link', attrs={'href': link})
+    writer.element('link', attrs={'href': url_for(f'{kind}_atom_feed', _external=True), 'rel': 'self'})
+    writer.element('updated', w3c_datetime(updated))
+    writer.start('author')
+    writer.element('name', get_company_settings().company_name)
+    writer.end('author')
+    for item in items:
+        writer.start('entry')
+        writer.element('title', item['title'])
+        writer.element('id', item['url'])
+        writer.element('link', attrs={'href': item['url']})
+        writer.element('published', w3c_datetime(item['published']))
+        writer.element('updated', w3c_datetime(item['updated']))
+        if item['author']:
+            writer.start('author')
+            writer.element('name', item['author'])
+            writer.end('author')
+        for category in item['categories']:
+            writer.element('category', attrs={'term': category})
+        writer.element('summary', item['summary'])
+        writer.end('entry')
+    writer.end('feed')
+
+def build_feed(name):
+    """Write one file in FEED_FILES atomically"""
+    writers = {
+        'sitemap.xml': write_sitemap,
+        'blog-rss.xml': lambda writer: write_rss(writer, 'blog', blog_feed_items()),
+        'blog-atom.xml': lambda writer: write_atom(writer, 'blog', blog_feed_items()),
+        'portfolio-rss.xml': lambda writer: write_rss(writer, 'portfolio', portfolio_feed_items()),
+        'portfolio-atom.xml': lambda writer: write_atom(writer, 'portfolio', portfolio_feed_items()),
+    }
+    directory = app.config['FEED_DIR']
+    os.makedirs(directory, exist_ok=True)
+    changed = feed_content_changed_ns()  # read first: a change during the build leaves the file stale
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f, app.test_request_context(base_url=app.config['EXPORT_BASE_URL']):
+        writer = XMLWriter(f)
+        writers[name](writer)
+        writer.close()
+    os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; the export copies are read by the web server
+    if changed is not None:
+        # Dated to the content it reflects, which is also the right Last-Modified
+        os.utime(tmp_path, ns=(changed, changed))
+    os.replace(tmp_path, os.path.join(directory, name))
+
+def feed_content_changed_ns():
+    """mtime of the page cache stamp (the last content change), or None if never invalidated"""
+    try:
+        return os.stat(app.config['PAGE_CACHE_STAMP']).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def feed_is_current(path):
+    try:
+        built = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    changed = feed_content_changed_ns()
+    return changed is None or built >= changed
+
+def rebuild_feeds():
+    """Rebuild the sitemap and every feed"""
+    for name in FEED_FILES:
+        build_feed(name)
+
+def serve_feed(name):
+    path = os.path.join(app.config['FEED_DIR'], name)
+    if not feed_is_current(path):
+        with _feed_lock:
+            if not feed_is_current(path):
+                build_feed(name)
+    return send_from_directory(app.config['FEED_DIR'], name, mimetype=FEED_FILES[name][1],
+                               max_age=app.config['FEED_MAX_AGE'])
+
+@app.cli.command('feeds-build')
+def feeds_build_command():
+    """Regenerate sitemap.xml and the RSS/Atom feeds."""
+    for name in FEED_FILES:
+        build_feed(name)
+        click.echo(f"Wrote {os.path.join(app.config['FEED_DIR'], name)}")
+
+# Static site export
+# `flask export` renders every public page into EXPORT_DIR so a web server can
+# serve them as files. A page at /path?query is written to
+# path/index@query.html (path/index.html without a query string).
+def export_file_path(url):
+    path, _, query = url.partition('?')
+    return os.path.join(path.strip('/'), f'index@{query}.html' if query else 'index.html')
+
+def export_stamp(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+def export_pages():
+    """(url, stamp) for every public page; a page is re-rendered when its stamp changes.
+
+    Every stamp includes the template version and settings. Detail pages also
+    depend on their own updated_at and on their related items; listing pages on
+    all published posts and public projects.
+    """
+    settings = get_company_settings()
+    common = (get_template_version(), settings.updated_at)
+    posts = without_post_bodies(BlogPost.query).filter_by(published=True) \
+        .order_by(BlogPost.created_at.desc(), BlogPost.id.desc()).all()
+    projects = public_portfolio_query().all()
+    post_stamps = {post.id: post.updated_at for post in posts}
+    project_stamps = {project.id: project.updated_at for project in projects}
+    related = {(entry.kind, entry.ref_id): entry.related_ids for entry in RelatedContent.query}
+    galleries = {}
+    for image in PortfolioImage.query.order_by(PortfolioImage.position, PortfolioImage.id):
+        galleries.setdefault(image.portfolio_item_id, []).append((image.id, image.path, image.alt, image.position))
+    listings = export_stamp(common, sorted(post_stamps.items()), sorted(project_stamps.items()))
+
+    def related_stamps(kind, model_id, stamps):
+        ids = [int(value) for value in (related.get((kind, model_id)) or '').split(',') if value]
+        return [(related_id, stamps.get(related_id)) for related_id in ids]
+
+    pages = [(url_for(endpoint), export_stamp(common)) for endpoint in ('services_page', 'team_page', 'about_page')]
+    pages += [(url_for('home'), listings), (url_for('blog_page'), listings), (url_for('portfolio_page'), listings)]
+
+    # Blog pagination, following the same cursors the Older/Newer links use
+    for start in range(BLOG_PAGE_SIZE, len(posts), BLOG_PAGE_SIZE):
+        pages.append((url_for('blog_page', older=encode_cursor(posts[start - 1])), listings))
+        pages.append((url_for('blog_page', newer=encode_cursor(posts[start])), listings))
+
+    for (category,) in portfolio_categories_query():
+        pages.append((url_for('portfolio_page', category=category), listings))
+    for post in posts:
+        pages.append((url_for('blog_post', slug=post.slug),
+                      export_stamp(common, post.updated_at, related_stamps('blog', post.id, post_stamps))))
+    for project in projects:
+        pages.append((url_for('portfolio_detail', project_id=project.id),
+                      export_stamp(common, project.updated_at, related_stamps('portfolio', project.id, project_stamps),
+                                   galleries.get(project.id, [])[:GALLERY_PAGE_SIZE], len(galleries.get(project.id, [])))))
+    return pages
+
+def export_render(url):
+    """Render one page through the WSGI app; returns (url, status, body)"""
+    with app.test_client() as client:
+        response = client.get(url, base_url=app.config['EXPORT_BASE_URL'])
+        return url, response.status_code, response.get_data()
+
+def copy_static_tree(source, target):
+    """Copy new or changed files from source into target; returns the number copied"""
+    copied = 0
+    for root, dirs, files in os.walk(source):
+        destination = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(destination, exist_ok=True)
+        for name in files:
+            source_file, target_file = os.path.join(root, name), os.path.join(destination, name)
+            stat = os.stat(source_file)
+            if os.path.exists(target_file):
+                current = os.stat(target_file)
+                if current.st_size == stat.st_size and int(current.st_mtime) == int(stat.st_mtime):
+                    continue
+            shutil.copy2(source_file, target_file)
+            copied += 1
+    return copied
+
+@app.cli.command('export')
+@click.option('--output', default=None, help='Target directory (default: EXPORT_DIR).')
+@click.option('--workers', default=4, show_default=True, help='Pages rendered in parallel.')
+@click.option('--force', is_flag=True, help='Re-render every page, not only the changed ones.')
+def export_command(output, workers, force):
+    """Pre-render all public pages and copy static files for serving without Python."""
+    output = output or app.config['EXPORT_DIR']
+    manifest_path = os.path.join(output, '.export-manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    with app.test_request_context(base_url=app.config['EXPORT_BASE_URL']):
+        pages = export_pages()
+    stamps = dict(pages)
+    pending = [url for url, stamp in pages
+               if manifest.get(url) != stamp or not os.path.exists(os.path.join(output, export_file_path(url)))]
+    click.echo(f"{len(pages)} page(s), {len(pages) - len(pending)} unchanged, {len(pending)} to render")
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, status, body in executor.map(export_render, pending):
+            if status != 200:
+                click.echo(f"  ! {url}: HTTP {status}")
+                failed += 1
+                continue
+            path = os.path.join(output, export_file_path(url))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates 0600, unreadable by the web server user
+            os.replace(tmp_path, path)
+            manifest[url] = stamps[url]
+
+    # Pages that are no longer public (unpublished or deleted content)
+    removed = 0
+    for url in [url for url in manifest if url not in stamps]:
+        path = os.path.join(output, export_file_path(url))
+        if os.path.exists(path):
+            os.remove(path)
+        del manifest[url]
+        removed += 1
+
+    copied = copy_static_tree(app.static_folder, os.path.join(output, 'static'))
+    # Resized remote images; their file names never change, and the ?src= query is ignored
+    for url, error in warm_remote_images().items():
+        click.echo(f"  ! {url}: {error} (served through the app instead)")
+    remote_dir = os.path.join(output, 'remote-image')
+    os.makedirs(remote_dir, exist_ok=True)
+    os.makedirs(app.config['REMOTE_IMAGE_CACHE_DIR'], exist_ok=True)
+    for name in os.listdir(app.config['REMOTE_IMAGE_CACHE_DIR']):
+        if REMOTE_IMAGE_NAME.match(name) and not os.path.exists(os.path.join(remote_dir, name)):
+            shutil.copy2(os.path.join(app.config['REMOTE_IMAGE_CACHE_DIR'], name), remote_dir)
+            copied += 1
+    # Sitemap and feeds go where their URLs point, e.g. blog/feed.xml
+    rebuild_feeds()
+    with app.test_request_context():
+        for name, (endpoint, _) in FEED_FILES.items():
+            target = os.path.join(output, url_for(endpoint).lstrip('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(app.config['FEED_DIR'], name), target)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    click.echo(f"Rendered {len(pending) - failed}, removed {removed}, copied {copied} static file(s) to {output}")
+    if failed:
+        raise SystemExit(1)
+
 # Sample data
 services = [
     {
@@ -366,11 +3408,13 @@ team_members = [
 
 # Routes
 @app.route('/')
+@cached_page
 def home():
     settings = get_company_settings()
-    recent_posts = BlogPost.query.filter_by(published=True).order_by(BlogPost.created_at.desc()).limit(3).all()
-    featured_portfolio = PortfolioItem.query.filter(
-    PortfolioItem.status.in_(['investment-opportunity', 'completed'])).order_by(PortfolioItem.created_at.desc()).limit(4).all()
+    recent_posts = published_posts_query().limit(3).all()
+    featured_portfolio = public_portfolio_query().limit(4).all()
+    set_page_last_modified(*[post.updated_at for post in recent_posts],
+                           *[project.created_at for project in featured_portfolio])
     return render_template('enhanced/index.html', 
                          services=services[:4], 
                          settings=settings,
@@ -378,16 +3422,19 @@ def home():
                          featured_portfolio=featured_portfolio)
 
 @app.route('/services')
+@cached_page
 def services_page():
     settings = get_company_settings()
     return render_template('enhanced/services.html', services=services, settings=settings)
 
 @app.route('/team')
+@cached_page
 def team_page():
     settings = get_company_settings()
     return render_template('enhanced/team.html', team_members=team_members, settings=settings)
 
 @app.route('/about')
+@cached_page
 def about_page():
     settings = get_company_settings()
     return render_template('enhanced/about.html', settings=settings)
@@ -396,8 +3443,25 @@ def about_page():
 def contact_page():
     settings = get_company_settings()
     form = ContactForm()
+
+    # Spam and flood checks run before any database or mail work. Bots that
+    # fill the honeypot or resend a message get the normal success response.
+    if request.method == 'POST':
+        retry_after = rate_limited('contact_ip', request.remote_addr)
+        if retry_after:
+            return too_many_requests('enhanced/contact.html', retry_after, form=form, settings=settings)
+        if form.website.data:
+            spam_rejections.inc(form='contact', reason='honeypot')
+            return contact_received()
     
     if form.validate_on_submit():
+        retry_after = rate_limited('contact_email', form.email.data)
+        if retry_after:
+            return too_many_requests('enhanced/contact.html', retry_after, form=form, settings=settings)
+        if is_duplicate_message(form.email.data, form.message.data):
+            spam_rejections.inc(form='contact', reason='duplicate')
+            return contact_received()
+
         # Save to database
         submission = ContactSubmission(
             name=form.name.data,
@@ -407,66 +3471,86 @@ def contact_page():
             message=form.message.data
         )
         db.session.add(submission)
-        db.session.commit()
+        db.session.flush()
         
-        # Send email notification to admin
+        # Queue email notification to admin
         admin_email = settings.email
-        send_email(
+        queue_email(
             subject=f'New Contact Form Submission from {form.name.data}',
             recipient=admin_email,
             template='contact_notification.html',
             submission=submission
         )
         
-        # Send confirmation email to user
-        send_email(
+        # Queue confirmation email to user
+        queue_email(
             subject='Thank you for contacting Blackstone EG & Partners',
             recipient=form.email.data,
             template='contact_confirmation.html',
             name=form.name.data
         )
         
-        flash('Thank you for your interest! Our investment team will contact you within 24 hours.', 'success')
-        return redirect(url_for('contact_page'))
+        # Submission and emails commit together; delivery happens in the background
+        db.session.commit()
+        mail_queue_worker.notify()
+        return contact_received()
     
     return render_template('enhanced/contact.html', form=form, settings=settings)
 
+def contact_received():
+    flash('Thank you for your interest! Our investment team will contact you within 24 hours.', 'success')
+    return redirect(url_for('contact_page'))
+
 @app.route('/blog')
+@cached_page
 def blog_page():
     settings = get_company_settings()
+    per_page = BLOG_PAGE_SIZE
     page = request.args.get('page', 1, type=int)
-    posts = BlogPost.query.filter_by(published=True).order_by(BlogPost.created_at.desc()).paginate(
-        page=page, per_page=6, error_out=False
-    )
+    if page > 1:
+        # Legacy ?page=N links: one offset query, then continue with cursors
+        rows = published_posts_query().order_by(BlogPost.created_at.desc(), BlogPost.id.desc()) \
+            .offset((page - 1) * per_page).limit(per_page + 1).all()
+        items = rows[:per_page]
+        posts = KeysetPage(
+            items,
+            newer_cursor=encode_cursor(items[0]) if items else None,
+            older_cursor=encode_cursor(items[-1]) if len(rows) > per_page else None,
+            total=count_published_posts()
+        )
+    else:
+        posts = keyset_paginate(
+            published_posts_query().order_by(None), BlogPost, per_page,
+            older=decode_cursor(request.args.get('older')),
+            newer=decode_cursor(request.args.get('newer')),
+            total=count_published_posts()
+        )
+    set_page_last_modified(*[post.updated_at for post in posts.items])
     return render_template('enhanced/blog.html', posts=posts, settings=settings)
 
 @app.route('/blog/<slug>')
+@cached_page
 def blog_post(slug):
     settings = get_company_settings()
     post = BlogPost.query.filter_by(slug=slug, published=True).first_or_404()
-    related_posts = BlogPost.query.filter(
-        BlogPost.id != post.id,
-        BlogPost.published == True
-    ).order_by(BlogPost.created_at.desc()).limit(3).all()
+    related_posts = get_related('blog', post)
+    set_page_last_modified(post.updated_at)
     return render_template('enhanced/blog_post.html', post=post, related_posts=related_posts, settings=settings)
 
 @app.route('/portfolio')
+@cached_page
 def portfolio_page():
     settings = get_company_settings()
     category = request.args.get('category', 'all')
     
     if category == 'all':
-        projects = PortfolioItem.query.filter(
-            PortfolioItem.status.in_(['investment-opportunity', 'completed'])
-        ).order_by(PortfolioItem.created_at.desc()).all()
+        projects = public_portfolio_query().all()
     else:
-        projects = PortfolioItem.query.filter(
-            PortfolioItem.category == category,
-            PortfolioItem.status.in_(['investment-opportunity', 'completed'])
-        ).order_by(PortfolioItem.created_at.desc()).all()
+        projects = public_portfolio_query(category).all()
     
-    categories = db.session.query(PortfolioItem.category).distinct().all()
+    categories = portfolio_categories_query().all()
     categories = [cat[0] for cat in categories]
+    set_page_last_modified(*[project.updated_at or project.created_at for project in projects])
     
     return render_template('enhanced/portfolio.html', 
                          projects=projects, 
@@ -475,18 +3559,107 @@ def portfolio_page():
                          settings=settings)
 
 @app.route('/portfolio/<int:project_id>')
+@cached_page
 def portfolio_detail(project_id):
     settings = get_company_settings()
     project = PortfolioItem.query.get_or_404(project_id)
-    related_projects = PortfolioItem.query.filter(
-        PortfolioItem.id != project.id,
-        PortfolioItem.category == project.category
-    ).limit(3).all()
+    related_projects = get_related('portfolio', project)
+    gallery = gallery_page(project, 1)
+    set_page_last_modified(project.updated_at or project.created_at)
     return render_template('enhanced/portfolio_detail.html', 
                          project=project, 
                          related_projects=related_projects,
+                         gallery=gallery,
+                         portfolio_header_image=PORTFOLIO_HEADER_IMAGE,
                          settings=settings)
 
+@app.route('/api/portfolio/<int:project_id>/gallery')
+@cached_page
+def portfolio_gallery(project_id):
+    project = PortfolioItem.query.get_or_404(project_id)
+    page = max(request.args.get('page', 1, type=int), 1)
+    gallery = gallery_page(project, page)
+    return jsonify({
+        'page': page,
+        'total': gallery['total'],
+        'next_page': gallery['next_page'],
+        'next_url': url_for('portfolio_gallery', project_id=project.id, page=gallery['next_page']) if gallery['next_page'] else None,
+        'images': [gallery_image_json(project, image) for image in gallery['images']]
+    })
+
+@app.route('/sitemap.xml')
+def sitemap():
+    return serve_feed('sitemap.xml')
+
+@app.route('/blog/feed.xml')
+def blog_feed():
+    return serve_feed('blog-rss.xml')
+
+@app.route('/blog/atom.xml')
+def blog_atom_feed():
+    return serve_feed('blog-atom.xml')
+
+@app.route('/portfolio/feed.xml')
+def portfolio_feed():
+    return serve_feed('portfolio-rss.xml')
+
+@app.route('/portfolio/atom.xml')
+def portfolio_atom_feed():
+    return serve_feed('portfolio-atom.xml')
+
+@app.route('/remote-image/<name>')
+def remote_image_file(name):
+    match = REMOTE_IMAGE_NAME.match(name)
+    url = request.args.get('src', '')
+    if not match or int(match.group(2)) not in app.config['IMAGE_VARIANT_WIDTHS']:
+        abort(404)
+    key, width, ext = match.group(1), int(match.group(2)), match.group(3)
+
+    path = os.path.join(app.config['REMOTE_IMAGE_CACHE_DIR'], name)
+    if os.path.exists(path):
+        # Refresh the LRU timestamp now and then rather than on every hit
+        if time.time() - os.path.getmtime(path) > REMOTE_IMAGE_TOUCH_INTERVAL:
+            os.utime(path)
+    elif not hmac.compare_digest(key, remote_image_key(url)):
+        abort(404)
+    else:
+        try:
+            render_remote_image(url, key, width, ext)
+        except (OSError, ValueError) as e:
+            # Not cached; the original still works until the next attempt
+            print(f"Remote image failed for {url}: {e}")
+            return redirect(url)
+    response = send_from_directory(app.config['REMOTE_IMAGE_CACHE_DIR'], name,
+                                   mimetype=REMOTE_IMAGE_FORMATS[ext][1], max_age=app.config['ASSET_MAX_AGE'])
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/search')
+def search_page():
+    settings = get_company_settings()
+    query = request.args.get('q', '').strip()[:200]
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 10
+    hits = search_documents(query, limit=per_page + 1, offset=(page - 1) * per_page) if query else []
+    results = search_hit_urls(hits[:per_page])
+    return render_template('enhanced/search.html', query=query, results=results, page=page,
+                           has_next=len(hits) > per_page, settings=settings)
+
+@app.route('/api/search')
+def search_api():
+    query = request.args.get('q', '').strip()[:200]
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    hits = search_hit_urls(search_documents(query, limit=limit)) if query else []
+    return jsonify({
+        'query': query,
+        'results': [{
+            'kind': hit['kind'],
+            'title': hit['title'],
+            'url': hit['url'],
+            'snippet': str(hit['snippet'])
+        } for hit in hits]
+    })
+
 # Admin routes
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -494,7 +3667,19 @@ def admin_login():
         return redirect(url_for('admin.index'))
     
     form = LoginForm()
+    # Throttle before the password hash check, which is deliberately slow
+    if request.method == 'POST':
+        retry_after = rate_limited('login_ip', request.remote_addr)
+        if retry_after:
+            return too_many_requests('enhanced/admin_login.html', retry_after, form=form)
     if form.validate_on_submit():
+        if form.website.data:
+            spam_rejections.inc(form='login', reason='honeypot')
+            flash('Invalid username or password', 'error')
+            return render_template('enhanced/admin_login.html', form=form)
+        retry_after = rate_limited('login_user', form.username.data)
+        if retry_after:
+            return too_many_requests('enhanced/admin_login.html', retry_after, form=form)
         user = User.query.filter_by(username=form.username.data).first()
         if user and user.check_password(form.password.data) and user.is_admin:
             login_user(user)
@@ -516,18 +3701,64 @@ def contact_stats():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    total = ContactSubmission.query.count()
-    new = ContactSubmission.query.filter_by(status='new').count()
-    contacted = ContactSubmission.query.filter_by(status='contacted').count()
-    closed = ContactSubmission.query.filter_by(status='closed').count()
+    status_counts = get_contact_status_counts()
     
     return jsonify({
-        'total': total,
-        'new': new,
-        'contacted': contacted,
-        'closed': closed
+        'total': sum(status_counts.values()),
+        'new': status_counts.get('new', 0),
+        'contacted': status_counts.get('contacted', 0),
+        'closed': status_counts.get('closed', 0)
     })
 
+@app.route('/api/analytics/contact-series')
+@login_required
+def contact_series():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    interval = request.args.get('interval', 'day')
+    if interval not in ('day', 'week'):
+        return jsonify({'error': 'interval must be day or week'}), 400
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    
+    return jsonify({
+        'interval': interval,
+        'days': days,
+        'series': get_contact_series(interval, days)
+    })
+
+@app.route('/api/contacts/export')
+@login_required
+def contact_export_endpoint():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    format = request.args.get('format', 'csv')
+    if format not in CONTACT_EXPORT_FORMATS:
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    try:
+        since = parse_export_date(request.args.get('since'))
+        until = parse_export_date(request.args.get('until'))
+    except ValueError:
+        return jsonify({'error': 'since and until must be YYYY-MM-DD'}), 400
+    
+    chunks = contact_export(format, status=request.args.get('status'), service=request.args.get('service'),
+                            since=since, until=until)
+    filename = f"contacts-{datetime.utcnow():%Y%m%d}.{format}"
+    return app.response_class(stream_with_context(chunks), mimetype=CONTACT_EXPORT_FORMATS[format],
+                              headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    authorized = token and request.headers.get('Authorization') == f'Bearer {token}'
+    if not app.config['METRICS_ENABLED'] or not (authorized or (current_user.is_authenticated and current_user.is_admin)):
+        return jsonify({'error': 'Unauthorized'}), 403
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 # Context processors for templates
 @app.context_processor
 def inject_settings():
@@ -554,10 +3785,38 @@ def internal_error(error):
     return render_template('enhanced/500.html', settings=settings), 500
 
 # Initialize database and create admin user
+INITIAL_MIGRATION = '453c2dfbe1d3'  # schema as originally created by db.create_all()
+
+def init_migrations():
+    """Bind Flask-Migrate, importing Alembic only when it is needed"""
+    from flask_migrate import Migrate
+    if 'migrate' not in app.extensions:
+        Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'))
+
 def init_db():
     """Initialize database with sample data"""
+    from flask_migrate import upgrade as migrate_upgrade, stamp as migrate_stamp
+    init_migrations()
     with app.app_context():
-        db.create_all()
+        # Databases created by the old db.create_all() path have no migration
+        # history; adopt them at the initial revision before upgrading
+        tables = db.inspect(db.engine).get_table_names()
+        if 'alembic_version' not in tables and 'user' in tables:
+            migrate_stamp(revision=INITIAL_MIGRATION)
+        migrate_upgrade()
+
+        # Fill derived fields, the search index and related lookups for
+        # content that predates them. The backfill's flush indexes the posts
+        # it touches, so check for an empty index first
+        index_empty = not db.session.execute(db.text(f'SELECT count(*) FROM {search_index_table()}')).scalar()
+        for post in BlogPost.query.filter(BlogPost.word_count.is_(None)):
+            post.update_derived_fields()
+        db.session.commit()
+        if any(get_table_counts().values()):
+            if index_empty:
+                rebuild_search_index()
+            if not RelatedContent.query.first():
+                rebuild_related_content()
         
         # Create admin user if doesn't exist
         admin_user = User.query.filter_by(username='admin').first()
@@ -570,6 +3829,10 @@ def init_db():
             )
             admin_user.set_password(os.environ.get('ADMIN_PASSWORD'))
             db.session.add(admin_user)
+
+        # Create the settings row here so page renders never have to write it
+        if not CompanySettings.query.first():
+            db.session.add(default_company_settings())
         
         # REMOVED: Sample blog posts block
         # (No more hardcoded blogs—add via admin now!)
@@ -581,7 +3844,90 @@ def init_db():
         print("🔑 Admin login: username='admin', password='YOUR_SECURE_PASSWORD_HERE'")
         print("💡 Tip: Add blog posts via /admin > Blog Posts for real content!")
 
+@app.cli.command('init')
+def init_command():
+    """Migrate the database and create the admin user and settings (run once per deploy)"""
+    init_db()
+
+# Application factory
+def load_secret_key():
+    """Read the secret shared by every worker on this host, creating it once.
+
+    Multi-node deployments must set SECRET_KEY instead, so sessions signed on
+    one node are accepted by the others.
+    """
+    path = app.config['SECRET_KEY_FILE']
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            # link() fails if another worker got there first; both then read its key
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path) as f:
+        return f.read().strip()
+
+def database_engine_options(config):
+    """Pool settings for a server database; SQLite keeps SQLAlchemy's defaults"""
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,  # drop connections the server or a proxy closed while idle
+    }
+
+_create_app_lock = threading.Lock()
+
+def create_app(config=None):
+    """Configure the application and bind its extensions.
+
+    `config` overrides values read from the environment. The routes are
+    registered on the module-level `app`, so there is one application per
+    process: later calls return it unchanged, and raise if they pass a
+    configuration that could no longer take effect.
+    """
+    global page_cache, rate_limit_store, remote_image_fetcher
+    with _create_app_lock:
+        if app.created:
+            if config:
+                raise RuntimeError("create_app() has already configured this process's app; "
+                                   "pass the configuration to the first call")
+            return app
+        if 'sqlalchemy' in app.extensions:
+            raise RuntimeError("An earlier create_app() call failed part way; start a new process")
+
+        app.config.update(config or {})
+        if not app.config['SECRET_KEY']:
+            app.config['SECRET_KEY'] = load_secret_key()
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', database_engine_options(app.config))
+
+        db.init_app(app)
+        if click.get_current_context(silent=True) is not None:
+            init_migrations()  # the `flask db` commands look the extension up on the app
+        mail.init_app(app)
+        login_manager.init_app(app)
+        admin.init_app(app)
+        register_admin_views()
+        page_cache = make_page_cache()
+        rate_limit_store = make_rate_limit_store()
+        remote_image_fetcher = make_remote_image_fetcher()
+
+        proxies = app.config['PROXY_COUNT']
+        if proxies:
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+        app.created = True
+    return app
+
 if __name__ == '__main__':
+    create_app()
     init_db()
     print("🚀 Starting Enhanced Blackstone EG & Partners website...")
     print("📍 Website: http://localhost:5000")
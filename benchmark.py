@@ -0,0 +1,592 @@
+"""Benchmark the website against a seeded SQLite database.
+
+Seeds blog posts, portfolio items and contact submissions at the requested
+volumes, then drives every route through the Flask test client (latency and
+SQL statements per request) and through a local multi-process server under
+concurrent load (latency and throughput). Outgoing mail goes to an in-process
+SMTP sink. Startup (import, create_app and the first public and admin
+responses) is timed in fresh interpreters, as a new worker would see it.
+Results are written as JSON so runs can be compared:
+
+    python benchmark.py --posts 10000 --projects 5000 --contacts 500000 --output bench.json
+    python benchmark.py --reuse-db --output bench-new.json --compare bench.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = '''
+investment energy infrastructure africa equatorial guinea malabo bata market growth
+capital partners project development government relations strategy oil gas power
+solar agriculture cassava cocoa timber fisheries port logistics hospitality tourism
+real estate housing construction finance banking telecom technology manufacturing
+mining minerals esg governance compliance risk opportunity venture fund return yield
+export import trade regional partnership feasibility study analysis policy reform
+'''.split()
+CATEGORIES = ['energy', 'real-estate', 'manufacturing', 'technology', 'agriculture']
+LOCATIONS = ['Malabo', 'Bata', 'Ebebiyin', 'Mongomo', 'Luba']
+STATUSES = ['investment-opportunity', 'completed', 'ongoing', 'planned']
+CONTACT_STATUSES = ['new', 'contacted', 'closed']
+SERVICES = ['energy', 'real-estate', 'manufacturing', 'technology', 'other']
+TAGS = ['Energy', 'Oil & Gas', 'Agriculture', 'Real Estate', 'Policy', 'Finance', 'ESG', 'Technology']
+ADMIN_PASSWORD = 'benchmark'
+
+
+# SMTP sink
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Accepts any message and discards it"""
+
+    def handle(self):
+        self.wfile.write(b'220 benchmark SMTP sink\r\n')
+        receiving = False
+        for line in self.rfile:
+            if receiving:
+                if line.rstrip(b'\r\n') == b'.':
+                    receiving = False
+                    with self.server.lock:
+                        self.server.messages += 1
+                    self.wfile.write(b'250 OK\r\n')
+                continue
+            command = line[:4].upper()
+            if command == b'DATA':
+                receiving = True
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                break
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+# Environment and seeding
+def configure_environment(db_path, smtp_port, page_cache):
+    """Point the app at the benchmark database and SMTP sink; call before importing it"""
+    os.environ.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.abspath(db_path),
+        'SECRET_KEY': 'benchmark',
+        'ADMIN_PASSWORD': ADMIN_PASSWORD,
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(smtp_port),
+        'MAIL_USE_TLS': 'false',
+        'MAIL_TRANSPORT': 'smtp',
+        'PAGE_CACHE_TYPE': page_cache,
+        'METRICS_ENABLED': 'true',
+        'RATE_LIMIT_ENABLED': 'false',  # every scenario posts from 127.0.0.1
+    })
+    for name in ('MAIL_USERNAME', 'MAIL_PASSWORD'):
+        os.environ.pop(name, None)
+
+def load_site():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app_enhanced as site
+    site.create_app({'WTF_CSRF_ENABLED': False})
+    return site
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def insert_rows(site, table, rows, chunk=20000):
+    for start in range(0, len(rows), chunk):
+        site.db.session.execute(table.insert(), rows[start:start + chunk])
+
+def seed_database(site, volumes, seed):
+    """Create the schema and bulk-insert content at the requested volumes.
+
+    Rows are inserted with Core executemany, so derived columns, the search
+    index and the related-content table are filled here directly rather than
+    by the ORM hooks.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with site.app.app_context():
+        site.init_db()
+        db = site.db
+
+        tag_rows = [{'id': i + 1, 'name': name, 'slug': site.tag_slug(name)} for i, name in enumerate(TAGS)]
+        insert_rows(site, site.Tag.__table__, tag_rows)
+
+        posts, post_tags = [], []
+        for i in range(1, volumes['posts'] + 1):
+            paragraphs = [sentence(rng, rng.randint(40, 120)) for _ in range(rng.randint(3, 12))]
+            text = ' '.join(paragraphs)
+            tags = rng.sample(range(len(TAGS)), rng.randint(1, 3))
+            created = now - timedelta(minutes=i * 37)
+            posts.append({
+                'id': i, 'title': sentence(rng, 6)[:-1], 'slug': f'post-{i}',
+                'content': ''.join(f'<p>{p}</p>' for p in paragraphs), 'content_html': ''.join(f'<p>{p}</p>' for p in paragraphs),
+                'summary': site.truncate_text(text, site.SUMMARY_LENGTH), 'word_count': len(text.split()),
+                'reading_time': max(1, math.ceil(len(text.split()) / site.READING_WORDS_PER_MINUTE)),
+                'author': 'Benchmark', 'featured_image': 'uploads/logo.jpg', 'published': rng.random() < 0.9,
+                'created_at': created, 'updated_at': created, 'tags': ', '.join(TAGS[t] for t in tags),
+            })
+            post_tags.extend({'blog_post_id': i, 'tag_id': t + 1} for t in tags)
+        insert_rows(site, site.BlogPost.__table__, posts)
+        insert_rows(site, site.blog_post_tags, post_tags)
+
+        projects, images = [], []
+        for i in range(1, volumes['projects'] + 1):
+            created = now - timedelta(hours=i * 3)
+            projects.append({
+                'id': i, 'title': sentence(rng, 4)[:-1], 'description': sentence(rng, rng.randint(30, 90)),
+                'category': rng.choice(CATEGORIES), 'client': f'Client {rng.randint(1, 200)}',
+                'value': f'${rng.randint(1, 500)}M', 'location': rng.choice(LOCATIONS),
+                'status': rng.choice(STATUSES), 'featured_image': 'uploads/logo.jpg',
+                'created_at': created, 'updated_at': created,
+            })
+            images.extend({'portfolio_item_id': i, 'path': 'uploads/logo.jpg', 'position': p}
+                          for p in range(rng.randint(0, 12)))
+        insert_rows(site, site.PortfolioItem.__table__, projects)
+        insert_rows(site, site.PortfolioImage.__table__, images)
+
+        contacts = []
+        for i in range(1, volumes['contacts'] + 1):
+            contacts.append({
+                'id': i, 'name': f'Contact {i}', 'email': f'contact{i}@example.org', 'phone': '+240 555 000 000',
+                'service': rng.choice(SERVICES), 'message': sentence(rng, rng.randint(10, 60)),
+                'status': rng.choice(CONTACT_STATUSES), 'created_at': now - timedelta(seconds=i * 90),
+            })
+            if len(contacts) == 50000:
+                insert_rows(site, site.ContactSubmission.__table__, contacts)
+                contacts = []
+        insert_rows(site, site.ContactSubmission.__table__, contacts)
+
+        # Search index, built set-wise (the ORM listener is bypassed by bulk inserts)
+        kinds = site.SEARCH_KINDS
+        db.session.execute(db.text(
+            "INSERT INTO search_index (rowid, kind, ref_id, public, title, body) "
+            f"SELECT id * 4 + {kinds['blog']}, 'blog', id, published, title, "
+            "replace(replace(content, '<p>', ' '), '</p>', ' ') || ' ' || tags FROM blog_post"))
+        public = ', '.join(f"'{status}'" for status in site.PUBLIC_PORTFOLIO_STATUSES)
+        db.session.execute(db.text(
+            "INSERT INTO search_index (rowid, kind, ref_id, public, title, body) "
+            f"SELECT id * 4 + {kinds['portfolio']}, 'portfolio', id, status IN ({public}), title, "
+            "description || ' ' || category || ' ' || client || ' ' || location FROM portfolio_item"))
+        db.session.execute(db.text(
+            "INSERT INTO search_index (rowid, kind, ref_id, public, title, body) "
+            f"SELECT id * 4 + {kinds['contact']}, 'contact', id, 0, name, "
+            "email || ' ' || message || ' ' || service FROM contact_submission"))
+
+        # Related content: computing TF-IDF over every pair is an offline job,
+        # so seed plausible neighbours (same first tag / same category)
+        related = []
+        by_tag = {}
+        for post in posts:
+            if post['published']:
+                by_tag.setdefault(post['tags'].split(',')[0], []).append(post['id'])
+        for post in posts:
+            candidates = by_tag.get(post['tags'].split(',')[0], [])
+            ids = [c for c in rng.sample(candidates, min(4, len(candidates))) if c != post['id']][:3]
+            related.append({'kind': 'blog', 'ref_id': post['id'], 'related_ids': ','.join(map(str, ids)), 'computed_at': now})
+        by_category = {}
+        for project in projects:
+            if project['status'] in site.PUBLIC_PORTFOLIO_STATUSES:
+                by_category.setdefault(project['category'], []).append(project['id'])
+        for project in projects:
+            candidates = by_category.get(project['category'], [])
+            ids = [c for c in rng.sample(candidates, min(4, len(candidates))) if c != project['id']][:3]
+            related.append({'kind': 'portfolio', 'ref_id': project['id'], 'related_ids': ','.join(map(str, ids)), 'computed_at': now})
+        insert_rows(site, site.RelatedContent.__table__, related)
+
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+
+
+# Scenarios
+def build_scenarios(site, rng, samples=200):
+    """(name, method, url factory, form data, needs admin) for every route"""
+    with site.app.app_context():
+        slugs = [slug for (slug,) in site.db.session.query(site.BlogPost.slug)
+                 .filter_by(published=True).order_by(site.db.func.random()).limit(samples)]
+        project_ids = [i for (i,) in site.db.session.query(site.PortfolioItem.id)
+                       .filter(site.PortfolioItem.status.in_(site.PUBLIC_PORTFOLIO_STATUSES))
+                       .order_by(site.db.func.random()).limit(samples)]
+        gallery_ids = [i for (i,) in site.db.session.query(site.PortfolioImage.portfolio_item_id)
+                       .group_by(site.PortfolioImage.portfolio_item_id)
+                       .having(site.db.func.count() > site.GALLERY_PAGE_SIZE).limit(samples)] or [1]
+        posts = site.published_posts_query().order_by(site.BlogPost.created_at.desc(), site.BlogPost.id.desc())
+        total = site.count_published_posts()
+        cursors = [site.encode_cursor(post) for post in posts.offset(total // 2).limit(samples)] or ['']
+
+    def pick(values, build):
+        return lambda: build(rng.choice(values or [None]))
+
+    def query(path, **params):
+        return f'{path}?{urlencode(params)}'
+
+    contact_form = {
+        'name': 'Benchmark Visitor', 'email': 'visitor@example.org', 'phone': '+240 555 000 000',
+        'service': 'energy', 'message': 'I would like to discuss an investment opportunity.',
+    }
+    return [
+        ('home', 'GET', lambda: '/', None, False),
+        ('services', 'GET', lambda: '/services', None, False),
+        ('team', 'GET', lambda: '/team', None, False),
+        ('about', 'GET', lambda: '/about', None, False),
+        ('contact form', 'GET', lambda: '/contact', None, False),
+        ('contact submit', 'POST', lambda: '/contact', contact_form, False),
+        ('blog', 'GET', lambda: '/blog', None, False),
+        ('blog older page', 'GET', pick(cursors, lambda c: query('/blog', older=c)), None, False),
+        ('blog legacy page', 'GET', lambda: query('/blog', page=rng.randint(2, 50)), None, False),
+        ('blog post', 'GET', pick(slugs, lambda slug: f'/blog/{slug}'), None, False),
+        ('portfolio', 'GET', lambda: '/portfolio', None, False),
+        ('portfolio category', 'GET', lambda: query('/portfolio', category=rng.choice(CATEGORIES)), None, False),
+        ('portfolio detail', 'GET', pick(project_ids, lambda i: f'/portfolio/{i}'), None, False),
+        ('portfolio gallery', 'GET', pick(gallery_ids, lambda i: f'/api/portfolio/{i}/gallery?page=2'), None, False),
+        ('search', 'GET', lambda: query('/search', q=rng.choice(WORDS)), None, False),
+        ('search api', 'GET', lambda: query('/api/search', q=rng.choice(WORDS)[:4]), None, False),
+        ('admin dashboard', 'GET', lambda: '/admin/', None, True),
+        ('admin contacts', 'GET', lambda: '/admin/contactsubmission/', None, True),
+        ('admin contact search', 'GET', lambda: query('/admin/contactsubmission/', search=rng.choice(WORDS)), None, True),
+        ('admin blog posts', 'GET', lambda: '/admin/blogpost/', None, True),
+        ('admin portfolio', 'GET', lambda: '/admin/portfolioitem/', None, True),
+        ('contact stats', 'GET', lambda: '/api/analytics/contact-stats', None, True),
+        ('contact series', 'GET', lambda: '/api/analytics/contact-series?interval=week&days=180', None, True),
+        ('metrics', 'GET', lambda: '/metrics', None, True),
+    ]
+
+
+# Measurement
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+def summarize(latencies, statuses, elapsed=None, queries=None):
+    result = {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'statuses': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+    if elapsed:
+        result['throughput_rps'] = round(len(latencies) / elapsed, 1)
+    if queries is not None:
+        result['queries_mean'] = round(sum(queries) / len(queries), 2)
+        result['queries_max'] = max(queries)
+    return result
+
+def run_test_client(site, scenarios, requests_per_route, warmup):
+    """Sequential requests through the test client, counting SQL per request"""
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    site.db.event.listen(site.Engine, 'before_cursor_execute', count)
+    public = site.app.test_client()
+    admin = site.app.test_client()
+    admin.post('/admin/login', data={'username': 'admin', 'password': ADMIN_PASSWORD})
+
+    results = {}
+    try:
+        for name, method, url, data, needs_admin in scenarios:
+            client = admin if needs_admin else public
+            latencies, statuses, queries = [], [], []
+            for i in range(warmup + requests_per_route):
+                target = url()
+                before = statements[0]
+                started = time.perf_counter()
+                response = client.open(target, method=method, data=data)
+                response.get_data()
+                elapsed = time.perf_counter() - started
+                if i >= warmup:
+                    latencies.append(elapsed)
+                    statuses.append(response.status_code)
+                    queries.append(statements[0] - before)
+            results[name] = summarize(latencies, statuses, queries=queries)
+            print(f"  {name:22} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms"
+                  f"  {results[name]['queries_mean']:6.1f} queries  {results[name]['statuses']}")
+
+        # Drain the queued contact emails into the SMTP sink
+        with site.app.app_context():
+            pending = site.OutboundEmail.query.filter_by(status='pending').count()
+            started = time.perf_counter()
+            while site.process_mail_queue():
+                pass
+            elapsed = time.perf_counter() - started
+        results['mail queue drain'] = {'emails': pending, 'seconds': round(elapsed, 3),
+                                       'emails_per_second': round(pending / elapsed, 1) if elapsed else None}
+        print(f"  {'mail queue drain':22} {pending} email(s) in {elapsed:.2f} s")
+    finally:
+        site.db.event.remove(site.Engine, 'before_cursor_execute', count)
+    return results
+
+STARTUP_STEPS = ['import', 'create_app', 'first response', 'time to first response', 'first admin response']
+
+def startup_probe():
+    """Time one cold start and print it as JSON (run in a fresh interpreter, see run_startup)"""
+    timings = {}
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app_enhanced as site
+    timings['import'] = time.perf_counter() - started
+    mark = time.perf_counter()
+    site.create_app({'WTF_CSRF_ENABLED': False})
+    timings['create_app'] = time.perf_counter() - mark
+    client = site.app.test_client()
+    mark = time.perf_counter()
+    client.get('/').get_data()
+    timings['first response'] = time.perf_counter() - mark
+    timings['time to first response'] = time.perf_counter() - started
+    client.post('/admin/login', data={'username': 'admin', 'password': ADMIN_PASSWORD})
+    mark = time.perf_counter()
+    client.get('/admin/contactsubmission/').get_data()
+    timings['first admin response'] = time.perf_counter() - mark
+    print(json.dumps(timings))
+
+def run_startup(runs):
+    """Cold starts in separate interpreters; bytecode is already cached by the first one"""
+    samples = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--startup-probe'], env=os.environ.copy(),
+                                capture_output=True, text=True, check=True).stdout
+        for step, seconds in json.loads(output.strip().splitlines()[-1]).items():
+            samples.setdefault(step, []).append(seconds)
+
+    results = {}
+    for step in STARTUP_STEPS:
+        values = samples[step]
+        results[step] = {
+            'runs': len(values),
+            'p50_ms': round(percentile(values, 50) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'max_ms': round(max(values) * 1000, 3),
+        }
+        print(f"  {step:22} p50 {results[step]['p50_ms']:8.2f} ms  p95 {results[step]['p95_ms']:8.2f} ms")
+    return results
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(workers, port):
+    """Start `workers` processes serving the app on one shared listening socket"""
+    listener = socket.socket()
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', port))
+    listener.listen(256)
+    processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve-fd', str(listener.fileno())],
+                         pass_fds=[listener.fileno()], env=os.environ.copy())
+        for _ in range(workers)
+    ]
+    listener.close()
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if http_request(port, 'GET', '/about')[0] == 200:
+                return processes
+        except OSError:
+            time.sleep(0.2)
+    stop_server(processes)
+    raise RuntimeError('Benchmark server did not start')
+
+def stop_server(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait(timeout=10)
+
+def serve(fd):
+    """Worker process entry point (see start_server)"""
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    site = load_site()
+    sock = socket.socket(fileno=fd)
+    host, port = sock.getsockname()
+    sock.detach()
+    make_server(host, port, site.app, threaded=True, fd=fd).serve_forever()
+
+def http_request(port, method, path, data=None, cookie=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Accept-Encoding': 'gzip, br'}
+    body = None
+    if cookie:
+        headers['Cookie'] = cookie
+    if data is not None:
+        body = urlencode(data)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.getheader('Set-Cookie')
+    finally:
+        connection.close()
+
+def run_server_load(scenarios, port, requests_per_route, concurrency):
+    """Concurrent requests against the multi-process server"""
+    status, set_cookie = http_request(port, 'POST', '/admin/login',
+                                      {'username': 'admin', 'password': ADMIN_PASSWORD})
+    cookie = set_cookie.split(';', 1)[0] if set_cookie else None
+
+    results = {}
+    for name, method, url, data, needs_admin in scenarios:
+        def one(_):
+            started = time.perf_counter()
+            code = http_request(port, method, url(), data, cookie if needs_admin else None)[0]
+            return time.perf_counter() - started, code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(concurrency)))  # warm every worker
+            started = time.perf_counter()
+            samples = list(executor.map(one, range(requests_per_route)))
+            elapsed = time.perf_counter() - started
+        results[name] = summarize([s[0] for s in samples], [s[1] for s in samples], elapsed=elapsed)
+        print(f"  {name:22} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms"
+              f"  {results[name]['throughput_rps']:8.1f} req/s  {results[name]['statuses']}")
+    return results
+
+def compare(previous, current):
+    """Print p95 changes per route against an earlier results file"""
+    print(f"\nComparison with {previous['meta'].get('timestamp')} ({previous['meta'].get('commit') or 'unknown commit'})")
+    for phase in ('startup', 'test_client', 'server'):
+        for name, result in current.get(phase, {}).items():
+            before = previous.get(phase, {}).get(name)
+            if not before or 'p95_ms' not in result or 'p95_ms' not in before:
+                continue
+            ratio = result['p95_ms'] / before['p95_ms'] if before['p95_ms'] else float('inf')
+            flag = '  REGRESSION' if ratio > 1.2 else ('  improved' if ratio < 0.8 else '')
+            print(f"  {phase:11} {name:22} p95 {before['p95_ms']:8.2f} -> {result['p95_ms']:8.2f} ms ({ratio:5.2f}x){flag}")
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=5000)
+    parser.add_argument('--contacts', type=int, default=500000)
+    parser.add_argument('--db', default=os.path.join(ROOT, 'instance', 'benchmark.db'))
+    parser.add_argument('--reuse-db', action='store_true', help='Keep an existing database seeded with the same volumes.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for content and request order.')
+    parser.add_argument('--requests', type=int, default=50, help='Measured test-client requests per route.')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured test-client requests per route.')
+    parser.add_argument('--server-requests', type=int, default=200, help='Server requests per route (0 to skip).')
+    parser.add_argument('--workers', type=int, default=4, help='Server processes.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent server clients.')
+    parser.add_argument('--startup-runs', type=int, default=10, help='Cold starts to time (0 to skip).')
+    parser.add_argument('--page-cache', default='memory', choices=['memory', 'filesystem', 'null'])
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    parser.add_argument('--serve-fd', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--startup-probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_fd is not None:
+        return serve(args.serve_fd)
+    if args.startup_probe:
+        return startup_probe()
+
+    volumes = {'posts': args.posts, 'projects': args.projects, 'contacts': args.contacts}
+    sink = SMTPSink().start()
+    configure_environment(args.db, sink.server_address[1], args.page_cache)
+    os.environ['MAIL_QUEUE_WORKER'] = 'false'  # the test-client phase drains the queue explicitly
+
+    volumes_file = args.db + '.json'
+    reuse = args.reuse_db and os.path.exists(args.db) and os.path.exists(volumes_file) \
+        and json.load(open(volumes_file)) == volumes
+    seed_seconds = None
+    if not reuse:
+        for path in (args.db, volumes_file):
+            if os.path.exists(path):
+                os.remove(path)
+        os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    site = load_site()
+    if not reuse:
+        print(f"Seeding {args.db}: {volumes}")
+        started = time.perf_counter()
+        seed_database(site, volumes, args.seed)
+        seed_seconds = round(time.perf_counter() - started, 1)
+        with open(volumes_file, 'w') as f:
+            json.dump(volumes, f)
+        print(f"Seeded in {seed_seconds} s")
+
+    rng = random.Random(args.seed)
+    scenarios = build_scenarios(site, rng)
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'volumes': volumes,
+            'seed_seconds': seed_seconds,
+            'options': {k: v for k, v in vars(args).items() if k not in ('serve_fd', 'startup_probe', 'compare')},
+        },
+    }
+
+    if args.startup_runs:
+        print(f"\nStartup ({args.startup_runs} cold starts)")
+        results['startup'] = run_startup(args.startup_runs)
+
+    print(f"\nTest client ({args.requests} requests per route)")
+    results['test_client'] = run_test_client(site, scenarios, args.requests, args.warmup)
+
+    if args.server_requests:
+        if not hasattr(os, 'fork'):
+            print("\nSkipping the server phase: it needs a POSIX system")
+        else:
+            os.environ['MAIL_QUEUE_WORKER'] = 'true'
+            port = free_port()
+            print(f"\nServer ({args.workers} processes, {args.concurrency} concurrent clients, "
+                  f"{args.server_requests} requests per route)")
+            processes = start_server(args.workers, port)
+            try:
+                results['server'] = run_server_load(scenarios, port, args.server_requests, args.concurrency)
+            finally:
+                stop_server(processes)
+    results['meta']['smtp_messages'] = sink.messages
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+if __name__ == '__main__':
+    main()
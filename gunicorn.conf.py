@@ -0,0 +1,28 @@
+"""Gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Every worker holds its own connection pool, so the database must accept
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per node.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))  # keep <= DB_POOL_SIZE
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 2000  # restart workers periodically to bound memory growth
+max_requests_jitter = 200
+preload_app = True  # import the app once; workers share its memory copy-on-write
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    # Never share pooled connections opened in the master with a forked worker
+    from app_enhanced import app, db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
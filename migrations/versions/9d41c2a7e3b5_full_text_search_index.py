@@ -0,0 +1,49 @@
+"""full text search index
+
+Revision ID: 9d41c2a7e3b5
+Revises: 487ec7f562e2
+Create Date: 2026-10-17 18:02:41.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41c2a7e3b5'
+down_revision = '487ec7f562e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Not expressible with the models: FTS5 on SQLite, tsvector + GIN on Postgres.
+    # The rows are filled by `flask search-reindex` (init_db runs it after upgrading).
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            CREATE TABLE search_document (
+                kind VARCHAR(20) NOT NULL,
+                ref_id INTEGER NOT NULL,
+                public BOOLEAN NOT NULL DEFAULT false,
+                title TEXT NOT NULL,
+                body TEXT NOT NULL,
+                tsv tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', title), 'A') ||
+                    setweight(to_tsvector('english', body), 'B')
+                ) STORED,
+                PRIMARY KEY (kind, ref_id)
+            )""")
+        op.execute("CREATE INDEX ix_search_document_tsv ON search_document USING gin (tsv)")
+    else:
+        op.execute("""
+            CREATE VIRTUAL TABLE search_index USING fts5(
+                kind UNINDEXED, ref_id UNINDEXED, public UNINDEXED, title, body,
+                tokenize = 'porter unicode61', prefix = '2 3'
+            )""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TABLE search_document")
+    else:
+        op.execute("DROP TABLE search_index")
@@ -0,0 +1,43 @@
+"""index search kind and visibility
+
+Revision ID: c3f8a1d92e60
+Revises: 6b571dd8244c
+Create Date: 2026-10-17 18:20:07.114385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d92e60'
+down_revision = '6b571dd8244c'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_search_index(indexed):
+    # FTS5 tables cannot be altered; copy the rows into a table with the new column options
+    options = 'kind, ref_id UNINDEXED, public' if indexed else 'kind UNINDEXED, ref_id UNINDEXED, public UNINDEXED'
+    op.execute("ALTER TABLE search_index RENAME TO search_index_old")
+    op.execute(f"""
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            {options}, title, body,
+            tokenize = 'porter unicode61', prefix = '2 3'
+        )""")
+    op.execute("""
+        INSERT INTO search_index (rowid, kind, ref_id, public, title, body)
+        SELECT rowid, kind, ref_id, public, title, body FROM search_index_old""")
+    op.execute("DROP TABLE search_index_old")
+
+
+def upgrade():
+    # SQLite only: make kind and public filterable inside the FTS5 MATCH, so
+    # public searches never rank contact submissions
+    if op.get_bind().dialect.name != 'postgresql':
+        _rebuild_search_index(indexed=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        _rebuild_search_index(indexed=False)
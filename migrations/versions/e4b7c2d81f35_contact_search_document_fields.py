@@ -0,0 +1,40 @@
+"""contact search document fields
+
+Revision ID: e4b7c2d81f35
+Revises: c3f8a1d92e60
+Create Date: 2026-10-17 21:14:52.306118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c2d81f35'
+down_revision = 'c3f8a1d92e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Contact documents keep only what admin search matches (name, email,
+    # message); drop the service and internal notes copied there before.
+    # Only existing rows are rewritten: an empty index is filled by init_db.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            UPDATE search_document SET body = concat_ws(' ', NULLIF(c.email, ''), NULLIF(c.message, ''))
+            FROM contact_submission AS c
+            WHERE search_document.kind = 'contact' AND search_document.ref_id = c.id""")
+    else:
+        op.execute("""
+            UPDATE search_index SET body = (
+                SELECT trim(coalesce(c.email, '') || ' ' || coalesce(c.message, ''))
+                FROM contact_submission AS c WHERE c.id = search_index.ref_id)
+            WHERE kind = 'contact'""")
+        # Merge the FTS5 segments so the removed terms are not left on disk
+        op.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def downgrade():
+    # Nothing to restore: `flask search-reindex` rebuilds the documents from the models
+    pass
@@ -0,0 +1,166 @@
+import io
+import os
+import shutil
+import tempfile
+import uuid
+
+import pytest
+from PIL import Image
+
+# app_enhanced reads its configuration from the environment at import, so
+# point everything it writes at a scratch directory before importing it
+INSTANCE_DIR = tempfile.mkdtemp(prefix='blackstone-tests-')
+ADMIN_PASSWORD = 'test-admin-password'
+
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(INSTANCE_DIR, 'site.db')}",
+    'SECRET_KEY': 'test-secret-key',
+    'ADMIN_PASSWORD': ADMIN_PASSWORD,
+    'MAIL_TRANSPORT': 'file',
+    'MAIL_FILE_DIR': os.path.join(INSTANCE_DIR, 'outbox'),
+    'MAIL_QUEUE_WORKER': 'false',
+    'RELATED_UPDATE_WORKER': 'false',
+    'RATE_LIMIT_ENABLED': 'false',
+    'PAGE_CACHE_STAMP': os.path.join(INSTANCE_DIR, 'page_cache.stamp'),
+    'PAGE_CACHE_DIR': os.path.join(INSTANCE_DIR, 'page_cache'),
+    'FEED_DIR': os.path.join(INSTANCE_DIR, 'feeds'),
+    'EXPORT_DIR': os.path.join(INSTANCE_DIR, 'export'),
+    'PROFILE_DIR': os.path.join(INSTANCE_DIR, 'profiles'),
+    'IMAGE_MANIFEST': os.path.join(INSTANCE_DIR, 'image_manifest.json'),
+    'IMAGE_ORIGINALS_DIR': os.path.join(INSTANCE_DIR, 'image_originals'),
+    'REMOTE_IMAGE_CACHE_DIR': os.path.join(INSTANCE_DIR, 'remote_images'),
+    'REMOTE_IMAGE_FETCHER': 'file',
+    'REMOTE_IMAGE_FIXTURE_DIR': os.path.join(INSTANCE_DIR, 'remote_fixtures'),
+    'RATE_LIMIT_DB': os.path.join(INSTANCE_DIR, 'rate_limits.db'),
+})
+
+import app_enhanced  # noqa: E402
+from app_enhanced import (  # noqa: E402
+    BlogPost, ContactSubmission, OutboundEmail, PortfolioImage, PortfolioItem,
+    RelatedContent, Tag, blog_post_tags, create_app, db, init_db, invalidate_company_settings,
+    invalidate_page_cache, search_index_table,
+)
+
+
+@pytest.fixture(scope='session')
+def app():
+    # One application per process: every test shares this configuration
+    flask_app = create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False})
+    init_db()
+    yield flask_app
+    shutil.rmtree(INSTANCE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _reset_content(request):
+    """Start every test that uses the app with no content and empty caches"""
+    if 'app' not in request.fixturenames:
+        yield
+        return
+    flask_app = request.getfixturevalue('app')
+    yield
+    with flask_app.app_context():
+        db.session.execute(blog_post_tags.delete())
+        for model in (PortfolioImage, RelatedContent, BlogPost, Tag, PortfolioItem, ContactSubmission, OutboundEmail):
+            db.session.query(model).delete()
+        db.session.execute(db.text(f'DELETE FROM {search_index_table()}'))
+        db.session.commit()
+        invalidate_company_settings()
+        invalidate_page_cache()
+        app_enhanced._analytics_cache.clear()
+
+
+@pytest.fixture
+def sql_statements(app):
+    """List that collects every SQL statement run while the test executes"""
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    db.event.listen(engine, 'before_cursor_execute', record)
+    yield statements
+    db.event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    response = client.post('/admin/login', data={'username': 'admin', 'password': ADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def app_ctx(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def make_post(app):
+    """Create a published blog post (inside an app context) and return it"""
+    counter = iter(range(1, 10000))
+
+    def make(**fields):
+        number = next(counter)
+        fields.setdefault('title', f'Post {number}')
+        fields.setdefault('slug', f'post-{number}')
+        fields.setdefault('content', f'<p>Body of post {number}.</p>')
+        fields.setdefault('author', 'Editor')
+        fields.setdefault('published', True)
+        post = BlogPost(**fields)
+        db.session.add(post)
+        db.session.commit()
+        return post
+    return make
+
+
+@pytest.fixture
+def make_project(app):
+    """Create a public portfolio item (inside an app context) and return it"""
+    counter = iter(range(1, 10000))
+
+    def make(**fields):
+        number = next(counter)
+        fields.setdefault('title', f'Project {number}')
+        fields.setdefault('description', f'Description of project {number}.')
+        fields.setdefault('category', 'energy')
+        fields.setdefault('status', 'completed')
+        project = PortfolioItem(**fields)
+        db.session.add(project)
+        db.session.commit()
+        return project
+    return make
+
+
+
+@pytest.fixture
+def static_dir(app):
+    """A throwaway folder under static/uploads; yields its static path, e.g. 'uploads/tests-1a2b'"""
+    path = f'uploads/tests-{uuid.uuid4().hex[:8]}'
+    os.makedirs(os.path.join(app.static_folder, path))
+    yield path
+    shutil.rmtree(os.path.join(app.static_folder, path), ignore_errors=True)
+    shutil.rmtree(os.path.join(app.config['IMAGE_ORIGINALS_DIR'], path), ignore_errors=True)
+
+
+@pytest.fixture
+def make_jpeg():
+    """Encode a noisy JPEG (optionally with camera and GPS EXIF) and return its bytes"""
+    def make(width=1200, height=800, gps=False):
+        img = Image.effect_noise((width, height), 40).convert('RGB')
+        exif = Image.Exif()
+        if gps:
+            exif[0x010F] = 'Camera Maker'
+            exif[0x8825] = {1: 'N', 2: (3.0, 45.0, 0.0)}
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=95, exif=exif.tobytes())
+        return buffer.getvalue()
+    return make
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app_enhanced import CompanySettings, ContactSubmission, User, db
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_VIEWS = ['contactsubmission', 'blogpost', 'portfolioitem', 'user', 'companysettings']
+
+
+@pytest.fixture
+def rows(app, make_post, make_project):
+    """The id of one row per admin view"""
+    with app.app_context():
+        contact = ContactSubmission(name='Ada', email='ada@example.com', message='Interested in solar')
+        db.session.add(contact)
+        db.session.commit()
+        return {
+            'contactsubmission': contact.id,
+            'blogpost': make_post(tags='Energy').id,
+            'portfolioitem': make_project().id,
+            'user': User.query.filter_by(username='admin').one().id,
+            'companysettings': CompanySettings.query.first().id,
+        }
+
+
+@pytest.mark.parametrize('view', ADMIN_VIEWS)
+def test_list_create_and_edit_views_load(admin_client, rows, view):
+    for path in ['', 'new/', f'edit/?id={rows[view]}', '?search=solar']:
+        response = admin_client.get(f'/admin/{view}/{path}')
+        assert response.status_code == 200, f'/admin/{view}/{path}'
+
+
+@pytest.mark.parametrize('view', ADMIN_VIEWS)
+def test_views_need_an_admin(client, view):
+    response = client.get(f'/admin/{view}/')
+    assert response.status_code == 302
+    assert '/admin/login' in response.headers['Location']
+
+
+def test_blog_edit_saves_through_the_admin(app, admin_client, rows):
+    response = admin_client.post(f"/admin/blogpost/edit/?id={rows['blogpost']}", data={
+        'title': 'Edited in the admin', 'slug': 'edited', 'content': '<p>New body</p>', 'author': 'Editor',
+        'published': 'y',
+    })
+    assert response.status_code == 302
+    assert 'Edited in the admin' in admin_client.get('/blog/edited').get_data(as_text=True)
+
+
+def test_a_cold_process_serves_every_admin_view(tmp_path):
+    # The views are built by create_app(), so the first admin request of a new
+    # worker must find them in place
+    source = textwrap.dedent(f"""
+        import app_enhanced
+        assert not app_enhanced.admin._views[1:], 'admin views built at import'
+        app = app_enhanced.create_app({{'WTF_CSRF_ENABLED': False}})
+        app_enhanced.init_db()
+        client = app.test_client()
+        client.post('/admin/login', data={{'username': 'admin', 'password': 'cold-start'}})
+        for view in {ADMIN_VIEWS!r}:
+            print(view, client.get(f'/admin/{{view}}/').status_code, client.get(f'/admin/{{view}}/new/').status_code)
+    """)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'cold.db'}", ADMIN_PASSWORD='cold-start')
+    result = subprocess.run([sys.executable, '-c', source], cwd=REPO_DIR, env=env, capture_output=True, text=True,
+                            timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.splitlines()[-len(ADMIN_VIEWS):] == [f'{view} 200 200' for view in ADMIN_VIEWS]
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app_enhanced import ContactSubmission, db
+
+
+@pytest.fixture
+def contacts(app):
+    now = datetime.utcnow()
+    with app.app_context():
+        for status, service, age in [('new', 'energy', 0), ('new', 'energy', 0), (None, 'other', 1),
+                                     ('contacted', 'energy', 1), ('closed', None, 9), ('closed', 'energy', 40)]:
+            db.session.add(ContactSubmission(name='N', email='n@example.com', message='Hello there',
+                                             status=status, service=service, created_at=now - timedelta(days=age)))
+        db.session.commit()
+
+
+def contact_queries(statements):
+    return [s for s in statements if 'contact_submission' in s]
+
+
+def test_contact_stats_come_from_one_grouped_query(admin_client, contacts, sql_statements):
+    response = admin_client.get('/api/analytics/contact-stats')
+    assert response.get_json() == {'total': 6, 'new': 3, 'contacted': 1, 'closed': 2}
+    queries = contact_queries(sql_statements)
+    assert len(queries) == 1 and 'GROUP BY' in queries[0]
+
+
+def test_contact_stats_are_cached(admin_client, contacts, sql_statements):
+    admin_client.get('/api/analytics/contact-stats')
+    del sql_statements[:]
+    admin_client.get('/api/analytics/contact-stats')
+    assert contact_queries(sql_statements) == []
+
+
+@pytest.mark.parametrize('interval', ['day', 'week'])
+def test_contact_series_buckets_by_period_and_service(admin_client, contacts, interval):
+    data = admin_client.get(f'/api/analytics/contact-series?interval={interval}&days=30').get_json()
+    assert data['interval'] == interval and data['days'] == 30
+    assert sum(row['count'] for row in data['series']) == 5  # the 40-day-old row is outside the window
+    assert {row['service'] for row in data['series']} == {'energy', 'other'}
+    for row in data['series']:
+        period = datetime.strptime(row['period'], '%Y-%m-%d')
+        if interval == 'week':
+            assert period.weekday() == 0
+
+
+def test_contact_series_rejects_unknown_intervals(admin_client):
+    assert admin_client.get('/api/analytics/contact-series?interval=hour').status_code == 400
+
+
+def test_analytics_require_an_admin(client):
+    response = client.get('/api/analytics/contact-stats')
+    assert response.status_code == 302
+    assert response.headers['Location'].startswith('/admin/login')
@@ -0,0 +1,63 @@
+import gzip
+import os
+
+import pytest
+from flask import url_for
+
+from app_enhanced import build_assets, minify_css, minify_js
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('a {\n  color: red ;\n}', 'a{color:red}'),
+    ('/* header */ body , p > a { margin: 0 auto; }', 'body,p>a{margin:0 auto}'),
+    ('@media (max-width: 768px) { .nav { display: none; } }', '@media (max-width:768px){.nav{display:none}}'),
+    # Whitespace before ':' in a selector means "any descendant"
+    ('a :hover { color: red }', 'a :hover{color:red}'),
+    ('p::before { content: "a  /* b */ , c ;}"; }', 'p::before{content:"a  /* b */ , c ;}"}'),
+    ("a { font-family: 'Open  Sans', serif; }", "a{font-family:'Open  Sans',serif}"),
+    ('a { background: url( "x y.png" ) no-repeat; }', 'a{background:url( "x y.png" ) no-repeat}'),
+    ("a { background: url(data:image/svg+xml;utf8,<svg a='1'>  </svg>); }",
+     "a{background:url(data:image/svg+xml;utf8,<svg a='1'>  </svg>)}"),
+])
+def test_minify_css(source, expected):
+    assert minify_css(source) == expected
+
+
+def test_minify_js_keeps_line_breaks_and_strings():
+    source = '// setup\nvar a = 1\n  /* block\n comment */\n  var b = "  // not a comment"\n'
+    assert minify_js(source) == 'var a = 1\nvar b = "  // not a comment"\n'
+
+
+@pytest.fixture
+def built_assets(app, monkeypatch, static_dir):
+    """Build a small stylesheet into a scratch dist folder"""
+    os.makedirs(os.path.join(app.static_folder, static_dir, 'css'))
+    with open(os.path.join(app.static_folder, static_dir, 'css', 'site.css'), 'w') as f:
+        f.write('body {\n    color: #333;\n}\n' * 50)
+    monkeypatch.setitem(app.config, 'ASSET_DIRS', [f'{static_dir}/css'])
+    monkeypatch.setitem(app.config, 'ASSET_BUILD_DIR', f'{static_dir}/dist')
+    build_assets()
+    return f'{static_dir}/css/site.css'
+
+
+def test_url_for_points_at_the_fingerprinted_build(app, built_assets):
+    with app.test_request_context():
+        url = url_for('static', filename=built_assets)
+    assert url.startswith(f"/static/{app.config['ASSET_BUILD_DIR']}/")
+    assert url.endswith('.css') and url != f'/static/{built_assets}'
+
+
+def test_built_assets_are_immutable_and_precompressed(app, client, built_assets):
+    with app.test_request_context():
+        url = url_for('static', filename=built_assets)
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()).startswith(b'body{color:#333}')
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data().startswith(b'body{color:#333}')
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmark import percentile, summarize
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_percentile_interpolates_between_samples():
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile([1, 2, 3, 4, 5], 95) == pytest.approx(4.8)
+    assert percentile([], 95) is None
+
+
+def test_summarize_counts_statuses_and_queries():
+    result = summarize([0.001, 0.003], [200, 302], elapsed=0.5, queries=[1, 3])
+    assert result['statuses'] == {'200': 1, '302': 1}
+    assert (result['throughput_rps'], result['queries_mean'], result['queries_max']) == (4.0, 2.0, 3)
+
+
+def test_small_run_drives_every_route(tmp_path):
+    output = tmp_path / 'results.json'
+    args = ['--posts', '20', '--projects', '10', '--contacts', '50', '--db', str(tmp_path / 'bench.db'),
+            '--requests', '2', '--warmup', '1', '--server-requests', '0', '--startup-runs', '0']
+    run = subprocess.run([sys.executable, 'benchmark.py', *args, '--output', str(output)],
+                         cwd=REPO_DIR, capture_output=True, text=True, timeout=300)
+    assert run.returncode == 0, run.stdout + run.stderr
+    routes = json.loads(output.read_text())['test_client']
+    assert {'home', 'portfolio gallery', 'admin contacts', 'contact form'} <= routes.keys()
+    failing = {name: result['statuses'] for name, result in routes.items()
+               if 'statuses' in result and any(int(code) >= 400 for code in result['statuses'])}
+    assert failing == {}
+
+    rerun = subprocess.run([sys.executable, 'benchmark.py', *args, '--reuse-db', '--output', str(tmp_path / 'again.json'),
+                            '--compare', str(output)], cwd=REPO_DIR, capture_output=True, text=True, timeout=300)
+    assert rerun.returncode == 0, rerun.stdout + rerun.stderr
+    assert 'Seeding' not in rerun.stdout and 'Comparison with' in rerun.stdout
@@ -0,0 +1,62 @@
+import pytest
+
+from app_enhanced import READING_WORDS_PER_MINUTE, SUMMARY_LENGTH, Tag, db, is_safe_url, sanitize_html
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('<p onclick="x()">Hi <b>there</b></p>', '<p>Hi <b>there</b></p>'),
+    ('<script>alert(1)</script><p>ok</p>', '<p>ok</p>'),
+    ('<a href="javascript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="/blog" target="_blank">x</a>', '<a href="/blog" target="_blank">x</a>'),
+    ('<custom>text</custom>', 'text'),
+    ('<img src="x.jpg" onerror="y()">', '<img src="x.jpg">'),
+    ('1 < 2 & 3', '1 &lt; 2 &amp; 3'),
+])
+def test_sanitize_html(source, expected):
+    assert sanitize_html(source) == expected
+
+
+@pytest.mark.parametrize('url', ['java\tscript:alert(1)', ' javascript:x', 'JAVASCRIPT:x', 'data:text/html,x'])
+def test_unsafe_urls_are_rejected(url):
+    assert not is_safe_url(url)
+
+
+@pytest.mark.parametrize('url', ['/blog', 'https://example.com', 'mailto:a@example.com', 'page?a=b:c'])
+def test_safe_urls_are_kept(url):
+    assert is_safe_url(url)
+
+
+def test_fields_are_derived_on_save(app_ctx, make_post):
+    words = ' '.join(['word'] * (READING_WORDS_PER_MINUTE + 1))
+    post = make_post(content=f'<p>{words}</p><script>steal()</script>', tags='Solar, energy ,solar,, ')
+    assert post.content_html == f'<p>{words}</p>'
+    assert post.word_count == READING_WORDS_PER_MINUTE + 1
+    assert post.reading_time == 2
+    assert len(post.summary) <= SUMMARY_LENGTH and post.summary.endswith('…')
+    assert {(tag.name, tag.slug) for tag in post.tag_list} == {('Solar', 'solar'), ('energy', 'energy')}
+
+
+def test_excerpt_wins_over_the_content_summary(app_ctx, make_post):
+    assert make_post(excerpt='  Short intro  ').summary == 'Short intro'
+    assert make_post(content='<p>Tiny</p>').reading_time == 1
+
+
+def test_edits_recompute_fields_and_share_tags(app_ctx, make_post):
+    first = make_post(tags='solar')
+    second = make_post(tags='Solar, wind')
+    assert Tag.query.count() == 2
+    assert first.tag_list[0] is second.tag_list[0]
+
+    first.content = '<p>Three short words</p>'
+    first.tags = 'wind'
+    db.session.commit()
+    assert (first.word_count, first.summary) == (3, 'Three short words')
+    assert [tag.slug for tag in first.tag_list] == ['wind']
+
+
+def test_post_page_renders_the_sanitized_body(client, app, make_post):
+    with app.app_context():
+        make_post(slug='safe', content='<p>Visible</p><script>hidden()</script>')
+    html = client.get('/blog/safe').get_data(as_text=True)
+    assert '<p>Visible</p>' in html and 'hidden()' not in html
+    assert '1 min read' in html
@@ -0,0 +1,59 @@
+import gzip
+
+import pytest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# brotli is optional; without it only gzip is offered
+ENCODINGS = ['gzip'] + (['br'] if brotli else [])
+DECOMPRESS = {'gzip': gzip.decompress, 'br': brotli and brotli.decompress}
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_html_is_compressed_with_a_suffixed_etag(client, encoding):
+    identity = client.get('/blog', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/blog', headers={'Accept-Encoding': encoding})
+
+    assert compressed.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert DECOMPRESS[encoding](compressed.get_data()) == identity.get_data()
+    assert compressed.headers['ETag'] == identity.headers['ETag'][:-1] + f'-{encoding}"'
+    assert int(compressed.headers['Content-Length']) == len(compressed.get_data())
+
+
+def test_uncompressed_response_keeps_the_plain_etag(client):
+    response = client.get('/blog', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert not response.headers['ETag'].endswith('-gzip"')
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_revalidating_a_compressed_etag_returns_304_with_the_same_tag(client, encoding):
+    etag = client.get('/blog', headers={'Accept-Encoding': encoding}).headers['ETag']
+    response = client.get('/blog', headers={'Accept-Encoding': encoding, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.get_data() == b''
+
+
+def test_responses_without_an_etag_get_one(client):
+    first = client.get('/api/search?q=solar')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    second = client.get('/api/search?q=solar', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+
+def test_small_responses_are_not_compressed(app, client):
+    response = client.get('/api/search?q=solar', headers={'Accept-Encoding': 'gzip'})
+    assert len(response.get_data()) < app.config['COMPRESS_MIN_SIZE']
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_head_requests_pass_through(client):
+    response = client.head('/blog', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
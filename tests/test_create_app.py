@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import app_enhanced
+from app_enhanced import create_app, database_engine_options, load_secret_key
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def python(source, **env):
+    """Run a snippet in a fresh interpreter (app_enhanced configures one app per process)"""
+    result = subprocess.run([sys.executable, '-c', textwrap.dedent(source)], cwd=REPO_DIR,
+                            env=dict(os.environ, **env), capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_later_calls_return_the_same_app(app):
+    assert create_app() is app
+    assert app.config['TESTING'] is True
+
+
+def test_later_calls_with_a_config_raise(app):
+    with pytest.raises(RuntimeError, match='already configured'):
+        create_app({'TESTING': False})
+    assert app.config['TESTING'] is True
+
+
+def test_config_overrides_the_environment():
+    out = python("""
+        import app_enhanced
+        app = app_enhanced.create_app({'PAGE_CACHE_TYPE': 'null', 'SECRET_KEY': 'from-config'})
+        print(type(app_enhanced.page_cache).__name__, app.config['SECRET_KEY'])
+    """, PAGE_CACHE_TYPE='memory', SECRET_KEY='from-env')
+    assert out.split() == ['NullPageCache', 'from-config']
+
+
+def test_unconfigured_app_refuses_to_serve():
+    out = python("""
+        from app_enhanced import app
+        for use in (lambda: app.test_client().get('/'), app.app_context):
+            try:
+                use()
+            except RuntimeError as e:
+                print('refused:', 'create_app()' in str(e))
+    """)
+    assert out.split() == ['refused:', 'True', 'refused:', 'True']
+
+
+def test_a_failed_first_call_poisons_the_process():
+    out = python("""
+        from app_enhanced import create_app
+        for config in ({'PAGE_CACHE_TYPE': 'bogus'}, {'PAGE_CACHE_TYPE': 'memory'}, None):
+            try:
+                create_app(config)
+            except (ValueError, RuntimeError) as e:
+                print(type(e).__name__, e)
+    """)
+    lines = out.strip().split('\n')
+    assert lines[0] == 'ValueError Unknown PAGE_CACHE_TYPE: bogus'
+    assert lines[1:] == ['RuntimeError An earlier create_app() call failed part way; start a new process'] * 2
+
+
+def test_secret_key_file_is_created_once(app, tmp_path, monkeypatch):
+    path = tmp_path / 'keys' / 'secret_key'
+    monkeypatch.setitem(app.config, 'SECRET_KEY_FILE', str(path))
+    key = load_secret_key()
+    assert len(key) == 64 and path.read_text() == key
+    assert load_secret_key() == key
+    assert os.listdir(path.parent) == ['secret_key']
+
+
+def test_only_server_databases_get_pool_options():
+    config = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///x.db'}
+    assert database_engine_options(config) == {}
+    config = {'SQLALCHEMY_DATABASE_URI': 'postgresql://db/site', 'DB_POOL_SIZE': 4, 'DB_MAX_OVERFLOW': 2,
+              'DB_POOL_TIMEOUT': 10, 'DB_POOL_RECYCLE': 300}
+    assert database_engine_options(config) == {'pool_size': 4, 'max_overflow': 2, 'pool_timeout': 10,
+                                               'pool_recycle': 300, 'pool_pre_ping': True}
+
+
+def test_admin_views_are_registered_by_create_app(app):
+    endpoints = {view.endpoint for view in app_enhanced.admin._views}
+    assert {'contactsubmission', 'blogpost', 'portfolioitem', 'user', 'companysettings'} <= endpoints
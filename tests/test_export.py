@@ -0,0 +1,81 @@
+import json
+import os
+import re
+
+import pytest
+
+from app_enhanced import BlogPost, db, invalidate_page_cache
+
+
+@pytest.fixture
+def export(app, tmp_path):
+    """Run `flask export` into a scratch directory and return the counts it reports"""
+    def run(*args):
+        result = app.test_cli_runner().invoke(args=['export', '--output', str(tmp_path), '--workers', '2', *args])
+        assert result.exit_code == 0, result.output
+        total, unchanged, pending = map(int, re.search(r'(\d+) page\(s\), (\d+) unchanged, (\d+) to render',
+                                                       result.output).groups())
+        rendered, removed = map(int, re.search(r'Rendered (\d+), removed (\d+)', result.output).groups())
+        return {'total': total, 'unchanged': unchanged, 'rendered': rendered, 'removed': removed}
+    return run
+
+
+def read(tmp_path, *parts):
+    with open(os.path.join(tmp_path, *parts), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_pages_static_files_and_feeds_are_written(app, tmp_path, export, make_post, make_project):
+    with app.app_context():
+        make_post(title='Exported post', slug='exported')
+        project_id = make_project(title='Exported project').id
+    counts = export()
+    assert counts['rendered'] == counts['total'] and counts['removed'] == 0
+    assert 'Exported post' in read(tmp_path, 'blog', 'exported', 'index.html')
+    assert 'Exported project' in read(tmp_path, 'portfolio', str(project_id), 'index.html')
+    assert 'Exported post' in read(tmp_path, 'index.html')
+    assert os.path.exists(os.path.join(tmp_path, 'portfolio', 'index@category=energy.html'))
+    assert os.path.exists(os.path.join(tmp_path, 'static', 'favicon.ico'))
+    assert 'blog/exported' in read(tmp_path, 'sitemap.xml')
+    assert 'Exported post' in read(tmp_path, 'blog', 'feed.xml')
+
+
+def test_second_run_renders_nothing(app, export, make_post):
+    with app.app_context():
+        make_post()
+    first = export()
+    assert export() == dict(first, unchanged=first['total'], rendered=0)
+
+
+def test_an_edit_re_renders_the_page_and_listings_only(app, tmp_path, export, make_post):
+    with app.app_context():
+        post_id = make_post(title='Before', slug='edited').id
+        make_post()
+    first = export()
+    with app.app_context():
+        db.session.get(BlogPost, post_id).title = 'After'
+        db.session.commit()
+        invalidate_page_cache()  # as the admin views do after a save
+    second = export()
+    assert 0 < second['rendered'] < first['total']
+    assert 'After' in read(tmp_path, 'blog', 'edited', 'index.html')
+
+
+def test_unpublished_pages_are_removed(app, tmp_path, export, make_post):
+    with app.app_context():
+        post_id = make_post(slug='withdrawn').id
+    export()
+    with app.app_context():
+        db.session.get(BlogPost, post_id).published = False
+        db.session.commit()
+        invalidate_page_cache()
+    assert export()['removed'] == 1
+    assert not os.path.exists(os.path.join(tmp_path, 'blog', 'withdrawn', 'index.html'))
+    assert '/blog/withdrawn' not in json.loads(read(tmp_path, '.export-manifest.json'))
+
+
+def test_force_re_renders_every_page(app, export, make_post):
+    with app.app_context():
+        make_post()
+    first = export()
+    assert export('--force')['rendered'] == first['total']
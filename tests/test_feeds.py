@@ -0,0 +1,85 @@
+import os
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+import pytest
+
+from app_enhanced import FEED_FILES, BlogPost, db, invalidate_page_cache
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def feed_mtime_ns(app, name):
+    return os.stat(os.path.join(app.config['FEED_DIR'], name)).st_mtime_ns
+
+
+@pytest.fixture
+def published(app, make_post, make_project):
+    with app.app_context():
+        make_post(title='Solar & storage', slug='solar', tags='Energy')
+        make_post(title='Draft', slug='draft', published=False)
+        make_project(title='Harbour works')
+        make_project(title='Future tower', status='planned')
+    invalidate_page_cache()  # as the admin views do after a save
+
+
+@pytest.mark.parametrize('url, name', [
+    ('/sitemap.xml', 'sitemap.xml'), ('/blog/feed.xml', 'blog-rss.xml'), ('/blog/atom.xml', 'blog-atom.xml'),
+    ('/portfolio/feed.xml', 'portfolio-rss.xml'), ('/portfolio/atom.xml', 'portfolio-atom.xml'),
+])
+def test_every_feed_is_served_as_xml(client, published, url, name):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == FEED_FILES[name][1]
+    ET.fromstring(response.get_data())
+
+
+def test_feeds_list_public_content_only(client, app, published):
+    rss = ET.fromstring(client.get('/blog/feed.xml').get_data())
+    assert [item.findtext('title') for item in rss.iter('item')] == ['Solar & storage']
+    assert [c.text for c in rss.iter('category')] == ['Energy']
+    atom = ET.fromstring(client.get('/portfolio/atom.xml').get_data())
+    assert [entry.findtext(f'{ATOM}title') for entry in atom.iter(f'{ATOM}entry')] == ['Harbour works']
+    locations = [loc.text for loc in ET.fromstring(client.get('/sitemap.xml').get_data()).iter(f'{SITEMAP}loc')]
+    base = app.config['EXPORT_BASE_URL']
+    assert f'{base}/blog/solar' in locations and f'{base}/blog/draft' not in locations
+
+
+def test_files_are_rebuilt_only_after_a_content_change(client, app, make_post, published):
+    client.get('/blog/feed.xml')
+    built = feed_mtime_ns(app, 'blog-rss.xml')
+    client.get('/blog/feed.xml')
+    assert feed_mtime_ns(app, 'blog-rss.xml') == built
+
+    with app.app_context():
+        make_post(title='Wind farms', slug='wind')
+    # Saved outside the admin, so nothing has told the site yet
+    assert b'Wind farms' not in client.get('/blog/feed.xml').get_data()
+    invalidate_page_cache()
+    assert b'Wind farms' in client.get('/blog/feed.xml').get_data()
+    assert feed_mtime_ns(app, 'blog-rss.xml') == os.stat(app.config['PAGE_CACHE_STAMP']).st_mtime_ns
+
+
+def test_last_modified_is_the_content_change_and_revalidates(client, app, published):
+    response = client.get('/blog/atom.xml')
+    stamp = os.stat(app.config['PAGE_CACHE_STAMP']).st_mtime
+    assert parsedate_to_datetime(response.headers['Last-Modified']).timestamp() == int(stamp)
+    again = client.get('/blog/atom.xml', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert again.status_code == 304
+
+
+def test_feeds_build_command_writes_every_file(app, published):
+    result = app.test_cli_runner().invoke(args=['feeds-build'])
+    assert result.exit_code == 0, result.output
+    for name in FEED_FILES:
+        assert os.path.join(app.config['FEED_DIR'], name) in result.output
+
+
+def test_unpublishing_removes_the_post_from_the_feed(client, app, published):
+    assert b'Solar &amp; storage' in client.get('/blog/feed.xml').get_data()
+    with app.app_context():
+        BlogPost.query.filter_by(slug='solar').one().published = False
+        db.session.commit()
+    invalidate_page_cache()
+    assert b'Solar' not in client.get('/blog/feed.xml').get_data()
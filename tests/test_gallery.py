@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from app_enhanced import GALLERY_PAGE_SIZE, PortfolioImage, db, gallery_page, update_gallery_image
+
+IMAGE_COUNT = GALLERY_PAGE_SIZE * 2 + 2
+
+
+@pytest.fixture
+def project(app_ctx, make_project):
+    """A project whose gallery spans three pages, added out of display order"""
+    project = make_project(title='Harbour')
+    project.images = [PortfolioImage(path=f'uploads/portfolio/{i:02d}.jpg', position=IMAGE_COUNT - i)
+                      for i in range(IMAGE_COUNT)]
+    db.session.commit()
+    return project
+
+
+def paths(images):
+    return [image['src'].rsplit('/', 1)[1] for image in images]
+
+
+def test_pages_follow_the_display_order(project):
+    first, last = gallery_page(project, 1), gallery_page(project, 3)
+    assert [image.position for image in first['images']] == list(range(1, GALLERY_PAGE_SIZE + 1))
+    assert (first['total'], first['next_page']) == (IMAGE_COUNT, 2)
+    assert (len(last['images']), last['next_page']) == (2, None)
+
+
+def test_single_short_page_skips_the_count(app_ctx, make_project, sql_statements):
+    project = make_project(images=[PortfolioImage(path='uploads/portfolio/a.jpg')])
+    sql_statements.clear()
+    assert gallery_page(project, 1)['total'] == 1
+    assert not [s for s in sql_statements if 'count(' in s.lower()]
+
+
+def test_api_walks_every_page(client, project):
+    seen, url = [], f'/api/portfolio/{project.id}/gallery'
+    while url:
+        data = client.get(url).get_json()
+        assert data['total'] == IMAGE_COUNT
+        seen += paths(data['images'])
+        url = data['next_url']
+    assert seen == [f'{i:02d}.jpg' for i in reversed(range(IMAGE_COUNT))]
+
+
+def test_detail_page_renders_the_first_page_only(client, project):
+    html = client.get(f'/portfolio/{project.id}').get_data(as_text=True)
+    assert html.count('class="gallery-item"') == GALLERY_PAGE_SIZE
+    assert f'Show More Photos ({IMAGE_COUNT - GALLERY_PAGE_SIZE})' in html
+    assert f'/api/portfolio/{project.id}/gallery?page=2' in html
+
+
+def test_unknown_project_is_404(client):
+    assert client.get('/api/portfolio/999999/gallery').status_code == 404
+
+
+def test_deleting_a_project_removes_its_images(project):
+    db.session.delete(project)
+    db.session.commit()
+    assert PortfolioImage.query.count() == 0
+
+
+def test_processed_images_record_their_size(app, app_ctx, make_project, static_dir, make_jpeg, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMAGE_MAX_WIDTH', 500)
+    monkeypatch.setitem(app.config, 'IMAGE_VARIANT_WIDTHS', [160])
+    with open(os.path.join(app.static_folder, static_dir, 'wide.jpg'), 'wb') as f:
+        f.write(make_jpeg(600, 300))
+    image = PortfolioImage(path=f'{static_dir}/wide.jpg')
+    make_project(images=[image])
+    update_gallery_image(image)
+    assert (image.width, image.height) == (500, 250)
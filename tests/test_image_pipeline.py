@@ -0,0 +1,87 @@
+import glob
+import io
+import os
+import uuid
+
+import pytest
+from PIL import Image
+
+from app_enhanced import BlogPost, get_image_variants, image_original_path, optimize_image
+
+
+@pytest.fixture
+def small_limits(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMAGE_MAX_WIDTH', 500)
+    monkeypatch.setitem(app.config, 'IMAGE_VARIANT_WIDTHS', [160, 320])
+
+
+def write_static(app, path, data):
+    with open(os.path.join(app.static_folder, path), 'wb') as f:
+        f.write(data)
+
+
+def read_static(app, path):
+    with open(os.path.join(app.static_folder, path), 'rb') as f:
+        return f.read()
+
+
+def test_original_is_kept_and_served_copy_is_stripped_and_capped(app, app_ctx, small_limits, static_dir, make_jpeg):
+    path = f'{static_dir}/photo.jpg'
+    upload = make_jpeg(700, 350, gps=True)
+    write_static(app, path, upload)
+
+    info = optimize_image(path)
+
+    with open(image_original_path(path), 'rb') as f:
+        assert f.read() == upload
+    with Image.open(os.path.join(app.static_folder, path)) as served:
+        assert served.size == (500, 250)
+        assert not served.getexif()
+    assert (info['width'], info['height']) == (500, 250)
+
+
+def test_variants_cover_each_smaller_width_and_webp(app, app_ctx, small_limits, static_dir, make_jpeg):
+    path = f'{static_dir}/photo.jpg'
+    write_static(app, path, make_jpeg(700, 350))
+    info = optimize_image(path)
+
+    variants = {(v['width'], v['type']): v['src'] for v in info['variants']}
+    assert variants[(500, 'image/jpeg')] == path
+    for width in (160, 320):
+        for mime_type in ('image/jpeg', 'image/webp'):
+            src = variants[(width, mime_type)]
+            with Image.open(os.path.join(app.static_folder, src)) as variant:
+                assert variant.width == width
+            assert len(read_static(app, src)) < len(read_static(app, path))
+
+
+def test_reprocessing_starts_from_the_original(app, app_ctx, small_limits, static_dir, make_jpeg):
+    path = f'{static_dir}/photo.jpg'
+    write_static(app, path, make_jpeg(700, 350, gps=True))
+    optimize_image(path)
+    first = read_static(app, path)
+    for _ in range(3):
+        optimize_image(path)
+    assert read_static(app, path) == first
+
+
+def test_admin_upload_records_variants_for_srcset(app, admin_client, small_limits, make_jpeg):
+    name = f'upload-{uuid.uuid4().hex[:8]}'
+    try:
+        response = admin_client.post('/admin/blogpost/new/', content_type='multipart/form-data', data={
+            'title': 'Post With Photo', 'slug': 'post-with-photo', 'content': '<p>Text</p>',
+            'author': 'Editor', 'published': 'y',
+            'image_upload': (io.BytesIO(make_jpeg(700, 350, gps=True)), f'{name}.jpg'),
+        })
+        assert response.status_code == 302
+        with app.app_context():
+            post = BlogPost.query.filter_by(slug='post-with-photo').one()
+            info = get_image_variants(post)[post.featured_image]
+            assert info['width'] == 500
+            assert os.path.isfile(image_original_path(post.featured_image))
+        page = admin_client.get('/blog/post-with-photo').get_data(as_text=True)
+        assert 'type="image/webp"' in page
+        assert '-160w.jpg 160w' in page
+    finally:
+        for leftover in glob.glob(os.path.join(app.static_folder, 'uploads', 'blog', f'{name}_*')):
+            os.remove(leftover)
@@ -0,0 +1,89 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from app_enhanced import (
+    BLOG_PAGE_SIZE, BlogPost, ContactSubmission, db, decode_cursor, encode_cursor, keyset_paginate,
+    published_posts_query,
+)
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def posts(app, make_post):
+    """2.5 pages of posts, newest first; pairs share a timestamp so the id breaks ties"""
+    with app.app_context():
+        created = [make_post(title=f'Numbered {i:02d}', created_at=START - timedelta(hours=i // 2))
+                   for i in range(BLOG_PAGE_SIZE * 2 + BLOG_PAGE_SIZE // 2)]
+        return [post.title for post in sorted(created, key=lambda p: (p.created_at, p.id), reverse=True)]
+
+
+def titles(html):
+    return re.findall(r'Numbered \d\d', html)
+
+
+def test_cursor_round_trip(app_ctx, make_post):
+    post = make_post(created_at=datetime(2026, 3, 4, 5, 6, 7, 890))
+    assert decode_cursor(encode_cursor(post)) == (post.created_at, post.id)
+
+
+@pytest.mark.parametrize('value', [None, '', 'garbage', '2026-01-01T00:00:00', '2026-01-01T00:00:00_x',
+                                   'not-a-date_5', '_5', "2026-01-01T00:00:00_1 OR 1=1"])
+def test_tampered_cursors_are_rejected(value):
+    assert decode_cursor(value) is None
+
+
+def test_pages_cover_every_post_once(app_ctx, posts):
+    seen, older = [], None
+    while True:
+        page = keyset_paginate(published_posts_query().order_by(None), BlogPost, BLOG_PAGE_SIZE,
+                               older=decode_cursor(older))
+        seen += [post.title for post in page.items]
+        if not page.has_older:
+            break
+        older = page.older_cursor
+    assert seen == posts
+
+
+def test_newer_cursor_returns_the_previous_page(app_ctx, posts):
+    query = published_posts_query().order_by(None)
+    first = keyset_paginate(query, BlogPost, BLOG_PAGE_SIZE)
+    second = keyset_paginate(query, BlogPost, BLOG_PAGE_SIZE, older=decode_cursor(first.older_cursor))
+    back = keyset_paginate(query, BlogPost, BLOG_PAGE_SIZE, newer=decode_cursor(second.newer_cursor))
+    assert [p.id for p in back.items] == [p.id for p in first.items]
+    assert not back.has_newer and back.has_older
+
+
+def test_blog_links_walk_all_pages(client, posts):
+    seen, url = [], '/blog'
+    while url:
+        html = client.get(url).get_data(as_text=True)
+        seen += titles(html)
+        match = re.search(r'href="([^"]+)" class="pagination-btn" rel="next"', html)
+        url = match.group(1).replace('&amp;', '&') if match else None
+    assert seen == posts
+
+
+def test_legacy_page_numbers_match_cursor_pages(client, posts):
+    assert titles(client.get('/blog?page=2').get_data(as_text=True)) == posts[BLOG_PAGE_SIZE:BLOG_PAGE_SIZE * 2]
+
+
+def test_blog_ignores_a_tampered_cursor(client, posts):
+    response = client.get('/blog?older=2026-01-01_DROP')
+    assert response.status_code == 200
+    assert titles(response.get_data(as_text=True)) == posts[:BLOG_PAGE_SIZE]
+
+
+def test_admin_contact_list_pages_with_cursors(app, admin_client):
+    with app.app_context():
+        for i in range(25):
+            db.session.add(ContactSubmission(name=f'Contact {i:02d}', email='c@example.com', message='Hello there',
+                                             created_at=START - timedelta(minutes=i)))
+        db.session.commit()
+    first = admin_client.get('/admin/contactsubmission/?page_size=20').get_data(as_text=True)
+    assert 'Contact 00' in first and 'Contact 20' not in first
+    older = re.search(r'href="([^"]*older=[^"]+)"', first).group(1).replace('&amp;', '&')
+    second = admin_client.get(older).get_data(as_text=True)
+    assert 'Contact 20' in second and 'Contact 24' in second and 'Contact 00' not in second
@@ -0,0 +1,107 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import app_enhanced
+from app_enhanced import OutboundEmail, claim_queued_emails, db, process_mail_queue, queue_email
+
+CONTACT_FORM = {
+    'name': 'Ada Investor',
+    'email': 'ada@example.com',
+    'phone': '',
+    'service': 'energy',
+    'message': 'I would like to hear about solar projects.',
+}
+
+
+class BrokenConnection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def send(self, message):
+        raise OSError('relay refused')
+
+
+def add_email(**fields):
+    email = queue_email('Subject', fields.pop('recipient', 'someone@example.com'),
+                        'contact_confirmation.html', name='Someone')
+    for name, value in fields.items():
+        setattr(email, name, value)
+    db.session.commit()
+    return email
+
+
+def test_contact_form_queues_both_emails_without_sending(client, app):
+    response = client.post('/contact', data=CONTACT_FORM)
+    assert response.status_code == 302
+    with app.app_context():
+        notification, confirmation = OutboundEmail.query.order_by(OutboundEmail.id).all()
+        assert 'Ada Investor' in notification.subject
+        assert confirmation.recipient == 'ada@example.com'
+        assert notification.status == confirmation.status == 'pending'
+
+
+def test_queue_sends_over_the_configured_transport(app, app_ctx):
+    email = add_email(recipient='reader@example.com')
+    assert process_mail_queue() == 1
+    db.session.refresh(email)
+    assert email.status == 'sent' and email.sent_at and email.attempts == 0
+    outbox = app.config['MAIL_FILE_DIR']
+    assert any('reader@example.com' in open(os.path.join(outbox, name)).read() for name in os.listdir(outbox))
+
+
+def test_claimed_emails_are_leased_to_one_worker(app, app_ctx):
+    add_email()
+    claimed = claim_queued_emails(10)
+    assert len(claimed) == 1
+    lease = claimed[0].next_attempt_at - datetime.utcnow()
+    assert timedelta(seconds=app.config['MAIL_QUEUE_LEASE'] - 5) < lease <= timedelta(seconds=app.config['MAIL_QUEUE_LEASE'])
+    # A second worker polling now finds nothing to send
+    assert claim_queued_emails(10) == []
+
+
+def test_failed_delivery_backs_off_exponentially(app, app_ctx, monkeypatch):
+    monkeypatch.setattr(app_enhanced, 'open_mail_connection', BrokenConnection)
+    email = add_email()
+    delay = app.config['MAIL_QUEUE_RETRY_DELAY']
+    for attempt in (1, 2, 3):
+        before = datetime.utcnow()
+        assert process_mail_queue() == 1
+        db.session.refresh(email)
+        assert email.status == 'pending'
+        assert email.attempts == attempt
+        assert email.last_error == 'relay refused'
+        expected = timedelta(seconds=delay * 2 ** (attempt - 1))
+        assert expected <= email.next_attempt_at - before < expected + timedelta(seconds=5)
+        # Not due yet, so the next poll leaves it alone
+        assert process_mail_queue() == 0
+        email.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+
+
+def test_delivery_gives_up_after_max_attempts(app, app_ctx, monkeypatch):
+    monkeypatch.setattr(app_enhanced, 'open_mail_connection', BrokenConnection)
+    email = add_email(attempts=app.config['MAIL_QUEUE_MAX_ATTEMPTS'] - 1)
+    process_mail_queue()
+    db.session.refresh(email)
+    assert email.status == 'failed'
+    assert process_mail_queue() == 0
+
+
+@pytest.mark.parametrize('failure', ['connect', 'send'])
+def test_connection_failures_reschedule_every_email_in_the_batch(app, app_ctx, monkeypatch, failure):
+    if failure == 'connect':
+        def refuse():
+            raise OSError('connection refused')
+        monkeypatch.setattr(app_enhanced, 'open_mail_connection', refuse)
+    else:
+        monkeypatch.setattr(app_enhanced, 'open_mail_connection', BrokenConnection)
+    emails = [add_email(), add_email()]
+    assert process_mail_queue() == 2
+    for email in emails:
+        db.session.refresh(email)
+        assert email.attempts == 1 and email.status == 'pending'
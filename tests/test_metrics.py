@@ -0,0 +1,63 @@
+import os
+import pstats
+import re
+
+import pytest
+
+from app_enhanced import Counter, Histogram
+
+
+def sample(text, name, **labels):
+    """Value of one exposed series, e.g. sample(text, 'x_count', endpoint='home')"""
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(f'{name}{{{selector}}}' if labels else name) + r' (\S+)$'
+    match = re.search(pattern, text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'Latency.', (0.1, 1.0), ('endpoint',))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, endpoint='home')
+    text = '\n'.join(histogram.expose())
+    assert sample(text, 'latency_bucket', endpoint='home', le='0.1') == 1
+    assert sample(text, 'latency_bucket', endpoint='home', le='1.0') == 2
+    assert sample(text, 'latency_bucket', endpoint='home', le='+Inf') == 3
+    assert sample(text, 'latency_sum', endpoint='home') == pytest.approx(5.55)
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('hits', 'Hits.', ('path',))
+    counter.inc(2, path='a"b')
+    assert 'hits{path="a\\"b"} 2' in counter.expose()
+
+
+def test_metrics_need_a_token_or_an_admin(app, client, admin_client, monkeypatch):
+    assert client.get('/metrics').status_code == 403
+    assert admin_client.get('/metrics').status_code == 200
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-me')
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'}).status_code == 200
+
+
+def test_requests_record_latency_and_queries(client, admin_client):
+    before = admin_client.get('/metrics').get_data(as_text=True)
+    client.get('/blog')
+    after = admin_client.get('/metrics').get_data(as_text=True)
+    count = 'http_request_duration_seconds_count'
+    labels = {'endpoint': 'blog_page', 'method': 'GET', 'status': '200'}
+    assert sample(after, count, **labels) == (sample(before, count, **labels) or 0) + 1
+    assert sample(after, 'http_request_db_queries_count', endpoint='blog_page') is not None
+    assert 'template_render_seconds_count{template="enhanced/blog.html"}' in after
+
+
+def test_profiling_is_admin_only_and_opt_in(app, client, admin_client, monkeypatch):
+    assert 'X-Profile' not in admin_client.get('/blog?_profile=1').headers
+    monkeypatch.setitem(app.config, 'PROFILING_ENABLED', True)
+    assert 'X-Profile' not in client.get('/blog?_profile=1').headers
+
+    response = admin_client.get('/blog?_profile=1')
+    name = response.headers['X-Profile']
+    assert name.startswith('blog_page-') and name.endswith('.prof')
+    stats = pstats.Stats(os.path.join(app.config['PROFILE_DIR'], name))
+    assert stats.total_calls > 0
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app_enhanced import INITIAL_MIGRATION
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def head_revision():
+    config = Config()
+    config.set_main_option('script_location', os.path.join(REPO_DIR, 'migrations'))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / 'site.db')
+
+
+def flask(database, *args):
+    """Run a CLI command in a fresh process against `database`"""
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', *args], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def query(database, sql):
+    with sqlite3.connect(database) as connection:
+        return connection.execute(sql).fetchall()
+
+
+def test_init_creates_the_schema_the_models_describe(database):
+    flask(database, 'init')
+    assert query(database, 'SELECT version_num FROM alembic_version') == [(head_revision(),)]
+    assert query(database, "SELECT username, is_admin FROM user") == [('admin', 1)]
+    assert 'No new upgrade operations detected' in flask(database, 'db', 'check')
+
+
+def test_legacy_create_all_database_is_adopted_and_upgraded(database):
+    # A database made by the old db.create_all() path: the initial schema, no migration history
+    flask(database, 'db', 'upgrade', INITIAL_MIGRATION)
+    with sqlite3.connect(database) as connection:
+        connection.executescript("""
+            DROP TABLE alembic_version;
+            INSERT INTO user (username, email, password_hash, is_admin) VALUES ('admin', 'a@example.com', 'x', 1);
+            INSERT INTO blog_post (title, slug, content, author, published, created_at, updated_at)
+                VALUES ('Legacy solar post', 'legacy', '<p>Solar farms in Malabo</p>', 'Editor', 1,
+                        '2024-01-01 00:00:00', '2024-01-01 00:00:00');
+            INSERT INTO portfolio_item (title, description, category, status, gallery_images, created_at)
+                VALUES ('Legacy port', 'Harbour works', 'infrastructure', 'completed',
+                        'uploads/portfolio/a.jpg, uploads/portfolio/b.jpg', '2024-01-01 00:00:00');
+            INSERT INTO contact_submission (name, email, message, status, created_at)
+                VALUES ('Ada', 'ada@example.com', 'Question about solar', 'new', '2024-01-01 00:00:00');
+        """)
+
+    flask(database, 'init')
+
+    assert query(database, 'SELECT version_num FROM alembic_version') == [(head_revision(),)]
+    assert query(database, 'SELECT word_count IS NOT NULL FROM blog_post') == [(1,)]
+    assert query(database, 'SELECT path, position FROM portfolio_image ORDER BY position') == [
+        ('uploads/portfolio/a.jpg', 0), ('uploads/portfolio/b.jpg', 1)]
+    assert sorted(query(database, 'SELECT kind FROM search_index')) == [('blog',), ('contact',), ('portfolio',)]
+    assert query(database, "SELECT kind FROM search_index WHERE search_index MATCH 'solar' AND kind = 'blog'")
+    indexes = {name for (name,) in query(database, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'ix_contact_submission_created_at', 'ix_portfolio_item_status_created_at'} <= indexes
+    # Running it again changes nothing
+    flask(database, 'init')
+    assert query(database, 'SELECT count(*) FROM search_index') == [(3,)]
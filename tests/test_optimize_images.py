@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import app_enhanced
+from app_enhanced import file_sha256, get_image_variants, image_original_path, load_image_manifest
+
+
+@pytest.fixture
+def library(app, monkeypatch, static_dir):
+    """Limit the batch command to a scratch folder with small output sizes"""
+    monkeypatch.setattr(app_enhanced, 'IMAGE_LIBRARY_DIRS', (static_dir,))
+    monkeypatch.setitem(app.config, 'IMAGE_MAX_WIDTH', 500)
+    monkeypatch.setitem(app.config, 'IMAGE_VARIANT_WIDTHS', [160])
+    return static_dir
+
+
+def write_static(app, path, data):
+    with open(os.path.join(app.static_folder, path), 'wb') as f:
+        f.write(data)
+
+
+def run_optimize(app, *args):
+    result = app.test_cli_runner().invoke(args=['optimize-images', '--workers', '1', *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_unchanged_images_are_skipped(app, library, make_jpeg):
+    write_static(app, f'{library}/a.jpg', make_jpeg(700, 350))
+    assert '1 to process' in run_optimize(app)
+    assert '1 unchanged, 0 to process' in run_optimize(app)
+
+
+def test_manifest_is_keyed_on_the_pristine_source(app, library, make_jpeg):
+    path = f'{library}/a.jpg'
+    upload = make_jpeg(700, 350, gps=True)
+    write_static(app, path, upload)
+    run_optimize(app)
+    with app.app_context():
+        entry = load_image_manifest()[path]
+        assert entry['source_hash'] == file_sha256(image_original_path(path))
+        assert entry['hash'] == file_sha256(os.path.join(app.static_folder, path))
+    with open(image_original_path(path), 'rb') as f:
+        assert f.read() == upload
+
+
+def test_force_rebuilds_from_the_original_without_generation_loss(app, library, make_jpeg):
+    path = f'{library}/a.jpg'
+    write_static(app, path, make_jpeg(700, 350))
+    run_optimize(app)
+    with open(os.path.join(app.static_folder, path), 'rb') as f:
+        first = f.read()
+    for _ in range(2):
+        assert '1 to process' in run_optimize(app, '--force')
+    with open(os.path.join(app.static_folder, path), 'rb') as f:
+        assert f.read() == first
+
+
+def test_replaced_static_file_becomes_the_new_original(app, library, make_jpeg):
+    path = f'{library}/a.jpg'
+    write_static(app, path, make_jpeg(700, 350))
+    run_optimize(app)
+    replacement = make_jpeg(300, 200)
+    write_static(app, path, replacement)
+    assert '1 to process' in run_optimize(app)
+    with open(image_original_path(path), 'rb') as f:
+        assert f.read() == replacement
+
+
+def test_records_referencing_an_image_get_its_variants(app, library, make_jpeg, make_post):
+    path = f'{library}/a.jpg'
+    write_static(app, path, make_jpeg(700, 350))
+    with app.app_context():
+        post_id = make_post(featured_image=path).id
+    assert '1 record(s) updated' in run_optimize(app)
+    with app.app_context():
+        post = app_enhanced.db.session.get(app_enhanced.BlogPost, post_id)
+        assert get_image_variants(post)[path]['width'] == 500
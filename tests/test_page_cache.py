@@ -0,0 +1,102 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from app_enhanced import app as flask_app, db, format_cursor, invalidate_page_cache, page_cache_key
+
+
+@contextmanager
+def count_queries(app):
+    """Yield a list whose length is the number of SQL statements run inside the block"""
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    db.event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        db.event.remove(engine, 'before_cursor_execute', record)
+
+
+def get_blog(client, path='/blog', **kwargs):
+    with count_queries(flask_app) as statements:
+        response = client.get(path, **kwargs)
+    assert response.status_code == 200
+    return response, len(statements)
+
+
+def test_second_request_is_served_from_the_cache(client, app):
+    first, queries = get_blog(client)
+    assert queries > 0
+    second, queries = get_blog(client)
+    assert queries == 0
+    assert second.get_data() == first.get_data()
+
+
+def test_etag_revalidation_returns_304(client, app):
+    response, _ = get_blog(client)
+    assert response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+    revalidated = client.get('/blog', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b''
+
+
+def test_admin_save_invalidates_cached_pages(admin_client, app, make_post):
+    get_blog(admin_client)
+    with app.app_context():
+        post = make_post(title='Freshly Published Headline')
+        post_id = post.id
+    # Saved straight to the database: the cached page is still served
+    assert 'Freshly Published Headline' not in get_blog(admin_client)[0].get_data(as_text=True)
+    response = admin_client.post(f'/admin/blogpost/edit/?id={post_id}', data={
+        'title': 'Freshly Published Headline', 'slug': 'fresh', 'content': '<p>Body</p>',
+        'author': 'Editor', 'published': 'y'})
+    assert response.status_code == 302
+    assert 'Freshly Published Headline' in get_blog(admin_client)[0].get_data(as_text=True)
+
+
+def test_stamp_replaced_by_another_process_invalidates(client, app):
+    get_blog(client)
+    stamp = app.config['PAGE_CACHE_STAMP']
+    # What invalidate_page_cache() does in another worker: a new file, not a clear()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(stamp))
+    os.close(fd)
+    os.replace(tmp_path, stamp)
+    assert get_blog(client)[1] > 0
+
+
+def test_scheme_and_host_get_separate_entries(client, app):
+    get_blog(client)
+    assert get_blog(client, base_url='https://localhost')[1] > 0
+    assert get_blog(client, base_url='http://www.example.org')[1] > 0
+    assert get_blog(client, base_url='https://localhost')[1] == 0
+
+
+@pytest.mark.parametrize('query', ['older=not-a-cursor', 'newer=2026-01-01_x', 'page=2x', 'older='])
+def test_invalid_pagination_arguments_are_not_cached(client, app, query):
+    get_blog(client, f'/blog?{query}')
+    assert get_blog(client, f'/blog?{query}')[1] > 0
+
+
+def test_cursors_are_keyed_by_their_normalized_form(client, app):
+    cursor = format_cursor(datetime(2030, 1, 1), 7)
+    get_blog(client, f'/blog?older={cursor}')
+    # The same position with a zero-padded id maps to the same entry
+    assert get_blog(client, f'/blog?older={cursor[:-1]}007')[1] == 0
+    with flask_app.test_request_context(f'/blog?older={cursor}&utm_source=x'):
+        assert f'older={cursor}' in page_cache_key()
+        assert 'utm_source' not in page_cache_key()
+
+
+def test_invalidate_clears_this_process(client, app):
+    get_blog(client)
+    with app.app_context():
+        invalidate_page_cache()
+    assert get_blog(client)[1] > 0
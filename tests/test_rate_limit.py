@@ -0,0 +1,110 @@
+import pytest
+
+import app_enhanced
+from app_enhanced import (
+    ContactSubmission, MemoryRateLimitStore, OutboundEmail, SQLiteRateLimitStore, parse_rate_limit, take_token,
+)
+
+
+@pytest.fixture
+def limits(app, monkeypatch):
+    """Turn rate limiting on with an empty bucket store"""
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    app_enhanced.rate_limit_store.clear()
+    yield app.config
+    app_enhanced.rate_limit_store.clear()
+
+
+def contact(client, **fields):
+    data = {'name': 'Ada', 'email': 'ada@example.com', 'service': 'energy',
+            'message': 'Interested in a geothermal plant'}
+    data.update(fields)
+    return client.post('/contact', data=data)
+
+
+def stored_contacts(app):
+    with app.app_context():
+        return ContactSubmission.query.count()
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit('5/hour') == (5, 3600)
+    assert parse_rate_limit('20 / minute') == (20, 60)
+
+
+def test_bucket_refills_continuously():
+    # 5/hour: a full bucket allows a burst of five, then one every 12 minutes
+    tokens, wait = take_token(0.5, 0, 0, 5, 3600)
+    assert (tokens, wait) == (0.5, 360)
+    assert take_token(0.5, 0, 360, 5, 3600) == (pytest.approx(0), 0)
+    assert take_token(2, 0, 10 ** 6, 5, 3600) == (4, 0)
+
+
+def test_memory_store_evicts_the_least_recently_used_key():
+    store = MemoryRateLimitStore(max_keys=2)
+    assert store.consume('a', 1, 60) == 0
+    assert store.consume('b', 1, 60) == 0
+    assert store.consume('a', 1, 60) > 0
+    store.consume('c', 1, 60)
+    assert store.consume('b', 1, 60) == 0  # evicted, so full again
+    assert store.consume('c', 1, 60) > 0
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    first, second = (SQLiteRateLimitStore(str(tmp_path / 'limits.db')) for _ in range(2))
+    assert first.consume('key', 2, 60) == 0
+    assert second.consume('key', 2, 60) == 0
+    assert first.consume('key', 2, 60) == pytest.approx(30, abs=1)
+
+
+def test_contact_posts_are_limited_per_ip(app, client, limits, monkeypatch):
+    monkeypatch.setitem(limits, 'RATE_LIMIT_CONTACT_IP', '2/hour')
+    assert [contact(client, email=f'{i}@example.com').status_code for i in range(2)] == [302, 302]
+    response = contact(client, email='late@example.com')
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= 1800
+    assert stored_contacts(app) == 2
+
+
+def test_contact_posts_are_limited_per_email(app, client, limits, monkeypatch):
+    monkeypatch.setitem(limits, 'RATE_LIMIT_CONTACT_EMAIL', '1/hour')
+    assert contact(client).status_code == 302
+    assert contact(client, message='A different question entirely').status_code == 429
+    assert contact(client, email='other@example.com').status_code == 302
+
+
+def test_honeypot_gets_a_normal_response_and_no_row(app, client, limits):
+    response = contact(client, website='http://spam.example')
+    assert response.status_code == 302
+    assert stored_contacts(app) == 0
+    with app.app_context():
+        assert OutboundEmail.query.count() == 0
+
+
+def test_a_resent_message_is_dropped(app, client, limits):
+    assert contact(client).status_code == 302
+    assert contact(client, message='  Interested in a   geothermal plant ').status_code == 302
+    assert stored_contacts(app) == 1
+
+
+def test_nothing_is_limited_when_disabled(app, client):
+    for _ in range(3):
+        assert contact(client).status_code == 302
+    assert stored_contacts(app) == 3
+
+
+def test_login_attempts_are_limited_per_user(app, limits, monkeypatch):
+    monkeypatch.setitem(limits, 'RATE_LIMIT_LOGIN_USER', '2/hour')
+    client = app.test_client()
+    for _ in range(2):
+        assert client.post('/admin/login', data={'username': 'admin', 'password': 'wrong'}).status_code == 200
+    response = client.post('/admin/login', data={'username': 'admin', 'password': 'test-admin-password'})
+    assert response.status_code == 429
+
+
+def test_login_honeypot_never_logs_in(app, limits):
+    client = app.test_client()
+    response = client.post('/admin/login', data={'username': 'admin', 'password': 'test-admin-password',
+                                                 'website': 'x'})
+    assert response.status_code == 200
+    assert client.get('/admin/').status_code == 302
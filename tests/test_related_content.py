@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app_enhanced import (
+    RelatedContent, db, get_related, rank_related, rebuild_related_content,
+    update_related_content,
+)
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def posts(app_ctx, make_post):
+    """Two solar posts, two cocoa posts and a filler, oldest first"""
+    created = {}
+    for i, (key, title, tags) in enumerate([
+        ('solar', 'Solar farms near Malabo', 'solar,energy'),
+        ('panels', 'Rooftop solar panels', 'solar,energy'),
+        ('cocoa', 'Cocoa harvest season', 'agriculture'),
+        ('exports', 'Cocoa exports grow', 'agriculture,trade'),
+        ('harbour', 'Harbour dredging works', 'infrastructure'),
+    ]):
+        created[key] = make_post(title=title, tags=tags, content=f'<p>{title}</p>',
+                                 created_at=START + timedelta(hours=i))
+    return created
+
+
+def related_titles(kind, model):
+    return [item.title for item in get_related(kind, model)]
+
+
+def test_rank_related_pads_short_lists_with_the_newest_candidates():
+    scores = {('a', 'b'): 0.5, ('a', 'c'): 0.0, ('a', 'd'): 0.0}
+    ranked = rank_related(['a'], lambda a, b: scores.get((a, b), 0.0), ['d', 'c', 'b', 'a'], limit=2)
+    assert ranked == {'a': ['b', 'd']}
+
+
+def test_posts_sharing_terms_rank_first(posts):
+    assert rebuild_related_content(kinds=('blog',)) == 5
+    assert related_titles('blog', posts['solar'])[0] == 'Rooftop solar panels'
+    assert related_titles('blog', posts['exports'])[0] == 'Cocoa harvest season'
+    assert all(len(get_related('blog', post)) == 3 for post in posts.values())
+
+
+def test_unpublished_posts_are_never_suggested(posts, make_post):
+    make_post(title='Solar farms draft', tags='solar,energy', published=False)
+    rebuild_related_content(kinds=('blog',))
+    assert 'Solar farms draft' not in related_titles('blog', posts['solar'])
+
+
+def test_update_follows_an_edit(posts):
+    rebuild_related_content(kinds=('blog',))
+    harbour = posts['harbour']
+    harbour.title, harbour.tags = 'Solar energy at the harbour', 'solar,energy'
+    db.session.commit()
+    update_related_content('blog', [harbour.id])
+    assert 'Rooftop solar panels' in related_titles('blog', harbour)[:2]
+    assert 'Solar energy at the harbour' in related_titles('blog', posts['solar'])[:2]
+
+
+def test_update_drops_a_deleted_post(posts):
+    rebuild_related_content(kinds=('blog',))
+    panels = posts['panels']
+    db.session.delete(panels)
+    db.session.commit()
+    update_related_content('blog', [panels.id])
+    assert db.session.get(RelatedContent, ('blog', panels.id)) is None
+    assert 'Rooftop solar panels' not in related_titles('blog', posts['solar'])
+
+
+def test_incremental_update_matches_a_rebuild_for_a_new_post(posts, make_post):
+    rebuild_related_content(kinds=('blog',))
+    post = make_post(title='Cocoa processing plant', tags='agriculture', created_at=START + timedelta(days=1))
+    update_related_content('blog', [post.id])
+    incremental = {entry.ref_id: entry.related_ids for entry in RelatedContent.query.filter_by(kind='blog')}
+    rebuild_related_content(kinds=('blog',))
+    assert {entry.ref_id: entry.related_ids for entry in RelatedContent.query.filter_by(kind='blog')} == incremental
+
+
+def test_projects_sharing_category_and_location_rank_first(app_ctx, make_project):
+    port = make_project(title='Port expansion', category='infrastructure', location='Bata')
+    make_project(title='Airport terminal', category='infrastructure', location='Malabo')
+    make_project(title='Bata ring road', category='infrastructure', location='Bata')
+    make_project(title='Cocoa cooperative', category='agriculture', location='Bata')
+    make_project(title='Future tower', category='infrastructure', location='Bata', status='planning')
+    rebuild_related_content(kinds=('portfolio',))
+    assert related_titles('portfolio', port) == ['Bata ring road', 'Airport terminal', 'Cocoa cooperative']
+
+
+def test_blog_post_page_lists_related_posts(app, client, posts):
+    rebuild_related_content(kinds=('blog',))
+    html = client.get(f"/blog/{posts['solar'].slug}").get_data(as_text=True)
+    assert 'Related Articles' in html and 'Rooftop solar panels' in html
+
+
+def test_related_rebuild_command(app, posts):
+    result = app.test_cli_runner().invoke(args=['related-rebuild'])
+    assert result.exit_code == 0, result.output
+    assert 'Stored related items for 5 item(s)' in result.output
+    assert RelatedContent.query.filter_by(kind='blog').count() == 5
@@ -0,0 +1,111 @@
+import os
+import uuid
+
+import pytest
+from PIL import Image
+
+import app_enhanced
+from app_enhanced import (
+    prune_remote_image_cache, remote_image, remote_image_key, remote_image_url, warm_remote_images,
+)
+
+
+@pytest.fixture
+def cache_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'REMOTE_IMAGE_CACHE_DIR', str(tmp_path / 'remote'))
+    monkeypatch.setitem(app.config, 'IMAGE_VARIANT_WIDTHS', [160, 320])
+    return tmp_path / 'remote'
+
+
+@pytest.fixture
+def remote_url(app, make_jpeg):
+    """URL of a 400x200 image served by the offline fixture fetcher"""
+    name = f'remote-{uuid.uuid4().hex[:8]}.jpg'
+    directory = app.config['REMOTE_IMAGE_FIXTURE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(make_jpeg(400, 200))
+    yield f'https://images.example.com/photos/{name}?w=2000'
+    os.remove(os.path.join(directory, name))
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """URLs handed to the remote image fetcher during the test"""
+    calls = []
+    fetcher = app_enhanced.remote_image_fetcher
+
+    def counting(url):
+        calls.append(url)
+        return fetcher(url)
+    monkeypatch.setattr(app_enhanced, 'remote_image_fetcher', counting)
+    return calls
+
+
+def image_url(app, url, width, format='jpg'):
+    with app.test_request_context():
+        return remote_image_url(url, width, format)
+
+
+def test_urls_round_up_to_a_configured_width(app, cache_dir, remote_url):
+    with app.test_request_context():
+        key = remote_image_key(remote_url)
+        assert key != remote_image_key(remote_url + '&x=1')
+    assert image_url(app, remote_url, 200).startswith(f'/remote-image/{key}-320.jpg?src=')
+    assert image_url(app, remote_url, 5000, 'webp').startswith(f'/remote-image/{key}-320.webp?src=')
+
+
+def test_first_request_fetches_and_resizes_then_serves_from_cache(app, client, cache_dir, remote_url, fetches):
+    for format, mimetype in (('jpg', 'image/jpeg'), ('webp', 'image/webp')):
+        response = client.get(image_url(app, remote_url, 160, format))
+        assert response.status_code == 200
+        assert response.mimetype == mimetype
+        assert 'immutable' in response.headers['Cache-Control']
+        with Image.open(cache_dir / response.request.path.split('/')[-1]) as img:
+            assert img.size == (160, 80)
+    client.get(image_url(app, remote_url, 160))
+    assert fetches == [remote_url]  # one download shared by every size and format
+
+
+@pytest.mark.parametrize('tamper', [
+    lambda url: url.replace('src=', 'src=https%3A%2F%2Fevil.example%2Fx.jpg&ignored='),
+    lambda url: url.replace('-160.', '-170.'),
+    lambda url: url.replace('.jpg?', '.png?'),
+])
+def test_unsigned_or_unknown_requests_are_404(app, client, cache_dir, remote_url, fetches, tamper):
+    assert client.get(tamper(image_url(app, remote_url, 160))).status_code == 404
+    assert fetches == []
+
+
+def test_failed_fetch_redirects_to_the_original(app, client, cache_dir):
+    url = 'https://images.example.com/photos/missing.jpg'
+    response = client.get(image_url(app, url, 160))
+    assert response.status_code == 302
+    assert response.headers['Location'] == url
+    assert not os.listdir(cache_dir)
+
+
+def test_least_recently_used_files_are_evicted(app, app_ctx, cache_dir, monkeypatch):
+    os.makedirs(cache_dir)
+    for age, name in enumerate(['new', 'middle', 'old']):
+        (cache_dir / name).write_bytes(b'x' * 100)
+        os.utime(cache_dir / name, (1000 - age, 1000 - age))
+    monkeypatch.setitem(app.config, 'REMOTE_IMAGE_CACHE_SIZE', 250)
+    assert prune_remote_image_cache() == 1
+    assert sorted(os.listdir(cache_dir)) == ['middle', 'new']
+
+
+def test_picture_markup_offers_webp_and_jpeg(app, cache_dir, remote_url):
+    with app.test_request_context():
+        html = str(remote_image(remote_url, alt='Port "A"', css_class='hero'))
+    assert html.startswith('<picture><source type="image/webp"')
+    assert '-160.webp' in html and '-320.jpg' in html and 'alt="Port &#34;A&#34;"' in html
+    assert 'class="hero"' in html
+
+
+def test_warming_reports_failures(app, app_ctx, cache_dir, remote_url, monkeypatch):
+    missing = 'https://images.example.com/photos/missing.jpg'
+    monkeypatch.setattr(app_enhanced, 'remote_image_sources', lambda: [remote_url, missing])
+    errors = warm_remote_images()
+    assert list(errors) == [missing]
+    assert len([name for name in os.listdir(cache_dir) if not name.endswith('.orig')]) == 4
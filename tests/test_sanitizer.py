@@ -0,0 +1,38 @@
+import pytest
+
+from app_enhanced import sanitize_html
+
+
+@pytest.mark.parametrize('url', [
+    'javascript:alert(1)',
+    ' JavaScript:alert(1)',
+    'java&#x09;script:alert(1)',
+    'java&#x0A;script:alert(1)',
+    'java&#x0D;script:alert(1)',
+    '&#x01;javascript:alert(1)',
+    'java\tscript:alert(1)',
+    'java\nscript:alert(1)',
+    'javascript&#58;alert(1)',
+    'vbscript:msgbox(1)',
+    'data:text/html;base64,PHNjcmlwdD5hbGVydCgxKTwvc2NyaXB0Pg==',
+])
+def test_unsafe_link_schemes_are_removed(url):
+    assert sanitize_html(f'<a href="{url}">x</a>') == '<a>x</a>'
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/a?b=c',
+    'mailto:info@example.com',
+    'tel:+240555000000',
+    '/blog/post',
+    'post-2',
+    '#top',
+    '?page=2',
+    'images/a:b.jpg',
+])
+def test_safe_links_are_kept(url):
+    assert sanitize_html(f'<a href="{url}">x</a>') == f'<a href="{url}">x</a>'
+
+
+def test_image_sources_are_checked():
+    assert sanitize_html('<img src="java&#x09;script:alert(1)" alt="a">') == '<img alt="a">'
@@ -0,0 +1,87 @@
+import pytest
+
+from app_enhanced import ContactSubmission, db, rebuild_search_index, search_documents
+
+
+def indexed(kind):
+    rows = db.session.execute(db.text('SELECT ref_id, title, body FROM search_index WHERE kind = :kind'),
+                              {'kind': kind}).all()
+    return {ref_id: (title, body) for ref_id, title, body in rows}
+
+
+@pytest.fixture
+def contact(app_ctx):
+    submission = ContactSubmission(name='Ada Investor', email='ada@example.com', phone='+240 555 000',
+                                   service='energy', message='Interested in geothermal plants',
+                                   notes='called back on monday')
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+def test_ranked_prefix_search_with_highlights(app_ctx, make_post, make_project):
+    make_post(title='Geothermal energy', content='<p>Malabo heat pumps</p>')
+    make_post(title='Harbour', content='<p>A note on geothermal wells</p>')
+    make_project(title='Cocoa plant', description='Agricultural processing')
+    hits = search_documents('geotherm')
+    assert [hit['title'] for hit in hits] == ['Geothermal energy', 'Harbour']
+    assert '<mark>' in str(hits[1]['snippet'])
+    assert [hit['kind'] for hit in search_documents('cocoa')] == ['portfolio']
+
+
+def test_unpublished_content_and_contacts_stay_out_of_public_search(app_ctx, make_post, contact):
+    make_post(title='Draft geothermal plans', published=False)
+    assert search_documents('geothermal') == []
+    assert [hit['id'] for hit in search_documents('geothermal', kinds=('contact',), public_only=False)] == [contact.id]
+
+
+def test_index_follows_edits_and_deletes(app_ctx, make_post):
+    post = make_post(title='Solar parks')
+    post.title = 'Wind parks'
+    db.session.commit()
+    assert search_documents('solar') == []
+    assert search_documents('wind')[0]['id'] == post.id
+    db.session.delete(post)
+    db.session.commit()
+    assert indexed('blog') == {}
+
+
+def test_unindexed_changes_leave_the_index_alone(app_ctx, contact, sql_statements):
+    contact.status = 'closed'
+    contact.notes = 'no longer interested'
+    db.session.commit()
+    assert not [s for s in sql_statements if 'search_index' in s]
+
+
+def test_contact_documents_hold_only_admin_search_fields(app_ctx, contact):
+    title, body = indexed('contact')[contact.id]
+    assert title == 'Ada Investor'
+    assert 'geothermal' in body and 'ada@example.com' in body
+    assert 'monday' not in body and '555' not in body and 'energy' not in body
+
+
+def test_rebuild_matches_incremental_updates(app_ctx, make_post, make_project, contact):
+    make_post(title='Solar parks')
+    make_project(title='Port works')
+    before = {kind: indexed(kind) for kind in ('blog', 'portfolio', 'contact')}
+    assert rebuild_search_index() == 3
+    assert {kind: indexed(kind) for kind in ('blog', 'portfolio', 'contact')} == before
+
+
+def test_admin_list_search_uses_the_index(app, admin_client, contact):
+    with app.app_context():
+        for i in range(30):
+            db.session.add(ContactSubmission(name=f'Other {i}', email='o@example.com', message='Unrelated note'))
+        db.session.commit()
+    html = admin_client.get('/admin/contactsubmission/?search=geotherm').get_data(as_text=True)
+    assert 'Ada Investor' in html and 'Other 1' not in html
+    # Notes are not indexed, so they are not searchable either
+    assert 'Ada Investor' not in admin_client.get('/admin/contactsubmission/?search=monday').get_data(as_text=True)
+
+
+def test_search_page_and_api(client, app, make_post):
+    with app.app_context():
+        make_post(title='Geothermal energy', slug='geothermal')
+    assert 'href="/blog/geothermal"' in client.get('/search?q=geothermal').get_data(as_text=True)
+    data = client.get('/api/search?q=geo').get_json()
+    assert data['results'][0]['url'] == '/blog/geothermal'
@@ -0,0 +1,47 @@
+from app_enhanced import CompanySettings, db, get_company_settings, invalidate_company_settings
+
+
+def update_settings(**values):
+    # Straight to the database, as another worker or a script would
+    db.session.execute(db.update(CompanySettings).values(**values))
+    db.session.commit()
+
+
+def test_settings_are_read_once_per_process(app, app_ctx):
+    invalidate_company_settings()
+    first = get_company_settings()
+    original = first.company_name
+    try:
+        update_settings(company_name='Renamed Elsewhere')
+        with app.test_request_context():
+            assert get_company_settings().company_name == original
+        invalidate_company_settings()
+        with app.test_request_context():
+            assert get_company_settings().company_name == 'Renamed Elsewhere'
+    finally:
+        update_settings(company_name=original)
+
+
+def test_cached_settings_stay_readable_after_the_session_closes(app, app_ctx):
+    invalidate_company_settings()
+    settings = get_company_settings()
+    db.session.remove()
+    assert settings.company_name
+
+
+def test_settings_admin_save_invalidates_the_cache(app, admin_client):
+    with app.app_context():
+        settings = CompanySettings.query.first()
+        settings_id = settings.id
+        original = {name: getattr(settings, name) for name in ('company_name', 'tagline', 'phone', 'email', 'address')}
+    try:
+        admin_client.get('/')  # warm the cache
+        response = admin_client.post(f'/admin/companysettings/edit/?id={settings_id}',
+                                     data={'company_name': 'Saved In Admin', 'tagline': 'x',
+                                           'phone': '1', 'email': 'a@b.com', 'address': 'y'})
+        assert response.status_code == 302
+        assert 'Saved In Admin' in admin_client.get('/contact').get_data(as_text=True)
+    finally:
+        with app.app_context():
+            update_settings(**original)
+            invalidate_company_settings()
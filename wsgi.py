@@ -0,0 +1,18 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app     # Linux
+    python wsgi.py                            # waitress, e.g. on Windows
+    flask --app wsgi <command>                # CLI commands
+"""
+import os
+
+from app_enhanced import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    # Keep threads within DB_POOL_SIZE + DB_MAX_OVERFLOW so requests never wait on the pool
+    serve(app, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', '5000')),
+          threads=int(os.environ.get('WAITRESS_THREADS', '8')))